@@ -1,18 +1,15 @@
-import os
 import json
 from typing import List, Dict, Any
-from openai import OpenAI
 
+from .llm import get_client, complete_json
+from .llm_cache import llm_cache
 
-def _get_client() -> OpenAI | None:
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        return None
-    return OpenAI(api_key=api_key)
+# Súbelo al cambiar el prompt: invalida la caché de respuestas
+PROMPT_VERSION = "1"
 
 
 def parse_note_to_tasks(texto: str, now_iso: str, timezone: str) -> List[Dict[str, Any]]:
-    client = _get_client()
+    client = get_client()
 
     if client is None:
         return [{
@@ -24,6 +21,10 @@ def parse_note_to_tasks(texto: str, now_iso: str, timezone: str) -> List[Dict[st
             "channel": None,
         }]
 
+    cached = llm_cache.get("note", texto, now_iso, timezone, PROMPT_VERSION)
+    if cached is not None:
+        return cached
+
     system_prompt = f"""
 Eres un asistente que convierte notas en tareas.
 
@@ -51,16 +52,13 @@ REGLAS:
 - No devuelvas fechas ISO, ni inventes años.
 """.strip()
 
-    resp = client.chat.completions.create(
-        model="gpt-4.1-mini",
-        response_format={"type": "json_object"},
-        messages=[
+    content = complete_json(
+        client,
+        [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": f'Nota: """{texto}"""'},
         ],
     )
-
-    content = resp.choices[0].message.content
     try:
         data = json.loads(content)
     except json.JSONDecodeError:
@@ -95,4 +93,5 @@ REGLAS:
             "channel": None,
         })
 
+    llm_cache.put("note", texto, now_iso, timezone, PROMPT_VERSION, out)
     return out
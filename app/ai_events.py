@@ -1,18 +1,15 @@
-import os
 import json
 from typing import Dict, Any
-from openai import OpenAI
 
+from .llm import get_client, complete_json
+from .llm_cache import llm_cache
 
-def _get_client() -> OpenAI | None:
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        return None
-    return OpenAI(api_key=api_key)
+# Súbelo al cambiar el prompt: invalida la caché de respuestas
+PROMPT_VERSION = "1"
 
 
 def parse_text_to_event(texto: str, now_iso: str, timezone: str) -> Dict[str, Any]:
-    client = _get_client()
+    client = get_client()
 
     if client is None:
         return {
@@ -26,6 +23,10 @@ def parse_text_to_event(texto: str, now_iso: str, timezone: str) -> Dict[str, An
             "timezone": timezone,
         }
 
+    cached = llm_cache.get("event", texto, now_iso, timezone, PROMPT_VERSION)
+    if cached is not None:
+        return cached
+
     system_prompt = f"""
 Eres un asistente que extrae UN evento de agenda a partir de texto.
 
@@ -62,16 +63,13 @@ REGLAS:
 5) NO inventes fechas ISO ni años.
 """.strip()
 
-    resp = client.chat.completions.create(
-        model="gpt-4.1-mini",
-        response_format={"type": "json_object"},
-        messages=[
+    content = complete_json(
+        client,
+        [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": f'Texto: """{texto}"""'},
         ],
     )
-
-    content = resp.choices[0].message.content
     try:
         data = json.loads(content)
     except json.JSONDecodeError:
@@ -86,7 +84,7 @@ REGLAS:
             "timezone": timezone,
         }
 
-    return {
+    out = {
         "title": (data.get("title") or texto[:60]).strip(),
         "description": (data.get("description") or texto).strip(),
         "date_text": data.get("date_text") or None,
@@ -96,3 +94,5 @@ REGLAS:
         "rrule": data.get("rrule") or None,
         "timezone": data.get("timezone") or timezone,
     }
+    llm_cache.put("event", texto, now_iso, timezone, PROMPT_VERSION, out)
+    return out
@@ -1,19 +1,17 @@
-import os
 import json
 from typing import Dict, Any, List
-from openai import OpenAI
 
-def _get_client() -> OpenAI | None:
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        return None
-    return OpenAI(api_key=api_key)
+from .llm import get_client, complete_json
+from .llm_cache import llm_cache
+
+# Súbelo al cambiar el prompt de analyze_reminder_intent: invalida la caché
+PROMPT_VERSION = "1"
 
 def analyze_reminder_intent(texto: str, now_iso: str, timezone: str) -> Dict[str, Any]:
     """
     Analiza si el texto es un recordatorio y extrae información.
     """
-    client = _get_client()
+    client = get_client()
     
     if client is None:
         # Fallback si no hay AI key
@@ -24,6 +22,10 @@ def analyze_reminder_intent(texto: str, now_iso: str, timezone: str) -> Dict[str
             "needs_conversation": False
         }
 
+    cached = llm_cache.get("reminder_intent", texto, now_iso, timezone, PROMPT_VERSION)
+    if cached is not None:
+        return cached
+
     system_prompt = f"""
 Eres Plani, un asistente experto en gestión del tiempo.
 Tu tarea es analizar un texto y detectar SI ES UN RECORDATORIO.
@@ -57,16 +59,14 @@ Reglas CRÍTICAS:
 """.strip()
 
     try:
-        resp = client.chat.completions.create(
-            model="gpt-4.1-mini",
-            response_format={"type": "json_object"},
-            messages=[
+        content = complete_json(
+            client,
+            [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": texto},
             ],
         )
-        content = resp.choices[0].message.content
-        return json.loads(content)
+        result = json.loads(content)
     except Exception as e:
         print(f"Error AI analyze: {e}")
         return {
@@ -76,6 +76,9 @@ Reglas CRÍTICAS:
             "needs_conversation": False
         }
 
+    llm_cache.put("reminder_intent", texto, now_iso, timezone, PROMPT_VERSION, result)
+    return result
+
 def generate_reminder_question(
     conversation_history: List[Dict[str, str]],
     current_context: Dict[str, Any],
@@ -86,7 +89,7 @@ def generate_reminder_question(
     """
     Genera la siguiente pregunta de Plani basada en el historial y contexto.
     """
-    client = _get_client()
+    client = get_client()
     if not client:
         return {
             "message": "¿Cuándo?",
@@ -123,12 +126,7 @@ Devuelve JSON:
         # Añadir historial (últimos 6 mensajes para contexto)
         messages.extend(conversation_history[-6:])
 
-        resp = client.chat.completions.create(
-            model="gpt-4.1-mini",
-            response_format={"type": "json_object"},
-            messages=messages,
-        )
-        content = resp.choices[0].message.content
+        content = complete_json(client, messages)
         return json.loads(content)
     except Exception as e:
         print(f"Error AI question: {e}")
@@ -0,0 +1,115 @@
+"""
+Caché en proceso de token -> usuario para no consultar la tabla users en cada
+petición autenticada.
+
+Se guarda una copia de las columnas del usuario y en cada acierto se entrega
+una instancia desacoplada de la sesión, así que un commit en el router no la
+caduca. Las modificaciones y borrados de User por el ORM invalidan las
+entradas de ese usuario en este proceso; en el resto de workers la entrada
+vive como mucho AUTH_CACHE_TTL_SECONDS (con 0 se desactiva la caché).
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import make_transient_to_detached
+
+from . import models
+
+AUTH_CACHE_TTL_SECONDS = int(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+
+_USER_COLUMNS = ("id", "email", "hashed_password", "created_at")
+
+
+class AuthCache:
+    def __init__(self, ttl_seconds: int = AUTH_CACHE_TTL_SECONDS, max_entries: int = AUTH_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # token -> (caduca_en monotonic, columnas del usuario)
+        self._data: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+        self._by_user: dict[int, set[str]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def _drop(self, token: str) -> None:
+        _, values = self._data.pop(token)
+        tokens = self._by_user.get(values["id"])
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._by_user[values["id"]]
+
+    def get(self, token: str) -> Optional[models.User]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            item = self._data.get(token)
+            if item is None or item[0] <= time.monotonic():
+                if item is not None:
+                    self._drop(token)
+                self.misses += 1
+                return None
+            self._data.move_to_end(token)
+            self.hits += 1
+            values = item[1]
+
+        user = models.User(**values)
+        make_transient_to_detached(user)
+        return user
+
+    def put(self, token: str, user: models.User, token_exp: Optional[float] = None) -> None:
+        """Guarda el usuario; la entrada no sobrevive al `exp` del token."""
+        if not self.enabled:
+            return
+        expires = time.monotonic() + self.ttl_seconds
+        if token_exp is not None:
+            expires = min(expires, time.monotonic() + (token_exp - time.time()))
+        values = {c: getattr(user, c) for c in _USER_COLUMNS}
+        with self._lock:
+            if token in self._data:
+                self._drop(token)
+            self._data[token] = (expires, values)
+            self._by_user.setdefault(values["id"], set()).add(token)
+            while len(self._data) > self.max_entries:
+                self._drop(next(iter(self._data)))
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for token in list(self._by_user.get(user_id, ())):
+                self._drop(token)
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._by_user.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+
+auth_cache = AuthCache()
+
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target) -> None:
+    auth_cache.invalidate_user(target.id)
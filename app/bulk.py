@@ -0,0 +1,135 @@
+"""
+Persistencia por lotes.
+
+Inserta varias filas con un único INSERT ... RETURNING (SQLite >= 3.35 y
+Postgres) dentro de una sola transacción, en lugar de add/commit/refresh por
+fila.
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from . import models, schemas
+from .dates_es import build_when_text, parse_when_to_datetime
+from .feed import touch_feed
+from .scheduling import DAY_PART_HOURS
+
+
+def insert_returning(db: Session, model, rows: List[Dict[str, Any]]) -> list:
+    """INSERT masivo que devuelve las entidades creadas (con id) en el orden de `rows`."""
+    if not rows:
+        return []
+    # sort_by_parameter_order=True hace que SQLite vuelva a un INSERT por fila;
+    # en un único INSERT multi-VALUES los ids autoincrementales siguen el orden de las filas
+    created = list(db.scalars(insert(model).returning(model), rows))
+    return sorted(created, key=lambda obj: obj.id)
+
+
+def parsed_task_rows(user_id: int, tasks_data: List[Dict[str, Any]], now: datetime, tzname: str) -> List[Dict[str, Any]]:
+    rows = []
+    for t in tasks_data:
+        when_text = build_when_text(t.get("date_text"), t.get("time_text"), t.get("day_part"))
+        dt = parse_when_to_datetime(
+            when_text=when_text,
+            now=now,
+            tzname=tzname,
+            date_text=t.get("date_text"),
+            time_text=t.get("time_text"),
+        )
+        rows.append({
+            "user_id": user_id,
+            "title": t["title"],
+            "description": t["description"],
+            "date": dt,
+            "channel": t.get("channel"),
+            "day_part": t.get("day_part") if t.get("day_part") in DAY_PART_HOURS else None,
+        })
+    return rows
+
+
+def persist_parsed_tasks(
+    db: Session,
+    user_id: int,
+    tasks_data: List[Dict[str, Any]],
+    now: datetime,
+    tzname: str,
+    atomic: bool = True,
+) -> List[schemas.TaskRead]:
+    """
+    Crea las tareas de una nota en una sola transacción.
+
+    Con atomic=True (por defecto) o se crean todas o ninguna. Con atomic=False
+    cada fila va en su propio SAVEPOINT y las que fallan se descartan.
+    """
+    rows = parsed_task_rows(user_id, tasks_data, now, tzname)
+
+    try:
+        if atomic:
+            created = insert_returning(db, models.Task, rows)
+        else:
+            created = []
+            for row in rows:
+                try:
+                    with db.begin_nested():
+                        created.extend(insert_returning(db, models.Task, [row]))
+                except SQLAlchemyError as e:
+                    print(f"Error creando tarea '{row['title']}': {e}")
+        # Copia antes del commit: así no hay un SELECT de refresco por tarea
+        result = [schemas.TaskRead.model_validate(t) for t in created]
+        if any(t.date is not None for t in result):
+            touch_feed(db, user_id)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return result
+
+
+def insert_chunked(
+    db: Session,
+    model,
+    rows: Iterable[Tuple[int, Dict[str, Any]]],
+    chunk_size: int = 1000,
+) -> Tuple[int, List[Tuple[int, str]]]:
+    """
+    Inserta (línea, fila) por tramos de `chunk_size`, con un commit por tramo.
+
+    Si un tramo falla en la base de datos se reintenta fila a fila con
+    SAVEPOINT para quedarse con las buenas y reportar las malas.
+    Devuelve (insertadas, [(línea, error)]).
+    """
+    inserted = 0
+    errors: List[Tuple[int, str]] = []
+
+    def flush(chunk: List[Tuple[int, Dict[str, Any]]]) -> None:
+        nonlocal inserted
+        try:
+            db.execute(insert(model), [row for _, row in chunk])
+            db.commit()
+            inserted += len(chunk)
+            return
+        except SQLAlchemyError:
+            db.rollback()
+
+        for line, row in chunk:
+            try:
+                with db.begin_nested():
+                    db.execute(insert(model), [row])
+                inserted += 1
+            except SQLAlchemyError as e:
+                errors.append((line, str(e.orig if hasattr(e, "orig") else e)))
+        db.commit()
+
+    chunk: List[Tuple[int, Dict[str, Any]]] = []
+    for item in rows:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = []
+    if chunk:
+        flush(chunk)
+
+    return inserted, errors
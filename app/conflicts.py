@@ -0,0 +1,285 @@
+"""
+Detección de solapes al crear eventos.
+
+Por usuario se mantiene en memoria un índice de intervalos con todas las
+ocurrencias de sus eventos dentro de una ventana [ayer, ayer + HORIZON]:
+inicios ordenados (bisect/searchsorted) y el máximo acumulado de los fines,
+así que cada consulta es O(log n + k) en lugar de recorrer los eventos.
+
+El índice guarda el (id, updated_at) de los eventos que contiene. En cada
+consulta se leen los del usuario (una consulta indexada) y se parchea la
+diferencia: los borrados se filtran, los nuevos y los editados (de este u
+otro worker) se expanden uno a uno y, si la ventana avanzó, solo se añade el
+tramo nuevo.
+La construcción inicial lee las ocurrencias ya materializadas en
+event_occurrences y solo expande los eventos que aún no lo están.
+"""
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from . import models, schemas
+from .recurrence import DEFAULT_TZ, expand_occurrences
+
+if TYPE_CHECKING:
+    import numpy as np
+
+CONFLICT_HORIZON_DAYS = int(os.getenv("CONFLICT_HORIZON_DAYS", "180"))
+CONFLICT_INDEX_USERS = int(os.getenv("CONFLICT_INDEX_USERS", "256"))
+MAX_REPORTED_CONFLICTS = 50
+
+Window = Tuple[datetime, datetime]
+# id de evento -> updated_at
+Versions = Dict[int, Optional[datetime]]
+
+
+class IntervalIndex:
+    """Intervalos [inicio, fin) inmutables con consulta de solape por lotes."""
+
+    def __init__(self, starts: "np.ndarray", ends: "np.ndarray", event_ids: "np.ndarray"):
+        import numpy as np
+
+        order = np.argsort(starts, kind="stable")
+        self.starts = starts[order]
+        self.ends = ends[order]
+        self.event_ids = event_ids[order]
+        # Máximo acumulado de fines: monótono, así que también admite búsqueda binaria
+        self.max_end = np.maximum.accumulate(self.ends) if len(self.ends) else self.ends
+
+    @classmethod
+    def from_intervals(cls, items: Iterable[Tuple[datetime, datetime, int]]) -> "IntervalIndex":
+        import numpy as np
+
+        rows = list(items)
+        return cls(
+            np.array([r[0] for r in rows], dtype="datetime64[us]"),
+            np.array([r[1] for r in rows], dtype="datetime64[us]"),
+            np.array([r[2] for r in rows], dtype=np.int64),
+        )
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def merged(self, other: "IntervalIndex") -> "IntervalIndex":
+        import numpy as np
+
+        return IntervalIndex(
+            np.concatenate([self.starts, other.starts]),
+            np.concatenate([self.ends, other.ends]),
+            np.concatenate([self.event_ids, other.event_ids]),
+        )
+
+    def filtered(self, keep: "np.ndarray") -> "IntervalIndex":
+        """Subíndice con los intervalos donde `keep` es True."""
+        return IntervalIndex(self.starts[keep], self.ends[keep], self.event_ids[keep])
+
+    def _of_events(self, event_ids: Iterable[int]) -> "np.ndarray":
+        import numpy as np
+
+        return np.isin(self.event_ids, np.fromiter(event_ids, dtype=np.int64))
+
+    def only_events(self, event_ids: Iterable[int]) -> "IntervalIndex":
+        return self.filtered(self._of_events(event_ids))
+
+    def without_events(self, event_ids: Iterable[int]) -> "IntervalIndex":
+        return self.filtered(~self._of_events(event_ids))
+
+    def overlapping(self, qs: "np.ndarray", qe: "np.ndarray") -> "np.ndarray":
+        """Posiciones (ordenadas por inicio, sin repetir) de los intervalos que solapan alguna consulta."""
+        import numpy as np
+
+        if not len(self.starts) or not len(qs):
+            return np.empty(0, dtype=np.int64)
+        # Solo pueden solapar los que empiezan antes de qe...
+        hi = np.searchsorted(self.starts, qe, side="left")
+        # ...y a partir del primero cuyo máximo de fines supera qs
+        lo = np.searchsorted(self.max_end, qs, side="right")
+        found = [
+            np.nonzero(self.ends[lo[q]:hi[q]] > qs[q])[0] + lo[q]
+            for q in np.nonzero(hi > lo)[0]
+        ]
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(found))
+
+
+def _window(now: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+    today = (now or datetime.now(ZoneInfo(DEFAULT_TZ)).replace(tzinfo=None)).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    lo = today - timedelta(days=1)
+    return lo, lo + timedelta(days=CONFLICT_HORIZON_DAYS)
+
+
+def event_intervals(ev: models.Event, lo: datetime, hi: datetime) -> List[Tuple[datetime, datetime]]:
+    if not ev.rrule:
+        return [(ev.start_at, ev.end_at)] if ev.end_at > lo and ev.start_at < hi else []
+    return expand_occurrences(ev.start_at, ev.end_at, ev.rrule, ev.timezone, lo, hi)
+
+
+def _event_versions(db: Session, user_id: int) -> Versions:
+    E = models.Event
+    return dict(db.execute(select(E.id, E.updated_at).where(E.user_id == user_id)).all())
+
+
+def _expand_events(events: Iterable[models.Event], lo: datetime, hi: datetime, start_from: Optional[datetime]):
+    for ev in events:
+        try:
+            occs = event_intervals(ev, lo, hi)
+        except ValueError:
+            continue
+        yield from ((s, e, ev.id) for s, e in occs if start_from is None or s >= start_from)
+
+
+def _load(
+    db: Session, user_id: int, lo: datetime, hi: datetime, start_from: Optional[datetime] = None
+) -> IntervalIndex:
+    """
+    Ocurrencias que solapan [lo, hi) (y empiezan en `start_from` o después).
+    Los eventos materializados hasta `hi` se leen de event_occurrences; los
+    demás (recién importados, horizonte corto) se expanden aquí.
+    """
+    E, O = models.Event, models.EventOccurrence
+    covered = E.occurrences_until >= hi
+    stmt = (
+        select(O.start_at, O.end_at, O.event_id)
+        .join(E, E.id == O.event_id)
+        .where(O.user_id == user_id, O.start_at < hi, O.end_at > lo, covered)
+    )
+    if start_from is not None:
+        stmt = stmt.where(O.start_at >= start_from)
+    items = list(db.execute(stmt))
+
+    pending = (
+        db.query(E)
+        .filter(
+            E.user_id == user_id,
+            or_(E.occurrences_until.is_(None), E.occurrences_until < hi),
+            or_(E.series_start.is_(None), E.series_start <= hi),
+            or_(E.series_end.is_(None), E.series_end >= lo),
+        )
+        .all()
+    )
+    items.extend(_expand_events(pending, lo, hi, start_from))
+    return IntervalIndex.from_intervals(items)
+
+
+class ConflictIndexCache:
+    def __init__(self, max_users: int = CONFLICT_INDEX_USERS):
+        self.max_users = max_users
+        self.builds = 0
+        self.updates = 0
+        # user_id -> (versiones de los eventos incluidos, ventana, índice)
+        self._data: "OrderedDict[int, tuple[Versions, Window, IntervalIndex]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _update(
+        self, db: Session, user_id: int, cached: tuple, versions: Versions, window: Window
+    ) -> Optional[IntervalIndex]:
+        """Parchea el índice cacheado hasta `versions` y `window`; None si no es posible."""
+        import numpy as np
+
+        old_versions, (old_lo, old_hi), index = cached
+        lo, hi = window
+        if lo < old_lo or hi < old_hi or lo >= old_hi:
+            return None
+
+        kept = versions.keys() & old_versions.keys()
+        # Un evento editado sale del índice y vuelve a entrar como nuevo
+        edited = {i for i in kept if versions[i] != old_versions[i]}
+        kept -= edited
+        removed = old_versions.keys() - kept
+        if removed:
+            index = index.without_events(removed)
+        if lo > old_lo:
+            index = index.filtered(index.ends > np.datetime64(lo, "us"))
+        parts = [index]
+        if hi > old_hi:
+            # Solo el tramo nuevo de la ventana, de los eventos que ya estaban
+            parts.append(_load(db, user_id, lo, hi, start_from=old_hi).only_events(kept))
+        added = versions.keys() - kept
+        if added:
+            events = db.query(models.Event).filter(models.Event.id.in_(added)).all()
+            parts.append(IntervalIndex.from_intervals(_expand_events(events, lo, hi, None)))
+        for extra in parts[1:]:
+            index = index.merged(extra)
+        self.updates += 1
+        return index
+
+    def get(self, db: Session, user_id: int) -> Tuple[Window, IntervalIndex]:
+        window = _window()
+        versions = _event_versions(db, user_id)
+        with self._lock:
+            cached = self._data.get(user_id)
+            if cached is not None and cached[0] == versions and cached[1] == window:
+                self._data.move_to_end(user_id)
+                return window, cached[2]
+
+        index = self._update(db, user_id, cached, versions, window) if cached is not None else None
+        if index is None:
+            # Lo creado después de leer `versions` se añadirá en la siguiente consulta
+            index = _load(db, user_id, *window).only_events(versions)
+            self.builds += 1
+        with self._lock:
+            self._data[user_id] = (versions, window, index)
+            self._data.move_to_end(user_id)
+            while len(self._data) > self.max_users:
+                self._data.popitem(last=False)
+        return window, index
+
+    def note_created(self, user_id: int, ev: models.Event) -> None:
+        """Añade el evento recién creado sin esperar a la siguiente consulta."""
+        with self._lock:
+            cached = self._data.get(user_id)
+            if cached is None or ev.id in cached[0]:
+                return
+        versions, window, index = cached
+        extra = IntervalIndex.from_intervals(_expand_events([ev], *window, None))
+        with self._lock:
+            if self._data.get(user_id) is cached:
+                self._data[user_id] = ({**versions, ev.id: ev.updated_at}, window, index.merged(extra))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+conflict_index = ConflictIndexCache()
+
+
+def find_conflicts(db: Session, user_id: int, ev: models.Event) -> List[schemas.EventConflict]:
+    """
+    Ocurrencias existentes que se solapan con las de `ev` (aún sin guardar),
+    dentro de la ventana del índice.
+    """
+    import numpy as np
+
+    window, index = conflict_index.get(db, user_id)
+    new = event_intervals(ev, *window)
+    if not new:
+        return []
+
+    qs = np.array([s for s, _ in new], dtype="datetime64[us]")
+    qe = np.array([e for _, e in new], dtype="datetime64[us]")
+    hits = index.overlapping(qs, qe)[:MAX_REPORTED_CONFLICTS]
+    if not len(hits):
+        return []
+
+    ids = {int(index.event_ids[i]) for i in hits}
+    titles = dict(db.query(models.Event.id, models.Event.title).filter(models.Event.id.in_(ids)).all())
+    conflicts = [
+        schemas.EventConflict(
+            event_id=int(index.event_ids[i]),
+            title=titles.get(int(index.event_ids[i]), ""),
+            start_at=index.starts[i].item(),
+            end_at=index.ends[i].item(),
+        )
+        for i in hits
+    ]
+    return conflicts
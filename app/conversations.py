@@ -0,0 +1,260 @@
+"""
+Estado de las conversaciones de recordatorios.
+
+Dos implementaciones con la misma interfaz:
+  - "memory": LRU en el proceso, con caducidad por inactividad. Vale con un
+    solo worker de uvicorn.
+  - "db": tabla `conversations` en la base de datos de la app, compartida
+    entre workers y procesos.
+
+Se elige con CONVERSATION_STORE. El estado se guarda serializado en JSON: lo
+que devuelve get() es una copia y hay que volver a llamar a put() tras
+modificarlo.
+"""
+import abc
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+
+from . import models
+from .database import SessionLocal
+
+CONVERSATION_STORE = os.getenv("CONVERSATION_STORE", "memory")
+# Caducidad por inactividad (segundos sin usarse)
+CONVERSATION_TTL_SECONDS = int(os.getenv("CONVERSATION_TTL_SECONDS", "1800"))
+CONVERSATION_MAX_ENTRIES = int(os.getenv("CONVERSATION_MAX_ENTRIES", "10000"))
+# Mensajes de historial que se conservan por conversación (los últimos)
+CONVERSATION_MAX_HISTORY = int(os.getenv("CONVERSATION_MAX_HISTORY", "40"))
+# Cada cuántas escrituras purga la implementación "db"
+PURGE_EVERY = 100
+
+
+class ConversationStore(abc.ABC):
+    def __init__(
+        self,
+        ttl_seconds: int = CONVERSATION_TTL_SECONDS,
+        max_entries: int = CONVERSATION_MAX_ENTRIES,
+        max_history: int = CONVERSATION_MAX_HISTORY,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_history = max_history
+        self.expired = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def _dump(self, state: Dict[str, Any]) -> str:
+        history = state.get("history")
+        if history is not None and len(history) > self.max_history:
+            state = {**state, "history": history[-self.max_history:]}
+        return json.dumps(state, ensure_ascii=False, default=str)
+
+    @abc.abstractmethod
+    def get(self, conv_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abc.abstractmethod
+    def put(self, conv_id: str, state: Dict[str, Any]) -> None:
+        ...
+
+    @abc.abstractmethod
+    def delete(self, conv_id: str) -> None:
+        ...
+
+    @abc.abstractmethod
+    def stats(self) -> dict:
+        ...
+
+
+class MemoryConversationStore(ConversationStore):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # conv_id -> (caduca_en monotonic, estado JSON); orden = uso reciente
+        self._data: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+        self._bytes = 0
+
+    def _drop(self, conv_id: str) -> None:
+        _, raw = self._data.pop(conv_id)
+        self._bytes -= len(raw)
+
+    def _purge_expired(self, now: float) -> None:
+        # Los más antiguos van delante: se para en el primero vigente
+        while self._data:
+            conv_id, (expires, _) = next(iter(self._data.items()))
+            if expires > now:
+                break
+            self._drop(conv_id)
+            self.expired += 1
+
+    def get(self, conv_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            item = self._data.get(conv_id)
+            if item is None:
+                return None
+            now = time.monotonic()
+            if item[0] <= now:
+                self._drop(conv_id)
+                self.expired += 1
+                return None
+            # Renovar al leer mantiene el orden LRU igual al de caducidad
+            raw = item[1]
+            self._data[conv_id] = (now + self.ttl_seconds, raw)
+            self._data.move_to_end(conv_id)
+        return json.loads(raw)
+
+    def put(self, conv_id: str, state: Dict[str, Any]) -> None:
+        raw = self._dump(state)
+        now = time.monotonic()
+        with self._lock:
+            if conv_id in self._data:
+                self._drop(conv_id)
+            self._data[conv_id] = (now + self.ttl_seconds, raw)
+            self._bytes += len(raw)
+            self._purge_expired(now)
+            while len(self._data) > self.max_entries:
+                self._drop(next(iter(self._data)))
+                self.evictions += 1
+
+    def delete(self, conv_id: str) -> None:
+        with self._lock:
+            if conv_id in self._data:
+                self._drop(conv_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._purge_expired(time.monotonic())
+            return {
+                "backend": "memory",
+                "live": len(self._data),
+                "approx_bytes": self._bytes,
+                "expired": self.expired,
+                "evictions": self.evictions,
+            }
+
+
+class SQLConversationStore(ConversationStore):
+    def __init__(self, session_factory=SessionLocal, **kwargs):
+        super().__init__(**kwargs)
+        self.session_factory = session_factory
+        self.writes = 0
+
+    def get(self, conv_id: str) -> Optional[Dict[str, Any]]:
+        db = self.session_factory()
+        try:
+            row = db.get(models.Conversation, conv_id)
+            if row is None or row.expires_at <= datetime.utcnow():
+                return None
+            return json.loads(row.state)
+        except SQLAlchemyError as e:
+            print(f"Error leyendo conversación: {e}")
+            return None
+        finally:
+            db.close()
+
+    def put(self, conv_id: str, state: Dict[str, Any]) -> None:
+        raw = self._dump(state)
+        now = datetime.utcnow()
+        db = self.session_factory()
+        try:
+            db.merge(
+                models.Conversation(
+                    id=conv_id,
+                    user_id=state.get("user_id"),
+                    state=raw,
+                    updated_at=now,
+                    expires_at=now + timedelta(seconds=self.ttl_seconds),
+                )
+            )
+            db.commit()
+        except SQLAlchemyError:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        with self._lock:
+            self.writes += 1
+            purge = self.writes % PURGE_EVERY == 0
+        if purge:
+            self.purge()
+
+    def delete(self, conv_id: str) -> None:
+        db = self.session_factory()
+        try:
+            db.query(models.Conversation).filter(models.Conversation.id == conv_id).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def purge(self) -> int:
+        """Borra las caducadas y, si sobra, las menos recientes hasta max_entries."""
+        db = self.session_factory()
+        try:
+            expired = (
+                db.query(models.Conversation)
+                .filter(models.Conversation.expires_at <= datetime.utcnow())
+                .delete(synchronize_session=False)
+            )
+            evicted = 0
+            extra = db.query(models.Conversation).count() - self.max_entries
+            if extra > 0:
+                oldest = (
+                    db.query(models.Conversation.id)
+                    .order_by(models.Conversation.updated_at.asc())
+                    .limit(extra)
+                    .subquery()
+                )
+                evicted = (
+                    db.query(models.Conversation)
+                    .filter(models.Conversation.id.in_(db.query(oldest.c.id)))
+                    .delete(synchronize_session=False)
+                )
+            db.commit()
+        except SQLAlchemyError as e:
+            db.rollback()
+            print(f"Error purgando conversaciones: {e}")
+            return 0
+        finally:
+            db.close()
+
+        with self._lock:
+            self.expired += expired
+            self.evictions += evicted
+        return expired + evicted
+
+    def stats(self) -> dict:
+        db = self.session_factory()
+        try:
+            live, size = (
+                db.query(func.count(models.Conversation.id), func.coalesce(func.sum(func.length(models.Conversation.state)), 0))
+                .filter(models.Conversation.expires_at > datetime.utcnow())
+                .one()
+            )
+        finally:
+            db.close()
+        with self._lock:
+            return {
+                "backend": "db",
+                "live": live,
+                "approx_bytes": int(size),
+                "expired": self.expired,
+                "evictions": self.evictions,
+            }
+
+
+def make_store(kind: str = CONVERSATION_STORE) -> ConversationStore:
+    if kind == "memory":
+        return MemoryConversationStore()
+    if kind == "db":
+        return SQLConversationStore()
+    raise ValueError(f"CONVERSATION_STORE desconocido: {kind}")
+
+
+conversation_store = make_store()
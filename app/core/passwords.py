@@ -0,0 +1,81 @@
+"""
+Hash y verificación de contraseñas fuera del threadpool compartido.
+
+PBKDF2 es CPU pura: se ejecuta en un pool de procesos propio (no retiene el
+GIL del proceso web) y como mucho PASSWORD_MAX_PENDING peticiones esperan a
+la vez por él. Si el cupo está lleno se lanza PasswordPoolBusy en lugar de
+encolar. Las funciones son corrutinas: la espera por el pool no ocupa ningún
+hilo de la app, así que un pico de logins no deja sin hilos al resto.
+
+Con PASSWORD_WORKERS=0 se ejecuta en un hilo de asyncio (útil en desarrollo).
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from . import security
+
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", "2"))
+# Peticiones que pueden estar esperando/ejecutando trabajo de contraseñas
+PASSWORD_MAX_PENDING = int(os.getenv("PASSWORD_MAX_PENDING", "16"))
+
+
+class PasswordPoolBusy(Exception):
+    pass
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(max(PASSWORD_MAX_PENDING, 1))
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # spawn: no hereda conexiones de base de datos ni hilos del proceso web
+                _executor = ProcessPoolExecutor(
+                    max_workers=PASSWORD_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _executor
+
+
+async def _run(fn, *args):
+    if not _slots.acquire(blocking=False):
+        raise PasswordPoolBusy()
+    try:
+        if PASSWORD_WORKERS <= 0:
+            return await asyncio.to_thread(fn, *args)
+        return await asyncio.wrap_future(_get_executor().submit(fn, *args))
+    finally:
+        _slots.release()
+
+
+async def hash_password(password: str) -> str:
+    return await _run(security.hash_password, password)
+
+
+async def verify_and_update(password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    return await _run(security.verify_and_update_password, password, hashed_password)
+
+
+def warm() -> None:
+    """Arranca los procesos del pool (spawn tarda) antes del primer login."""
+    if PASSWORD_WORKERS <= 0:
+        return
+    executor = _get_executor()
+    for future in [executor.submit(os.getpid) for _ in range(PASSWORD_WORKERS)]:
+        future.result()
+
+
+def shutdown() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
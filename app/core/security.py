@@ -1,4 +1,6 @@
+import hashlib
 import os
+import secrets
 from datetime import datetime, timedelta
 from typing import Optional
 
@@ -9,7 +11,16 @@ SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-change-me")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "4320"))
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# Coste de PBKDF2. Subirlo hace que los hashes antiguos se regeneren en el
+# siguiente login (min_rounds marca como obsoletos los de menos rondas)
+PBKDF2_ROUNDS = int(os.getenv("PBKDF2_ROUNDS", "29000"))
+
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    deprecated="auto",
+    pbkdf2_sha256__default_rounds=PBKDF2_ROUNDS,
+    pbkdf2_sha256__min_rounds=PBKDF2_ROUNDS,
+)
 
 
 def hash_password(password: str) -> str:
@@ -20,15 +31,37 @@ def verify_password(password: str, hashed_password: str) -> bool:
     return pwd_context.verify(password, hashed_password)
 
 
-def create_access_token(subject: str, expires_minutes: Optional[int] = None) -> str:
+def verify_and_update_password(password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """(válida, hash nuevo si el actual usa parámetros obsoletos)."""
+    return pwd_context.verify_and_update(password, hashed_password)
+
+
+def create_access_token(subject: str, expires_minutes: Optional[int] = None, user_id: Optional[int] = None) -> str:
     expire = datetime.utcnow() + timedelta(minutes=expires_minutes or ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode = {"sub": subject, "exp": expire}
+    if user_id is not None:
+        to_encode["uid"] = user_id
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def decode_access_token(token: str) -> str:
+def decode_token_claims(token: str) -> dict:
+    """Claims validados (firma y exp). Los tokens antiguos no llevan `uid`."""
     payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-    sub = payload.get("sub")
-    if not sub:
+    if not payload.get("sub"):
         raise JWTError("Token sin subject")
-    return sub
+    return payload
+
+
+def decode_access_token(token: str) -> str:
+    return decode_token_claims(token)["sub"]
+
+
+def create_feed_token() -> tuple[str, str]:
+    """(token de suscripción al feed, hash que se guarda). Opaco y revocable, no es un JWT."""
+    token = secrets.token_urlsafe(32)
+    return token, hash_feed_token(token)
+
+
+def hash_feed_token(token: str) -> str:
+    # Token aleatorio de 256 bits: basta un hash rápido, no hace falta PBKDF2
+    return hashlib.sha256(token.encode()).hexdigest()
@@ -0,0 +1,295 @@
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+import os
+import re
+import threading
+
+WHEN_CACHE_SIZE = int(os.getenv("WHEN_CACHE_SIZE", "4096"))
+
+_WEEKDAYS_ES = {
+    "lunes": 0,
+    "martes": 1,
+    "miércoles": 2,
+    "miercoles": 2,
+    "jueves": 3,
+    "viernes": 4,
+    "sábado": 5,
+    "sabado": 5,
+    "domingo": 6,
+}
+
+
+def normalize_time_text(time_text: str | None) -> str | None:
+    if not time_text:
+        return None
+    s = time_text.strip().lower().replace(".", ":")
+    s = re.sub(r"h$", "", s).strip()
+
+    if re.fullmatch(r"\d{1,2}", s):
+        h = int(s)
+        if 0 <= h <= 23:
+            return f"{h:02d}:00"
+        return None
+
+    m = re.fullmatch(r"(\d{1,2}):(\d{1,2})", s)
+    if m:
+        h = int(m.group(1)); mi = int(m.group(2))
+        if 0 <= h <= 23 and 0 <= mi <= 59:
+            return f"{h:02d}:{mi:02d}"
+        return None
+
+    if re.fullmatch(r"\d{2}:\d{2}", s):
+        return s
+    return None
+
+
+def build_when_text(date_text: str | None, time_text: str | None, day_part: str | None) -> str | None:
+    if not date_text and not time_text and not day_part:
+        return None
+
+    default_by_part = {"morning": "10:00", "noon": "13:00", "afternoon": "16:00", "night": "20:00"}
+
+    hhmm = normalize_time_text(time_text)
+    if not hhmm and day_part in default_by_part:
+        hhmm = default_by_part[day_part]
+
+    if date_text and hhmm:
+        return f"{date_text} a las {hhmm}"
+    if date_text and not hhmm:
+        return date_text
+    if not date_text and hhmm:
+        return f"hoy a las {hhmm}"
+    return None
+
+
+def _resolve_weekday_es(date_text: str | None, time_hhmm: str | None, now_local: datetime) -> datetime | None:
+    if not date_text or not time_hhmm:
+        return None
+
+    dt = date_text.strip().lower()
+    found = None
+    for name, idx in _WEEKDAYS_ES.items():
+        if re.search(rf"\b{name}\b", dt):
+            found = idx
+            break
+    if found is None:
+        return None
+
+    h, m = map(int, time_hhmm.split(":"))
+    today_idx = now_local.weekday()
+    days_ahead = (found - today_idx) % 7
+    candidate_date = now_local.date() + timedelta(days=days_ahead)
+    candidate_dt = datetime(candidate_date.year, candidate_date.month, candidate_date.day, h, m)
+
+    if days_ahead == 0 and candidate_dt <= now_local:
+        candidate_dt += timedelta(days=7)
+    if candidate_dt <= now_local:
+        candidate_dt += timedelta(days=7)
+    return candidate_dt
+
+
+# --- Resolución rápida de expresiones frecuentes ------------------------------
+#
+# Los when_text que llegan aquí salen casi siempre de build_when_text:
+# "mañana a las 10:00", "hoy a las 16:00", "el jueves", "el 20 de enero"...
+# Se resuelven con patrones precompilados sin pasar por dateparser (que
+# además no entiende "pasado mañana", "el viernes" ni "el 20 de enero").
+
+_MONTHS_ES = {
+    "enero": 1, "febrero": 2, "marzo": 3, "abril": 4, "mayo": 5, "junio": 6, "julio": 7,
+    "agosto": 8, "septiembre": 9, "setiembre": 9, "octubre": 10, "noviembre": 11, "diciembre": 12,
+}
+_REL_DAYS = {"hoy": 0, "mañana": 1, "manana": 1, "pasado mañana": 2, "pasado manana": 2}
+_UNITS = {"minuto": timedelta(minutes=1), "hora": timedelta(hours=1), "dia": timedelta(days=1), "semana": timedelta(weeks=1)}
+
+_AT_TIME = r"(?:\s+a\s+las?\s+(?P<h>\d{1,2})(?::(?P<mi>\d{2}))?(?:\s*h)?)?"
+_REL_DAY_RE = re.compile(rf"(?P<day>hoy|ma[ñn]ana|pasado\s+ma[ñn]ana){_AT_TIME}")
+_WEEKDAY_RE = re.compile(
+    rf"(?:(?:el|este)\s+)?(?:pr[oó]ximo\s+)?(?P<wd>lunes|martes|mi[eé]rcoles|jueves|viernes|s[aá]bado|domingo){_AT_TIME}"
+)
+_DAY_MONTH_RE = re.compile(
+    r"(?:el\s+)?(?P<d>\d{1,2})\s+de\s+(?P<mon>" + "|".join(_MONTHS_ES) + r")(?:\s+del?\s+(?P<y>\d{4}))?" + _AT_TIME
+)
+_IN_RE = re.compile(r"(?:en|dentro\s+de)\s+(?P<n>\d{1,3})\s+(?P<unit>minuto|hora|d[ií]a|semana)s?")
+
+# Resolución cacheable, independiente de la hora actual:
+#   ("at", primero, alternativa): `primero` si no ha pasado; si no, `alternativa` (o None)
+#   ("in", delta):                ahora + delta
+#   ("none",):                    ni los patrones ni dateparser la entienden
+Resolution = tuple
+
+
+def _clock(m: re.Match) -> tuple[int, int] | None:
+    if m.group("h") is None:
+        return None
+    h, mi = int(m.group("h")), int(m.group("mi") or 0)
+    if h > 23 or mi > 59:
+        raise ValueError("hora fuera de rango")
+    return h, mi
+
+
+def resolve_fast(text: str, anchor: date) -> Resolution | None:
+    """
+    Resuelve `text` (ya en minúsculas y con espacios normalizados) respecto al
+    día `anchor`. None si no encaja en ningún patrón o la fecha no existe.
+    """
+    try:
+        m = _REL_DAY_RE.fullmatch(text)
+        if m:
+            days = _REL_DAYS[re.sub(r"\s+", " ", m.group("day"))]
+            clock = _clock(m)
+            if clock is None:
+                # Como dateparser: el mismo momento del día
+                return ("in", timedelta(days=days))
+            day = anchor + timedelta(days=days)
+            return ("at", datetime(day.year, day.month, day.day, *clock), None)
+
+        m = _WEEKDAY_RE.fullmatch(text)
+        if m:
+            wd = _WEEKDAYS_ES[m.group("wd")]
+            h, mi = _clock(m) or (0, 0)
+            day = anchor + timedelta(days=(wd - anchor.weekday()) % 7)
+            first = datetime(day.year, day.month, day.day, h, mi)
+            # Si es hoy y ya pasó, la semana que viene (igual que _resolve_weekday_es)
+            return ("at", first, first + timedelta(days=7) if day == anchor else None)
+
+        m = _DAY_MONTH_RE.fullmatch(text)
+        if m:
+            h, mi = _clock(m) or (0, 0)
+            d, mon = int(m.group("d")), _MONTHS_ES[m.group("mon")]
+            if m.group("y"):
+                return ("at", datetime(int(m.group("y")), mon, d, h, mi), None)
+            year = anchor.year if (mon, d) >= (anchor.month, anchor.day) else anchor.year + 1
+            return ("at", datetime(year, mon, d, h, mi), None)
+
+        m = _IN_RE.fullmatch(text)
+        if m:
+            unit = m.group("unit").replace("í", "i")
+            return ("in", int(m.group("n")) * _UNITS[unit])
+    except ValueError:
+        # "el 31 de febrero", "a las 25"...
+        return None
+    return None
+
+
+def _apply(resolution: Resolution, now_local: datetime) -> datetime | None:
+    if resolution[0] == "in":
+        return now_local + resolution[1]
+    if resolution[0] == "at":
+        first, fallback = resolution[1], resolution[2]
+        return first if first >= now_local else fallback
+    return None
+
+
+class WhenCache:
+    """
+    LRU acotada de resoluciones por (texto, día de referencia, zona horaria).
+
+    Lo que depende de la hora exacta (descartar lo ya pasado, "en 2 horas")
+    se aplica al leer, así que una entrada vale para todo el día. Cuando
+    dateparser sí entiende el texto no se guarda: su resultado puede depender
+    de la hora. Sus fallos sí, para no repetirlos.
+    """
+
+    def __init__(self, maxsize: int = WHEN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.fallbacks = 0
+        self.evictions = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Resolution | None:
+        with self._lock:
+            resolution = self._data.get(key)
+            if resolution is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return resolution
+
+    def put(self, key: tuple, resolution: Resolution) -> None:
+        with self._lock:
+            self._data[key] = resolution
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def note_fallback(self) -> None:
+        with self._lock:
+            self.fallbacks += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.fallbacks = self.evictions = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "fallbacks": self.fallbacks,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
+
+
+when_cache = WhenCache()
+
+
+def _dateparser_parse(when_text: str, now: datetime, tzname: str) -> datetime | None:
+    # Import diferido: dateparser carga datos de idioma y zonas (~0,3 s)
+    import dateparser
+
+    settings = {
+        "PREFER_DATES_FROM": "future",
+        "RELATIVE_BASE": now,
+        "TIMEZONE": tzname,
+        "RETURN_AS_TIMEZONE_AWARE": True,
+    }
+    dt = dateparser.parse(when_text, languages=["es"], settings=settings)
+    if dt is None:
+        return None
+    return dt.astimezone(ZoneInfo(tzname)).replace(tzinfo=None)
+
+
+def parse_when_to_datetime(
+    when_text: str | None,
+    now: datetime,
+    tzname: str,
+    date_text: str | None = None,
+    time_text: str | None = None,
+) -> datetime | None:
+    now_local = now.astimezone(ZoneInfo(tzname)).replace(tzinfo=None)
+    time_hhmm = normalize_time_text(time_text)
+
+    resolved = _resolve_weekday_es(date_text, time_hhmm, now_local)
+    if resolved is not None:
+        return resolved
+
+    if not when_text:
+        return None
+
+    text = " ".join(when_text.lower().split())
+    key = (text, now_local.date(), tzname)
+    resolution = when_cache.get(key)
+    if resolution is None:
+        resolution = resolve_fast(text, now_local.date())
+        if resolution is None:
+            when_cache.note_fallback()
+            dt_local = _dateparser_parse(when_text, now, tzname)
+            if dt_local is None:
+                when_cache.put(key, ("none",))
+                return None
+            return dt_local if dt_local >= now_local else None
+        when_cache.put(key, resolution)
+
+    return _apply(resolution, now_local)
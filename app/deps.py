@@ -1,17 +1,19 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
 from .database import get_db
 from . import models
-from .core.security import decode_access_token
+from .auth_cache import auth_cache
+from .core.security import decode_token_claims, hash_feed_token
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="/auth/token", auto_error=False)
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> models.User:
+def _user_from_token(token: str, db: Session) -> models.User:
     try:
-        email = decode_access_token(token)
+        claims = decode_token_claims(token)
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -19,11 +21,57 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user = db.query(models.User).filter(models.User.email == email).first()
+    # La firma y el exp se comprueban siempre; solo se ahorra la consulta
+    cached = auth_cache.get(token)
+    if cached is not None:
+        return cached
+
+    email = claims["sub"]
+    uid = claims.get("uid")
+    if uid is not None:
+        user = db.get(models.User, uid)
+        if user is not None and user.email != email:
+            user = None
+    else:
+        # Tokens emitidos antes de incluir `uid`
+        user = db.query(models.User).filter(models.User.email == email).first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Usuario no existe",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    auth_cache.put(token, user, claims.get("exp"))
+    return user
+
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> models.User:
+    return _user_from_token(token, db)
+
+
+def get_feed_user(
+    token: str | None = Query(None),
+    bearer: str | None = Depends(oauth2_scheme_optional),
+    db: Session = Depends(get_db),
+) -> models.User:
+    """
+    Como get_current_user pero acepta también ?token=..., porque los clientes
+    de calendario que se suscriben a una URL no pueden mandar cabeceras. En
+    la URL solo vale el token de feed (revocable), nunca el JWT de acceso.
+    """
+    if bearer:
+        return _user_from_token(bearer, db)
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Falta el token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    user = db.query(models.User).filter(models.User.feed_token_hash == hash_feed_token(token)).first()
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token de feed inválido o revocado",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
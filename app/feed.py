@@ -0,0 +1,23 @@
+"""
+Versión del feed iCalendar de cada usuario.
+
+Cualquier escritura que cambie lo que publica /calendar/feed.ics (alta o
+baja de eventos, alta de tareas, fechas asignadas por /tasks/schedule)
+llama a touch_feed() dentro de su transacción. El feed deriva de ahí el ETag
+y el Last-Modified, así que también las bajas y las ediciones invalidan las
+copias de los clientes suscritos.
+"""
+from datetime import datetime
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from . import models
+
+
+def touch_feed(db: Session, user_id: int) -> None:
+    db.execute(
+        update(models.User)
+        .where(models.User.id == user_id)
+        .values(feed_version=models.User.feed_version + 1, feed_updated_at=datetime.utcnow())
+    )
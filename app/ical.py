@@ -0,0 +1,350 @@
+"""
+Utilidades iCalendar (RFC 5545) sin dependencias externas: exportación
+(feed) e importación en streaming de VEVENT.
+"""
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import re
+
+from . import models
+
+PRODID = "-//AutoAgenda AI//ES"
+DEFAULT_TZ = "Europe/Madrid"
+
+
+def escape_text(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def fold_line(line: str) -> str:
+    """Parte líneas de más de 75 octetos (continuación con un espacio)."""
+    raw = line.encode("utf-8")
+    if len(raw) <= 75:
+        return line + "\r\n"
+
+    parts: List[str] = []
+    current = b""
+    limit = 75
+    for ch in line:
+        b = ch.encode("utf-8")
+        if len(current) + len(b) > limit:
+            parts.append(current.decode("utf-8"))
+            current = b""
+            limit = 74  # el espacio inicial cuenta
+        current += b
+    parts.append(current.decode("utf-8"))
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def format_local(dt: datetime) -> str:
+    return dt.strftime("%Y%m%dT%H%M%S")
+
+
+def format_utc(dt: datetime) -> str:
+    # Nuestras marcas created_at son naive UTC
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt.strftime("%Y%m%dT%H%M%SZ")
+
+
+def calendar_begin(name: str = "AutoAgenda") -> str:
+    # Usamos TZID con nombres Olson (Europe/Madrid); los clientes habituales
+    # los resuelven sin VTIMEZONE
+    return "".join(
+        fold_line(line)
+        for line in (
+            "BEGIN:VCALENDAR",
+            "VERSION:2.0",
+            f"PRODID:{PRODID}",
+            "CALSCALE:GREGORIAN",
+            "METHOD:PUBLISH",
+            f"X-WR-CALNAME:{escape_text(name)}",
+            f"X-WR-TIMEZONE:{DEFAULT_TZ}",
+        )
+    )
+
+
+def calendar_end() -> str:
+    return fold_line("END:VCALENDAR")
+
+
+def vevent(ev: models.Event) -> str:
+    tzid = ev.timezone or DEFAULT_TZ
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:event-{ev.id}@autoagenda",
+        f"DTSTAMP:{format_utc(ev.created_at or datetime.utcnow())}",
+        f"DTSTART;TZID={tzid}:{format_local(ev.start_at)}",
+        f"DTEND;TZID={tzid}:{format_local(ev.end_at)}",
+        f"SUMMARY:{escape_text(ev.title)}",
+    ]
+    if ev.description:
+        lines.append(f"DESCRIPTION:{escape_text(ev.description)}")
+    if ev.rrule:
+        # Se exporta tal cual: el cliente expande la serie
+        lines.append(f"RRULE:{ev.rrule.removeprefix('RRULE:')}")
+    lines.append("END:VEVENT")
+    return "".join(fold_line(line) for line in lines)
+
+
+def vtodo(task: models.Task, tzid: str = DEFAULT_TZ) -> str:
+    lines = [
+        "BEGIN:VTODO",
+        f"UID:task-{task.id}@autoagenda",
+        f"DTSTAMP:{format_utc(task.created_at or datetime.utcnow())}",
+        f"DUE;TZID={tzid}:{format_local(task.date)}",
+        f"SUMMARY:{escape_text(task.title)}",
+    ]
+    if task.description:
+        lines.append(f"DESCRIPTION:{escape_text(task.description)}")
+    if task.completed_at:
+        lines.append("STATUS:COMPLETED")
+        lines.append(f"COMPLETED:{format_utc(task.completed_at)}")
+    else:
+        lines.append("STATUS:NEEDS-ACTION")
+    lines.append("END:VTODO")
+    return "".join(fold_line(line) for line in lines)
+
+
+def iter_calendar(events, tasks, name: str = "AutoAgenda") -> Iterator[str]:
+    yield calendar_begin(name)
+    for ev in events:
+        yield vevent(ev)
+    for task in tasks:
+        yield vtodo(task)
+    yield calendar_end()
+
+
+# --- Importación ---------------------------------------------------------
+
+DEFAULT_EVENT_DURATION = timedelta(minutes=30)
+
+_DURATION_RE = re.compile(
+    r"^([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$"
+)
+_DATE_RE = re.compile(r"^(\d{4})(\d{2})(\d{2})(?:T(\d{2})(\d{2})(\d{2})(Z?))?$")
+_UNTIL_RE = re.compile(r"(?i)(^|;)UNTIL=([0-9TZ]+)")
+
+
+def unescape_text(value: str) -> str:
+    out = []
+    chars = iter(value)
+    for ch in chars:
+        if ch == "\\":
+            nxt = next(chars, "")
+            out.append("\n" if nxt in ("n", "N") else nxt)
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def unfold_lines(lines: Iterable[str]) -> Iterator[Tuple[int, str]]:
+    """(número de línea, línea lógica) deshaciendo el plegado, sin cargar el fichero."""
+    buf: Optional[str] = None
+    start = 0
+    for n, raw in enumerate(lines, start=1):
+        line = raw.rstrip("\r\n")
+        if buf is not None and line[:1] in (" ", "\t"):
+            buf += line[1:]
+            continue
+        if buf is not None:
+            yield start, buf
+        buf, start = line, n
+    if buf is not None:
+        yield start, buf
+
+
+def parse_property(line: str) -> Tuple[str, Dict[str, str], str]:
+    """NOMBRE;PARAM=valor;PARAM="con:dos puntos":VALOR -> (nombre, params, valor)."""
+    if '"' not in line:
+        split = line.find(":")
+    else:
+        # Solo los parámetros entrecomillados pueden llevar ':'
+        in_quotes = False
+        split = -1
+        for i, ch in enumerate(line):
+            if ch == '"':
+                in_quotes = not in_quotes
+            elif ch == ":" and not in_quotes:
+                split = i
+                break
+    if split < 0:
+        raise ValueError(f"Línea iCalendar mal formada: {line[:60]!r}")
+
+    head, value = line[:split], line[split + 1:]
+    name, *raw_params = head.split(";")
+    params = {}
+    for p in raw_params:
+        key, _, val = p.partition("=")
+        params[key.upper()] = val.strip('"')
+    return name.upper(), params, value
+
+
+@lru_cache(maxsize=256)
+def _zone(name: str) -> ZoneInfo:
+    # Algunos exportadores prefijan el TZID (/mozilla.org/.../Europe/Madrid)
+    candidates = [name]
+    parts = name.strip("/").split("/")
+    if len(parts) > 2:
+        candidates.append("/".join(parts[-2:]))
+    for candidate in candidates:
+        try:
+            return ZoneInfo(candidate)
+        except (ZoneInfoNotFoundError, ValueError):
+            continue
+    raise ValueError(f"TZID desconocida: {name}")
+
+
+def _parse_stamp(value: str) -> Tuple[datetime, bool, bool]:
+    """YYYYMMDD[THHMMSS[Z]] -> (naive, es_fecha, es_utc). Más rápido que strptime."""
+    m = _DATE_RE.match(value)
+    if not m:
+        raise ValueError(f"Fecha iCalendar inválida: {value}")
+    y, mo, d, h, mi, s, z = m.groups()
+    if h is None:
+        return datetime(int(y), int(mo), int(d)), True, False
+    return datetime(int(y), int(mo), int(d), int(h), int(mi), int(s)), False, bool(z)
+
+
+def _parse_datetime(params: Dict[str, str], value: str, fallback_tz: str) -> Tuple[datetime, str, bool]:
+    """
+    DTSTART/DTEND -> (datetime aware, zona a guardar, es_fecha).
+    UTC (Z) y hora flotante se interpretan en la zona del calendario.
+    """
+    tzname = params.get("TZID") or fallback_tz
+    tz = _zone(tzname)
+    dt, is_date, is_utc = _parse_stamp(value.strip())
+    if is_utc:
+        return dt.replace(tzinfo=timezone.utc).astimezone(tz), tzname, False
+    return dt.replace(tzinfo=tz), tzname, is_date
+
+
+def _parse_duration(value: str) -> timedelta:
+    m = _DURATION_RE.match(value.strip())
+    if not m or value.strip() in ("P", "PT"):
+        raise ValueError(f"DURATION inválida: {value}")
+    sign, weeks, days, hours, minutes, seconds = m.groups()
+    delta = timedelta(
+        weeks=int(weeks or 0),
+        days=int(days or 0),
+        hours=int(hours or 0),
+        minutes=int(minutes or 0),
+        seconds=int(seconds or 0),
+    )
+    return -delta if sign == "-" else delta
+
+
+def normalize_rrule(rrule: str, tzname: str) -> str:
+    """
+    dateutil exige UNTIL en UTC si DTSTART lleva zona: pasamos a UTC los UNTIL
+    de fecha (fin de ese día local) o de hora flotante.
+    """
+    rrule = rrule.strip().removeprefix("RRULE:")
+    m = _UNTIL_RE.search(rrule)
+    if not m or m.group(2).upper().endswith("Z"):
+        return rrule
+
+    local, is_date, _ = _parse_stamp(m.group(2))
+    if is_date:
+        local = local.replace(hour=23, minute=59, second=59)
+    until = format_utc(local.replace(tzinfo=_zone(tzname)))
+    return rrule[:m.start(2)] + until + rrule[m.end(2):]
+
+
+def _event_from_props(props: Dict[str, Tuple[Dict[str, str], str]], cal_tz: str) -> Dict[str, Any]:
+    if "RECURRENCE-ID" in props:
+        raise ValueError("Instancia modificada de una serie (RECURRENCE-ID): no soportada")
+    status = props.get("STATUS", ({}, ""))[1].strip().upper()
+    if status == "CANCELLED":
+        raise ValueError("Evento cancelado")
+    if "DTSTART" not in props:
+        raise ValueError("VEVENT sin DTSTART")
+
+    start_aware, tzname, is_date = _parse_datetime(*props["DTSTART"], cal_tz)
+    tz = _zone(tzname)
+    # Mismo objeto tz: conserva la hora local tal cual viene
+    start_at = start_aware.astimezone(tz).replace(tzinfo=None)
+
+    if "DTEND" in props:
+        end_aware, _, _ = _parse_datetime(*props["DTEND"], tzname)
+        end_at = end_aware.astimezone(tz).replace(tzinfo=None)
+    elif "DURATION" in props:
+        end_at = start_at + _parse_duration(props["DURATION"][1])
+    else:
+        end_at = start_at + (timedelta(days=1) if is_date else DEFAULT_EVENT_DURATION)
+    if end_at == start_at:
+        # Eventos instantáneos: nuestro modelo exige fin > inicio
+        end_at = start_at + DEFAULT_EVENT_DURATION
+
+    rrule = props.get("RRULE", ({}, ""))[1].strip() or None
+    if rrule:
+        rrule = normalize_rrule(rrule, tzname)
+
+    description = props.get("DESCRIPTION", ({}, ""))[1]
+    return {
+        "title": unescape_text(props.get("SUMMARY", ({}, ""))[1]).strip() or "(sin título)",
+        "description": unescape_text(description) or None,
+        "start_at": start_at,
+        "end_at": end_at,
+        "rrule": rrule,
+        "timezone": tzname,
+    }
+
+
+def iter_vevents(lines: Iterable[str], default_tz: str = DEFAULT_TZ) -> Iterator[Tuple[int, Any]]:
+    """
+    (línea del BEGIN:VEVENT, dict para EventCreate | excepción) en streaming.
+    Las series se devuelven como un único evento con su RRULE, sin expandir.
+    """
+    cal_tz = default_tz
+    stack: List[str] = []
+    props: Optional[Dict[str, Tuple[Dict[str, str], str]]] = None
+    begin_line = 0
+
+    for line_no, line in unfold_lines(lines):
+        if not line.strip():
+            continue
+        try:
+            name, params, value = parse_property(line)
+        except ValueError as e:
+            if props is not None:
+                yield line_no, e
+                props = None
+            continue
+
+        if name == "BEGIN":
+            component = value.strip().upper()
+            stack.append(component)
+            if component == "VEVENT":
+                props, begin_line = {}, line_no
+            continue
+
+        if name == "END":
+            component = value.strip().upper()
+            if stack:
+                stack.pop()
+            if component == "VEVENT" and props is not None:
+                try:
+                    yield begin_line, _event_from_props(props, cal_tz)
+                except ValueError as e:
+                    yield begin_line, e
+                props = None
+            continue
+
+        if stack == ["VCALENDAR"] and name == "X-WR-TIMEZONE":
+            try:
+                _zone(value.strip())
+                cal_tz = value.strip()
+            except ValueError:
+                pass
+        elif props is not None and stack and stack[-1] == "VEVENT":
+            # Solo propiedades del VEVENT (no de VALARM anidados); la primera gana
+            props.setdefault(name, (params, value))
@@ -0,0 +1,67 @@
+"""
+Operaciones sobre intervalos [inicio, fin) de datetimes naive.
+"""
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, List, Tuple
+
+Interval = Tuple[datetime, datetime]
+
+
+def sweep(intervals: Iterable[Interval]) -> Iterator[Interval]:
+    """
+    Fusiona intervalos que ya vienen ordenados por inicio, en una pasada.
+    Los que se tocan (fin == inicio del siguiente) también se fusionan.
+    """
+    cur_start = cur_end = None
+    for start, end in intervals:
+        if end <= start:
+            continue
+        if cur_start is None:
+            cur_start, cur_end = start, end
+        elif start <= cur_end:
+            if end > cur_end:
+                cur_end = end
+        else:
+            yield cur_start, cur_end
+            cur_start, cur_end = start, end
+    if cur_start is not None:
+        yield cur_start, cur_end
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """Ordena y fusiona: O(n log n)."""
+    return list(sweep(sorted(intervals)))
+
+
+def clip(intervals: Iterable[Interval], lo: datetime, hi: datetime) -> Iterator[Interval]:
+    for start, end in intervals:
+        start, end = max(start, lo), min(end, hi)
+        if end > start:
+            yield start, end
+
+
+def snap(intervals: Iterable[Interval], slot: timedelta) -> Iterator[Interval]:
+    """
+    Amplía cada intervalo a múltiplos de `slot` contados desde medianoche
+    (inicio hacia abajo, fin hacia arriba). Conserva el orden por inicio.
+    """
+    for start, end in intervals:
+        day = datetime(start.year, start.month, start.day)
+        snapped_start = day + ((start - day) // slot) * slot
+        day_end = datetime(end.year, end.month, end.day)
+        offset = end - day_end
+        snapped_end = day_end + -(-offset // slot) * slot
+        yield snapped_start, snapped_end
+
+
+def complement(busy: Iterable[Interval], lo: datetime, hi: datetime) -> Iterator[Interval]:
+    """Huecos libres en [lo, hi) dados intervalos ocupados fusionados y ordenados."""
+    cursor = lo
+    for start, end in busy:
+        if start > cursor:
+            yield cursor, min(start, hi)
+        cursor = max(cursor, end)
+        if cursor >= hi:
+            return
+    if cursor < hi:
+        yield cursor, hi
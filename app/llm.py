@@ -0,0 +1,62 @@
+"""
+Pasarela única hacia el LLM.
+
+Un solo cliente OpenAI por proceso: reutiliza el pool de conexiones HTTP
+(keep-alive) entre peticiones en lugar de abrir TLS en cada llamada. Los
+reintentos con backoff exponencial los hace el propio SDK para errores de
+red, 408, 409, 429 y 5xx.
+"""
+import os
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+LLM_MODEL = os.getenv("OPENAI_MODEL", "gpt-4.1-mini")
+LLM_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "30"))
+LLM_CONNECT_TIMEOUT_SECONDS = float(os.getenv("OPENAI_CONNECT_TIMEOUT_SECONDS", "5"))
+LLM_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+
+_client: "OpenAI | None" = None
+_lock = threading.Lock()
+
+
+def get_client() -> "OpenAI | None":
+    global _client
+    if _client is not None:
+        return _client
+
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        return None
+
+    with _lock:
+        if _client is None:
+            # Import diferido (~0,5 s): solo lo pagan los workers que llaman al LLM
+            from openai import OpenAI, Timeout
+
+            _client = OpenAI(
+                api_key=api_key,
+                timeout=Timeout(LLM_TIMEOUT_SECONDS, connect=LLM_CONNECT_TIMEOUT_SECONDS),
+                max_retries=LLM_MAX_RETRIES,
+            )
+    return _client
+
+
+def complete_json(client: "OpenAI", messages: List[Dict[str, Any]], model: str = LLM_MODEL) -> str:
+    """Chat completion en modo JSON; devuelve el contenido en texto."""
+    resp = client.chat.completions.create(
+        model=model,
+        response_format={"type": "json_object"},
+        messages=messages,
+    )
+    return resp.choices[0].message.content
+
+
+def close_client() -> None:
+    global _client
+    with _lock:
+        if _client is not None:
+            _client.close()
+            _client = None
@@ -0,0 +1,160 @@
+"""
+Caché persistente de respuestas del LLM (tabla llm_cache).
+
+La salida estructurada de los parsers es texto relativo ("mañana", "17:00",
+"FREQ=WEEKLY;BYDAY=MO"...), así que se puede reutilizar mientras coincidan el
+día ancla y la zona horaria. La clave incluye además la versión del prompt
+para invalidar todo al cambiarlo.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from . import models
+from .database import SessionLocal
+
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000"))
+# Cada cuántas escrituras se purgan caducadas y sobrantes
+PURGE_EVERY = 100
+
+
+def normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFC", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def make_key(kind: str, text: str, now_iso: str, timezone: str, prompt_version: str) -> str:
+    anchor_day = datetime.fromisoformat(now_iso).date().isoformat()
+    raw = "\x1f".join([kind, prompt_version, timezone, anchor_day, normalize_text(text)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        ttl_seconds: int = LLM_CACHE_TTL_SECONDS,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+    ):
+        self.session_factory = session_factory
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, kind: str, text: str, now_iso: str, timezone: str, prompt_version: str) -> Any | None:
+        if not self.enabled:
+            return None
+        key = make_key(kind, text, now_iso, timezone, prompt_version)
+        db = self.session_factory()
+        try:
+            entry = db.get(models.LLMCacheEntry, key)
+            value = None
+            if entry is not None and entry.expires_at > datetime.utcnow():
+                value = json.loads(entry.value)
+        except SQLAlchemyError as e:
+            print(f"Error leyendo caché LLM: {e}")
+            value = None
+        finally:
+            db.close()
+
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def put(self, kind: str, text: str, now_iso: str, timezone: str, prompt_version: str, value: Any) -> None:
+        if not self.enabled:
+            return
+        key = make_key(kind, text, now_iso, timezone, prompt_version)
+        now = datetime.utcnow()
+        db = self.session_factory()
+        try:
+            db.merge(
+                models.LLMCacheEntry(
+                    key=key,
+                    kind=kind,
+                    value=json.dumps(value, ensure_ascii=False),
+                    created_at=now,
+                    expires_at=now + timedelta(seconds=self.ttl_seconds),
+                )
+            )
+            db.commit()
+        except SQLAlchemyError as e:
+            # Carrera con otro worker escribiendo la misma clave: no es grave
+            db.rollback()
+            print(f"Error escribiendo caché LLM: {e}")
+            return
+        finally:
+            db.close()
+
+        with self._lock:
+            self.writes += 1
+            purge = self.writes % PURGE_EVERY == 0
+        if purge:
+            self.purge()
+
+    def purge(self) -> int:
+        """Borra entradas caducadas y, si sobra, las más antiguas hasta max_entries."""
+        db = self.session_factory()
+        try:
+            removed = (
+                db.query(models.LLMCacheEntry)
+                .filter(models.LLMCacheEntry.expires_at <= datetime.utcnow())
+                .delete(synchronize_session=False)
+            )
+            extra = db.query(models.LLMCacheEntry).count() - self.max_entries
+            if extra > 0:
+                oldest = (
+                    db.query(models.LLMCacheEntry.key)
+                    .order_by(models.LLMCacheEntry.created_at.asc())
+                    .limit(extra)
+                    .subquery()
+                )
+                removed += (
+                    db.query(models.LLMCacheEntry)
+                    .filter(models.LLMCacheEntry.key.in_(db.query(oldest.c.key)))
+                    .delete(synchronize_session=False)
+                )
+            db.commit()
+        except SQLAlchemyError as e:
+            db.rollback()
+            print(f"Error purgando caché LLM: {e}")
+            return 0
+        finally:
+            db.close()
+
+        with self._lock:
+            self.evictions += removed
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "writes": self.writes,
+                "evictions": self.evictions,
+            }
+
+
+llm_cache = LLMCache()
@@ -0,0 +1,278 @@
+"""
+Parser local (sin LLM) para frases sencillas en español.
+
+Devuelve exactamente la misma estructura que `parse_note_to_tasks` y
+`parse_text_to_event` (date_text, time_text, rrule... en texto relativo) y una
+confianza en [0, 1]. Los routers solo llaman al LLM cuando la confianza queda
+por debajo de LOCAL_PARSER_MIN_CONFIDENCE.
+
+Cubre: hoy / mañana / pasado mañana / esta tarde / (el|este|el próximo) lunes /
+el 20 de enero, horas ("a las 17", "17:30", "14.30", "17h", "a las 5 de la
+tarde"), rangos ("de 16 a 17"), franjas ("por la mañana") y recurrencias
+("cada lunes", "todos los días", "cada mes el día 1").
+"""
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+from .dates_es import _WEEKDAYS_ES, normalize_time_text
+
+LOCAL_PARSER_MIN_CONFIDENCE = float(os.getenv("LOCAL_PARSER_MIN_CONFIDENCE", "0.8"))
+
+_WEEKDAY_CODES = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+_WEEKDAY_RE = r"(lunes|martes|mi[eé]rcoles|jueves|viernes|s[aá]bado|domingo)"
+_MONTHS_RE = r"(enero|febrero|marzo|abril|mayo|junio|julio|agosto|septiembre|setiembre|octubre|noviembre|diciembre)"
+
+_HOUR = r"(\d{1,2})(?:[:.](\d{2}))?"
+_MERIDIEM = r"(?:\s*(?:h|horas?)\b)?(?:\s+de\s+la\s+(mañana|manana|tarde|noche)|\s*(am|pm)\b)?"
+
+# Orden importante: lo más específico primero
+_RANGE = re.compile(rf"\bde\s+{_HOUR}\s*(?:h\b)?\s+a\s+{_HOUR}{_MERIDIEM}")
+_AT_TIME = re.compile(rf"\ba\s+las?\s+{_HOUR}{_MERIDIEM}")
+_BARE_TIME = re.compile(r"\b(\d{1,2})(?:[:.](\d{2})|h\b)")
+
+_RECUR_MONTHLY = re.compile(
+    r"\b(?:cada\s+mes|todos\s+los\s+meses|mensualmente)\s*,?\s*(?:el\s+)?(?:d[ií]a\s+)?(\d{1,2})\b"
+    r"|\bel\s+(?:d[ií]a\s+)?(\d{1,2})\s+de\s+cada\s+mes\b"
+)
+_RECUR_DAILY = re.compile(r"\b(?:cada\s+d[ií]a|todos\s+los\s+d[ií]as|a\s+diario|diariamente)\b")
+_RECUR_WEEKDAYS = re.compile(
+    rf"\b(?:cada|todos\s+los|los)\s+{_WEEKDAY_RE}((?:\s*(?:,|y)\s*{_WEEKDAY_RE})*)"
+)
+_RECUR_WEEKLY = re.compile(r"\b(?:cada\s+semana|semanalmente|todas\s+las\s+semanas)\b")
+
+_DAY_PART = re.compile(
+    r"\b(?:(esta)|por\s+la|a\s+la|en\s+la)\s+(mañana|manana|tarde|noche)\b|\b(?:a|al)\s+medio\s?d[ií]a\b"
+)
+_PASADO_MANANA = re.compile(r"\bpasado\s+ma[ñn]ana\b")
+_MANANA = re.compile(r"\bma[ñn]ana\b")
+_HOY = re.compile(r"\bhoy\b")
+_WEEKDAY = re.compile(rf"\b(?:(?:el|este)\s+)?(?:pr[oó]ximo\s+)?{_WEEKDAY_RE}(?:\s+que\s+viene)?\b")
+_DAY_MONTH = re.compile(rf"\b(?:el\s+)?(?:d[ií]a\s+)?(\d{{1,2}})\s+de\s+{_MONTHS_RE}\b")
+
+_CHANNELS = [
+    (re.compile(r"\bwhats?app\b|\bwasap\b"), "whatsapp"),
+    (re.compile(r"\b(?:e-?mail|correo|mail)\b"), "email"),
+    (re.compile(r"\b(?:llamar|llamada|telefonear)\b"), "call"),
+]
+
+# Palabras temporales que este parser no resuelve: mejor que decida el LLM
+_VAGUE = re.compile(
+    r"\b(?:semana|finde|fin\s+de\s+semana|mes|año|luego|despu[eé]s|antes|pronto|siguiente|pr[oó]xim[oa]s?"
+    r"|ayer|anoche|tarde|noche|ma[ñn]ana|minutos?|horas?|d[ií]as?|en\s+\d+)\b"
+)
+_MULTI = re.compile(r"[,;\n]|\.\s|\by\s+(?:luego|despu[eé]s|tambi[eé]n)\b|\btambi[eé]n\b")
+_EDGE_FILLER = re.compile(
+    r"^(?:(?:y|que|de|a|el|la|los|las|en|para|por|,|-|:)\s+)+|(?:\s+(?:y|que|de|a|el|la|en|para|por|,|-))+$"
+)
+_REMINDER_PREFIX = re.compile(
+    r"^(?:recu[eé]rdame|recordarme|recordar|acu[eé]rdame|av[ií]same\s+(?:de|para)?|tengo\s+que|hay\s+que|apunta)\s+(?:que\s+|de\s+)?"
+)
+
+_DAY_PARTS = {"mañana": "morning", "manana": "morning", "tarde": "afternoon", "noche": "night"}
+_DEFAULT_DURATION = 30
+
+
+@dataclass
+class LocalParse:
+    confidence: float
+    items: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def _strip_accents_weekday(name: str) -> str:
+    return name.replace("é", "e").replace("á", "a")
+
+
+def _hhmm(hour: str, minute: str | None, meridiem: str | None = None, ampm: str | None = None) -> str | None:
+    h = int(hour)
+    if (meridiem in ("tarde", "noche") or ampm == "pm") and 1 <= h < 12:
+        # "a las 1 de la noche" es la 01:00, no las 13:00
+        if not (meridiem == "noche" and h < 5):
+            h += 12
+    if ampm == "am" and h == 12:
+        h = 0
+    return normalize_time_text(f"{h}:{minute or '00'}")
+
+
+class _Scanner:
+    """Va consumiendo trozos del texto según se reconocen."""
+
+    def __init__(self, text: str):
+        self.original = text.strip()
+        self.text = self.original.lower()
+        self.penalty = 0.0
+
+    def take(self, pattern: re.Pattern) -> re.Match | None:
+        m = pattern.search(self.text)
+        if m:
+            self.text = (self.text[: m.start()] + " " + self.text[m.end():]).strip()
+            self.text = re.sub(r"\s+", " ", self.text)
+        return m
+
+    def title(self) -> str:
+        # Recuperamos las mayúsculas del original para lo que queda (nombres propios)
+        leftover = _REMINDER_PREFIX.sub("", self.text)
+        leftover = _EDGE_FILLER.sub("", leftover).strip(" ,.;:-")
+        if not leftover:
+            return ""
+        idx = self.original.lower().find(leftover)
+        if idx >= 0:
+            leftover = self.original[idx: idx + len(leftover)]
+        return leftover[:1].upper() + leftover[1:]
+
+
+def _scan(text: str) -> Dict[str, Any]:
+    sc = _Scanner(text)
+    out: Dict[str, Any] = {
+        "date_text": None,
+        "start_time": None,
+        "end_time": None,
+        "day_part": None,
+        "rrule": None,
+        "channel": None,
+    }
+
+    # Recurrencias
+    m = sc.take(_RECUR_MONTHLY)
+    if m:
+        day = int(m.group(1) or m.group(2))
+        if 1 <= day <= 31:
+            out["rrule"] = f"FREQ=MONTHLY;BYMONTHDAY={day}"
+        else:
+            sc.penalty += 1.0
+    elif sc.take(_RECUR_DAILY):
+        out["rrule"] = "FREQ=DAILY"
+    else:
+        m = sc.take(_RECUR_WEEKDAYS)
+        if m:
+            names = [m.group(1)] + re.findall(_WEEKDAY_RE, m.group(2) or "")
+            days = sorted({_WEEKDAYS_ES[_strip_accents_weekday(n)] for n in names})
+            out["rrule"] = "FREQ=WEEKLY;BYDAY=" + ",".join(_WEEKDAY_CODES[d] for d in days)
+        elif sc.take(_RECUR_WEEKLY):
+            out["rrule"] = "FREQ=WEEKLY"
+
+    # Horas
+    m = sc.take(_RANGE)
+    if m:
+        meridiem, ampm = m.group(5), m.group(6)
+        out["start_time"] = _hhmm(m.group(1), m.group(2), meridiem, ampm)
+        out["end_time"] = _hhmm(m.group(3), m.group(4), meridiem, ampm)
+        if not out["start_time"] or not out["end_time"]:
+            sc.penalty += 1.0
+    else:
+        m = sc.take(_AT_TIME)
+        if m:
+            out["start_time"] = _hhmm(m.group(1), m.group(2), m.group(3), m.group(4))
+            if not m.group(2) and not m.group(3) and not m.group(4) and 1 <= int(m.group(1)) <= 7:
+                # "a las 5" sin más: probablemente de la tarde, pero no lo sabemos
+                sc.penalty += 0.3
+        else:
+            m = sc.take(_BARE_TIME)
+            if m:
+                out["start_time"] = _hhmm(m.group(1), m.group(2))
+        if m and not out["start_time"]:
+            sc.penalty += 1.0
+
+    # Franja del día ("esta tarde" también fija la fecha)
+    m = sc.take(_DAY_PART)
+    if m:
+        if m.group(2):
+            out["day_part"] = _DAY_PARTS[m.group(2)]
+            if m.group(1):
+                out["date_text"] = "hoy"
+        else:
+            out["day_part"] = "noon"
+
+    # Fecha
+    if out["date_text"] is None:
+        if sc.take(_PASADO_MANANA):
+            out["date_text"] = "pasado mañana"
+        elif sc.take(_MANANA):
+            out["date_text"] = "mañana"
+        elif sc.take(_HOY):
+            out["date_text"] = "hoy"
+        else:
+            m = sc.take(_DAY_MONTH)
+            if m:
+                out["date_text"] = f"el {int(m.group(1))} de {m.group(2)}"
+            elif out["rrule"] is None:
+                m = sc.take(_WEEKDAY)
+                if m:
+                    out["date_text"] = f"el {_strip_accents_weekday(m.group(1))}"
+
+    for pattern, channel in _CHANNELS:
+        if pattern.search(sc.text):
+            out["channel"] = channel
+            break
+
+    out["title"] = sc.title()
+
+    # Confianza
+    confidence = 1.0 - sc.penalty
+    has_when = any(out[k] for k in ("date_text", "start_time", "day_part", "rrule"))
+    if re.search(r"\d", sc.text):
+        confidence -= 0.5
+    if _VAGUE.search(sc.text):
+        confidence -= 0.5
+    if _MULTI.search(sc.text) or re.search(r"\by\b", out["title"].lower()):
+        confidence -= 0.4
+    if len(out["title"]) < 3:
+        confidence -= 0.6
+    if not has_when:
+        # Sin nada temporal solo nos fiamos de notas cortas
+        confidence -= 0.15 if len(out["title"].split()) <= 6 else 0.5
+    out["confidence"] = max(0.0, min(1.0, confidence))
+    return out
+
+
+def analyze_note(text: str) -> LocalParse:
+    """Nota -> una tarea con el mismo formato que parse_note_to_tasks."""
+    r = _scan(text)
+    confidence = r["confidence"]
+    if r["rrule"]:
+        # Las tareas no tienen recurrencia; eso es cosa del LLM / eventos
+        confidence = min(confidence, 0.5)
+    if r["end_time"]:
+        confidence = min(confidence, 0.7)
+    task = {
+        "title": r["title"][:60] or text[:60].strip(),
+        "description": text.strip(),
+        "date_text": r["date_text"],
+        "time_text": r["start_time"],
+        "day_part": r["day_part"],
+        "channel": r["channel"],
+    }
+    return LocalParse(confidence=confidence, items=[task])
+
+
+def analyze_event(text: str, timezone: str) -> LocalParse:
+    """Texto -> un evento con el mismo formato que parse_text_to_event."""
+    r = _scan(text)
+    confidence = r["confidence"]
+    if not r["start_time"]:
+        # El router exige hora de inicio; sin ella que lo intente el LLM
+        confidence = min(confidence, 0.3)
+    if not r["date_text"] and not r["rrule"]:
+        confidence = min(confidence, 0.5)
+    event = {
+        "title": r["title"][:60] or text[:60].strip(),
+        "description": text.strip(),
+        "date_text": r["date_text"],
+        "start_time": r["start_time"],
+        "end_time": r["end_time"],
+        "duration_minutes": _DEFAULT_DURATION,
+        "rrule": r["rrule"],
+        "timezone": timezone,
+    }
+    return LocalParse(confidence=confidence, items=[event])
+
+
+def parse_note_locally(text: str) -> List[Dict[str, Any]] | None:
+    result = analyze_note(text)
+    return result.items if result.confidence >= LOCAL_PARSER_MIN_CONFIDENCE else None
+
+
+def parse_event_locally(text: str, timezone: str) -> Dict[str, Any] | None:
+    result = analyze_event(text, timezone)
+    return result.items[0] if result.confidence >= LOCAL_PARSER_MIN_CONFIDENCE else None
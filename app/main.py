@@ -1,8 +1,16 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from .database import Base, engine
+from .migrations import run_migrations
+from .pagination import NEXT_CURSOR_HEADER
 from . import models  # asegura que se registran modelos
+from .occurrences import start_worker as start_occurrence_worker, stop_worker as stop_occurrence_worker
+from .core.passwords import shutdown as shutdown_password_pool
+from .llm import close_client as close_llm_client
+from .reminder_dispatch import start_worker as start_reminder_dispatch, stop_worker as stop_reminder_dispatch
+from . import warmup
 
 from .routers.auth import router as auth_router
 from .routers.users import router as users_router
@@ -12,17 +20,40 @@ from .routers.events import router as events_router
 from .routers.events import router as events_router
 from .routers.agenda import router as agenda_router
 from .routers.reminders import router as reminders_router
+from .routers.imports import router as imports_router
+from .routers.calendar import router as calendar_router
 
 app = FastAPI(title="AutoAgenda AI", version="1.4.0")
 
 @app.on_event("startup")
 def on_startup():
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    start_occurrence_worker()
+    start_reminder_dispatch()
+    warmup.start()
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    stop_occurrence_worker()
+    stop_reminder_dispatch()
+    shutdown_password_pool()
+    close_llm_client()
 
 @app.get("/ping")
 def ping():
     return {"message": "pong"}
 
+
+@app.get("/ready")
+def ready():
+    """Readiness para el balanceador: 503 hasta que termina el calentamiento."""
+    stats = warmup.stats()
+    if not stats["ready"]:
+        return JSONResponse(status_code=503, content={"status": "warming_up", **stats})
+    return {"status": "ready", **stats}
+
 app.include_router(auth_router)
 app.include_router(users_router)
 app.include_router(tasks_router)
@@ -31,6 +62,8 @@ app.include_router(events_router)
 app.include_router(events_router)
 app.include_router(agenda_router)
 app.include_router(reminders_router)
+app.include_router(imports_router)
+app.include_router(calendar_router)
 
 app.add_middleware(
     CORSMiddleware,
@@ -38,4 +71,5 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
\ No newline at end of file
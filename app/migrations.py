@@ -0,0 +1,219 @@
+"""
+Migraciones versionadas del esquema.
+
+`Base.metadata.create_all` crea tablas nuevas pero no toca las existentes
+(columnas ni índices). Cada migración se aplica una sola vez y queda
+registrada en `schema_migrations`; deben ser idempotentes porque en una base
+nueva create_all ya ha creado lo mismo.
+
+Uso manual (sin arrancar la app):
+
+    python -m app.migrations
+"""
+from datetime import datetime
+from typing import Callable
+from zoneinfo import ZoneInfoNotFoundError
+
+from sqlalchemy import DateTime, bindparam, inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+
+def _add_column(conn: Connection, table: str, column: str, ddl_type: str) -> None:
+    columns = {c["name"] for c in inspect(conn).get_columns(table)}
+    if column not in columns:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+
+
+def _create_index(conn: Connection, name: str, table: str, columns: str) -> None:
+    conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+
+
+def _0001_event_occurrence_columns(conn: Connection) -> None:
+    from .recurrence import series_bounds
+
+    _add_column(conn, "events", "occurrences_until", "TIMESTAMP")
+    _add_column(conn, "events", "series_start", "TIMESTAMP")
+    _add_column(conn, "events", "series_end", "TIMESTAMP")
+    _create_index(conn, "ix_events_user_series", "events", "user_id, series_start, series_end")
+
+    # Backfill de límites de serie para filas anteriores
+    rows = conn.execute(
+        text("SELECT id, start_at, end_at, rrule, timezone FROM events WHERE series_start IS NULL")
+    ).fetchall()
+    for row in rows:
+        start_at, end_at = row.start_at, row.end_at
+        if isinstance(start_at, str):
+            start_at, end_at = datetime.fromisoformat(start_at), datetime.fromisoformat(end_at)
+        try:
+            series_start, series_end = series_bounds(start_at, end_at, row.rrule, row.timezone)
+        except (ZoneInfoNotFoundError, ValueError):
+            # rrule o zona inválida: se deja sin límites y la agenda la sigue incluyendo
+            continue
+        conn.execute(
+            text("UPDATE events SET series_start = :s, series_end = :e WHERE id = :id").bindparams(
+                bindparam("s", type_=DateTime()), bindparam("e", type_=DateTime())
+            ),
+            {"s": series_start, "e": series_end, "id": row.id},
+        )
+
+
+def _0002_hot_query_indexes(conn: Connection) -> None:
+    _create_index(conn, "ix_tasks_user_date", "tasks", "user_id, date")
+    _create_index(conn, "ix_tasks_user_created_at", "tasks", "user_id, created_at")
+    _create_index(conn, "ix_events_user_start_at", "events", "user_id, start_at")
+    _create_index(conn, "ix_reminders_user_remind_at", "reminders", "user_id, remind_at")
+
+
+def _0003_reminder_dispatch_columns(conn: Connection) -> None:
+    from .reminder_dispatch import first_fire_at
+
+    _add_column(conn, "reminders", "next_fire_at", "TIMESTAMP")
+    _add_column(conn, "reminders", "last_fired_at", "TIMESTAMP")
+    _add_column(conn, "reminders", "claimed_by", "VARCHAR")
+    _add_column(conn, "reminders", "claimed_until", "TIMESTAMP")
+    _create_index(conn, "ix_reminders_next_fire_at", "reminders", "next_fire_at")
+
+    # Nunca ha sonado nada: los puntuales ya pasados no se disparan de golpe
+    # y los recurrentes empiezan en su siguiente ocurrencia
+    now = datetime.utcnow()
+    rows = conn.execute(
+        text(
+            "SELECT id, remind_at, frequency, rrule FROM reminders "
+            "WHERE next_fire_at IS NULL AND is_active = :active"
+        ),
+        {"active": True},
+    ).fetchall()
+    for row in rows:
+        remind_at = row.remind_at
+        if isinstance(remind_at, str):
+            remind_at = datetime.fromisoformat(remind_at)
+        fire_at = first_fire_at(remind_at, row.frequency, row.rrule, now)
+        if fire_at is None:
+            continue
+        conn.execute(
+            text("UPDATE reminders SET next_fire_at = :f WHERE id = :id").bindparams(
+                bindparam("f", type_=DateTime())
+            ),
+            {"f": fire_at, "id": row.id},
+        )
+
+
+def _0004_task_day_part(conn: Connection) -> None:
+    _add_column(conn, "tasks", "day_part", "VARCHAR")
+
+
+def _0005_unique_event_occurrences(conn: Connection) -> None:
+    # Quitamos los duplicados que hayan dejado workers concurrentes antes del índice
+    conn.execute(
+        text(
+            "DELETE FROM event_occurrences WHERE id NOT IN ("
+            "SELECT MIN(id) FROM event_occurrences GROUP BY event_id, start_at)"
+        )
+    )
+    conn.execute(
+        text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS ux_event_occurrences_event_start "
+            "ON event_occurrences (event_id, start_at)"
+        )
+    )
+
+
+def _0006_calendar_feed_columns(conn: Connection) -> None:
+    _add_column(conn, "users", "feed_version", "INTEGER NOT NULL DEFAULT 0")
+    _add_column(conn, "users", "feed_updated_at", "TIMESTAMP")
+    _add_column(conn, "users", "feed_token_hash", "VARCHAR")
+    conn.execute(
+        text("CREATE UNIQUE INDEX IF NOT EXISTS ix_users_feed_token_hash ON users (feed_token_hash)")
+    )
+    # Sin historial de cambios: los clientes suscritos descargan el feed una vez más
+    conn.execute(
+        text("UPDATE users SET feed_updated_at = :now WHERE feed_updated_at IS NULL").bindparams(
+            bindparam("now", type_=DateTime())
+        ),
+        {"now": datetime.utcnow()},
+    )
+
+
+def _0007_task_created_at_not_null(conn: Connection) -> None:
+    # Filas antiguas sin fecha de alta: la real no se conoce, quedan las más
+    # antiguas (al final del listado, como ya las ordenaba SQLite)
+    conn.execute(
+        text("UPDATE tasks SET created_at = :epoch WHERE created_at IS NULL").bindparams(
+            bindparam("epoch", type_=DateTime())
+        ),
+        {"epoch": datetime(1970, 1, 1)},
+    )
+    # SQLite no admite cambiar la nulabilidad sin recrear la tabla; allí basta
+    # con el default del modelo
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("ALTER TABLE tasks ALTER COLUMN created_at SET NOT NULL"))
+
+
+def _0008_event_updated_at(conn: Connection) -> None:
+    # Las filas antiguas quedan en NULL hasta su primera edición
+    _add_column(conn, "events", "updated_at", "TIMESTAMP")
+
+
+MIGRATIONS: list[tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "event_occurrence_columns", _0001_event_occurrence_columns),
+    (2, "hot_query_indexes", _0002_hot_query_indexes),
+    (3, "reminder_dispatch_columns", _0003_reminder_dispatch_columns),
+    (4, "task_day_part", _0004_task_day_part),
+    (5, "unique_event_occurrences", _0005_unique_event_occurrences),
+    (6, "calendar_feed_columns", _0006_calendar_feed_columns),
+    (7, "task_created_at_not_null", _0007_task_created_at_not_null),
+    (8, "event_updated_at", _0008_event_updated_at),
+]
+
+
+def _ensure_version_table(engine: Engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                "version INTEGER PRIMARY KEY, "
+                "name VARCHAR NOT NULL, "
+                "applied_at TIMESTAMP NOT NULL)"
+            )
+        )
+
+
+def applied_versions(engine: Engine) -> set[int]:
+    _ensure_version_table(engine)
+    with engine.connect() as conn:
+        return {r[0] for r in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def run_migrations(engine: Engine) -> list[int]:
+    """Aplica las migraciones pendientes en orden. Devuelve las versiones aplicadas."""
+    done = applied_versions(engine)
+    applied: list[int] = []
+
+    for version, name, migrate in MIGRATIONS:
+        if version in done:
+            continue
+        try:
+            with engine.begin() as conn:
+                migrate(conn)
+                conn.execute(
+                    text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:v, :n, :t)"),
+                    {"v": version, "n": name, "t": datetime.utcnow()},
+                )
+        except Exception:
+            # Otro worker puede haberla aplicado a la vez; si quedó registrada, seguimos
+            if version in applied_versions(engine):
+                continue
+            raise
+        applied.append(version)
+
+    return applied
+
+
+if __name__ == "__main__":
+    from .database import Base, engine
+    from . import models  # noqa: F401
+
+    Base.metadata.create_all(bind=engine)
+    applied = run_migrations(engine)
+    print(f"Migraciones aplicadas: {applied or 'ninguna'}")
+    print(f"Versión actual: {max(applied_versions(engine), default=0)}")
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Index
 from sqlalchemy.orm import relationship
 
 from .database import Base
@@ -13,6 +13,11 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Contador de cambios del feed iCalendar (ETag) y su fecha (Last-Modified)
+    feed_version = Column(Integer, nullable=False, default=0, server_default="0")
+    feed_updated_at = Column(DateTime, default=datetime.utcnow)
+    # SHA-256 del token de suscripción al feed; NULL = sin token (revocado)
+    feed_token_hash = Column(String, nullable=True, unique=True, index=True)
 
 
 class Task(Base):
@@ -28,13 +33,21 @@ class Task(Base):
     date = Column(DateTime, nullable=True)
 
     channel = Column(String, nullable=True)
+    # Franja preferida (morning | noon | afternoon | night) para el autoagendado
+    day_part = Column(String, nullable=True)
 
     status = Column(String, default="pending", nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # Clave de la paginación de /tasks: sin NULL (migración 7)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     completed_at = Column(DateTime, nullable=True)
 
     user = relationship("User")
 
+    __table_args__ = (
+        Index("ix_tasks_user_date", "user_id", "date"),
+        Index("ix_tasks_user_created_at", "user_id", "created_at"),
+    )
+
 
 class Event(Base):
     __tablename__ = "events"
@@ -54,9 +67,44 @@ class Event(Base):
 
     timezone = Column(String, nullable=False, default="Europe/Madrid")
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Cambia con cualquier UPDATE del ORM: el índice de solapes detecta así las ediciones
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Hasta dónde están materializadas las ocurrencias en event_occurrences
+    # (None = pendiente de materializar)
+    occurrences_until = Column(DateTime, nullable=True)
+
+    # Límites de la serie calculados al escribir (series_end None = recurrencia infinita)
+    series_start = Column(DateTime, nullable=True)
+    series_end = Column(DateTime, nullable=True)
 
     user = relationship("User")
 
+    __table_args__ = (
+        Index("ix_events_user_start_at", "user_id", "start_at"),
+        Index("ix_events_user_series", "user_id", "series_start", "series_end"),
+    )
+
+
+class EventOccurrence(Base):
+    __tablename__ = "event_occurrences"
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    # Guardamos naive local (como Event)
+    start_at = Column(DateTime, nullable=False)
+    end_at = Column(DateTime, nullable=False)
+
+    event = relationship("Event")
+
+    __table_args__ = (
+        Index("ix_event_occurrences_user_start", "user_id", "start_at"),
+        # Varios workers materializan a la vez: la base descarta los repetidos
+        Index("ux_event_occurrences_event_start", "event_id", "start_at", unique=True),
+    )
+
 
 class Reminder(Base):
     __tablename__ = "reminders"
@@ -80,5 +128,41 @@ class Reminder(Base):
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Próximo disparo en UTC naive (None = no vuelve a sonar); ver app/reminder_dispatch.py
+    next_fire_at = Column(DateTime, nullable=True)
+    last_fired_at = Column(DateTime, nullable=True)
+    # Lease del worker que lo está entregando
+    claimed_by = Column(String, nullable=True)
+    claimed_until = Column(DateTime, nullable=True)
+
     user = relationship("User")
     task = relationship("Task")
+
+    __table_args__ = (
+        Index("ix_reminders_user_remind_at", "user_id", "remind_at"),
+        Index("ix_reminders_next_fire_at", "next_fire_at"),
+    )
+
+
+class LLMCacheEntry(Base):
+    __tablename__ = "llm_cache"
+
+    # sha256 de (tipo, texto normalizado, día ancla, zona, versión de prompt)
+    key = Column(String, primary_key=True)
+    kind = Column(String, nullable=False)
+    value = Column(Text, nullable=False)  # JSON
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class Conversation(Base):
+    __tablename__ = "conversations"
+
+    # Estado de los diálogos de recordatorios (ver app/conversations.py)
+    id = Column(String, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
+    state = Column(Text, nullable=False)  # JSON
+
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
@@ -0,0 +1,170 @@
+import os
+import threading
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import insert, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import SessionLocal
+from .recurrence import DEFAULT_TZ, expand_occurrences, has_occurrence_after
+
+HORIZON_DAYS = int(os.getenv("OCCURRENCE_HORIZON_DAYS", "365"))
+# Lo que se materializa al crear el evento; el resto del horizonte, el worker
+INLINE_DAYS = int(os.getenv("OCCURRENCE_INLINE_DAYS", "31"))
+# Filas por evento y llamada: una serie muy densa avanza por tramos
+MAX_PER_EVENT = int(os.getenv("OCCURRENCE_MAX_PER_EVENT", "2000"))
+REFRESH_SECONDS = int(os.getenv("OCCURRENCE_REFRESH_SECONDS", "3600"))
+BATCH_SIZE = 200
+
+# Marca de serie completamente materializada (puntuales o recurrencias finitas)
+COMPLETE = datetime(9999, 12, 31)
+
+
+def horizon_end(now: datetime | None = None, days: int = HORIZON_DAYS) -> datetime:
+    now_local = now or datetime.now(ZoneInfo(DEFAULT_TZ)).replace(tzinfo=None, microsecond=0)
+    return now_local + timedelta(days=days)
+
+
+def inline_horizon_end(now: datetime | None = None) -> datetime:
+    return horizon_end(now, min(INLINE_DAYS, HORIZON_DAYS))
+
+
+def _insert_occurrences(db: Session, rows: list[dict]) -> None:
+    """
+    INSERT que ignora (event_id, start_at) ya existentes: el worker corre en
+    cada proceso y dos pueden materializar el mismo evento a la vez.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        stmt = postgresql.insert(models.EventOccurrence).on_conflict_do_nothing(
+            index_elements=["event_id", "start_at"]
+        )
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(models.EventOccurrence).on_conflict_do_nothing(
+            index_elements=["event_id", "start_at"]
+        )
+    else:
+        stmt = insert(models.EventOccurrence)
+    db.execute(stmt, rows)
+
+
+def materialize_event(db: Session, ev: models.Event, until: datetime | None = None) -> int:
+    """
+    Rellena event_occurrences para `ev` desde donde se quedó hasta `until`,
+    como mucho MAX_PER_EVENT filas (si se corta, occurrences_until queda en la
+    última insertada y la siguiente llamada sigue desde ahí).
+    No hace commit; devuelve el número de filas insertadas.
+    """
+    if ev.occurrences_until is not None and ev.occurrences_until >= COMPLETE:
+        return 0
+
+    if not ev.rrule:
+        _insert_occurrences(
+            db, [{"event_id": ev.id, "user_id": ev.user_id, "start_at": ev.start_at, "end_at": ev.end_at}]
+        )
+        ev.occurrences_until = COMPLETE
+        return 1
+
+    until = until or horizon_end()
+    previous = ev.occurrences_until
+    if previous is not None and previous >= until:
+        return 0
+
+    occs = expand_occurrences(
+        ev.start_at,
+        ev.end_at,
+        ev.rrule,
+        ev.timezone,
+        range_start=previous or ev.start_at,
+        range_end=until,
+    )
+    rows = [
+        {"event_id": ev.id, "user_id": ev.user_id, "start_at": start, "end_at": end}
+        for start, end in occs
+        if previous is None or start > previous
+    ]
+    if len(rows) > MAX_PER_EVENT:
+        rows = rows[:MAX_PER_EVENT]
+        _insert_occurrences(db, rows)
+        ev.occurrences_until = rows[-1]["start_at"]
+        return len(rows)
+    if rows:
+        _insert_occurrences(db, rows)
+
+    if has_occurrence_after(ev.start_at, ev.rrule, ev.timezone, until):
+        ev.occurrences_until = until
+    else:
+        ev.occurrences_until = COMPLETE
+    return len(rows)
+
+
+def delete_event_occurrences(db: Session, event_id: int) -> None:
+    db.query(models.EventOccurrence).filter(models.EventOccurrence.event_id == event_id).delete(
+        synchronize_session=False
+    )
+
+
+def extend_all(session_factory=SessionLocal) -> int:
+    """
+    Extiende el horizonte de todos los eventos pendientes o que se quedan cortos.
+    Procesa por lotes con un commit por lote.
+    """
+    until = horizon_end()
+    # Margen de un día para no reescribir todos los eventos en cada pasada
+    stale_before = until - timedelta(days=1)
+    total = 0
+    last_id = 0
+
+    while True:
+        db = session_factory()
+        try:
+            batch = (
+                db.query(models.Event)
+                .filter(
+                    models.Event.id > last_id,
+                    or_(
+                        models.Event.occurrences_until.is_(None),
+                        models.Event.occurrences_until < stale_before,
+                    ),
+                )
+                .order_by(models.Event.id.asc())
+                .limit(BATCH_SIZE)
+                .all()
+            )
+            if not batch:
+                return total
+            for ev in batch:
+                total += materialize_event(db, ev, until)
+            last_id = batch[-1].id
+            db.commit()
+        finally:
+            db.close()
+
+
+_stop = threading.Event()
+_worker: threading.Thread | None = None
+
+
+def _run_worker() -> None:
+    while not _stop.is_set():
+        try:
+            extend_all()
+        except Exception as e:
+            print(f"Error materializando ocurrencias: {e}")
+        _stop.wait(REFRESH_SECONDS)
+
+
+def start_worker() -> None:
+    global _worker
+    if REFRESH_SECONDS <= 0 or (_worker is not None and _worker.is_alive()):
+        return
+    _stop.clear()
+    _worker = threading.Thread(target=_run_worker, name="occurrences-worker", daemon=True)
+    _worker.start()
+
+
+def stop_worker() -> None:
+    _stop.set()
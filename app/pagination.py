@@ -0,0 +1,67 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any
+
+from fastapi import HTTPException, Response
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_value: datetime, row_id: int) -> str:
+    raw = json.dumps([sort_value.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_value, row_id = json.loads(raw)
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def keyset_page(
+    query: Query,
+    sort_col: Any,
+    id_col: Any,
+    response: Response,
+    limit: int | None,
+    cursor: str | None,
+    descending: bool = False,
+) -> list:
+    """
+    Paginación por clave (sort_col, id). Sin limit ni cursor devuelve la lista
+    completa como antes. El cursor de la página siguiente va en X-Next-Cursor.
+    sort_col tiene que ser NOT NULL: un NULL no cabe en el cursor ni en la
+    comparación de claves.
+    """
+    if descending:
+        query = query.order_by(sort_col.desc(), id_col.desc())
+    else:
+        query = query.order_by(sort_col.asc(), id_col.asc())
+
+    if limit is None and cursor is None:
+        return query.all()
+
+    if cursor is not None:
+        sort_value, row_id = decode_cursor(cursor)
+        if descending:
+            query = query.filter(or_(sort_col < sort_value, and_(sort_col == sort_value, id_col < row_id)))
+        else:
+            query = query.filter(or_(sort_col > sort_value, and_(sort_col == sort_value, id_col > row_id)))
+
+    limit = min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+    rows = query.limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            getattr(last, sort_col.key), getattr(last, id_col.key)
+        )
+    return rows
@@ -0,0 +1,378 @@
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Iterator
+from functools import lru_cache
+from itertools import islice
+from zoneinfo import ZoneInfo
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# numpy y dateutil.rrule se importan al usarlos: muchos workers no expanden
+# nunca una serie y así no pagan su importación al arrancar.
+
+DEFAULT_TZ = "Europe/Madrid"
+RULE_CACHE_SIZE = int(os.getenv("RRULE_CACHE_SIZE", "2048"))
+# Tope de COUNT al crear series: el fin se calcula recorriendo las ocurrencias
+RRULE_MAX_COUNT = int(os.getenv("RRULE_MAX_COUNT", "1000"))
+
+
+class RuleCache:
+    """
+    LRU acotada de reglas ya parseadas por rrulestr, indexada por
+    (texto rrule, dtstart naive, zona horaria).
+    """
+
+    def __init__(self, maxsize: int = RULE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, rrule: str, dtstart: datetime, tzname: str | None):
+        tzname = tzname or DEFAULT_TZ
+        key = (rrule, dtstart.replace(tzinfo=None), tzname)
+        with self._lock:
+            rule = self._data.get(key)
+            if rule is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return rule
+            self.misses += 1
+
+        # Parseamos fuera del lock; si dos hilos compiten, gana el último (misma regla)
+        from dateutil.rrule import rrulestr
+
+        rule = rrulestr(rrule, dtstart=key[1].replace(tzinfo=ZoneInfo(tzname)))
+        with self._lock:
+            self._data[key] = rule
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return rule
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
+
+
+rule_cache = RuleCache()
+
+
+def get_rule(rrule: str, dtstart: datetime, tzname: str | None = None):
+    return rule_cache.get(rrule, dtstart, tzname)
+
+
+# --- Vía rápida vectorizada para reglas simples ---------------------------------
+#
+# Cubre FREQ=DAILY, FREQ=WEEKLY[;BYDAY=..] y FREQ=MONTHLY[;BYMONTHDAY=..] con
+# INTERVAL y UNTIL opcionales. Igual que dateutil con dtstart aware, las
+# ocurrencias conservan la hora de pared de dtstart (no se desplazan con el
+# cambio de horario). Todo lo demás (COUNT, BYSETPOS, ordinales...) va por dateutil.
+
+_WEEKDAY_CODES = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
+_SIMPLE_KEYS = {"FREQ", "INTERVAL", "BYDAY", "BYMONTHDAY", "UNTIL", "WKST"}
+
+
+@lru_cache(maxsize=1024)
+def _parse_simple(rrule: str) -> tuple | None:
+    parts = {}
+    for chunk in rrule.strip().upper().removeprefix("RRULE:").split(";"):
+        if not chunk:
+            continue
+        key, sep, value = chunk.partition("=")
+        if not sep or key not in _SIMPLE_KEYS or key in parts:
+            return None
+        parts[key] = value
+
+    freq = parts.get("FREQ")
+    if freq not in ("DAILY", "WEEKLY", "MONTHLY"):
+        return None
+    if parts.get("WKST", "MO") != "MO":
+        return None
+
+    try:
+        interval = int(parts.get("INTERVAL", "1"))
+    except ValueError:
+        return None
+    if interval < 1:
+        return None
+
+    byday = None
+    if "BYDAY" in parts:
+        if freq != "WEEKLY":
+            return None
+        codes = parts["BYDAY"].split(",")
+        if not codes or any(c not in _WEEKDAY_CODES for c in codes):
+            return None
+        byday = tuple(sorted({_WEEKDAY_CODES[c] for c in codes}))
+
+    bymonthday = None
+    if "BYMONTHDAY" in parts:
+        if freq != "MONTHLY":
+            return None
+        try:
+            days = {int(d) for d in parts["BYMONTHDAY"].split(",")}
+        except ValueError:
+            return None
+        if any(d < 1 or d > 31 for d in days):
+            return None
+        bymonthday = tuple(sorted(days))
+
+    until = None
+    if "UNTIL" in parts:
+        # Con dtstart aware dateutil exige UNTIL en UTC; el resto lo dejamos a dateutil
+        try:
+            until = datetime.strptime(parts["UNTIL"], "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+        except ValueError:
+            return None
+
+    return freq, interval, byday, bymonthday, until
+
+
+def _simple_candidates(spec: tuple, start_at: datetime, lo: "np.datetime64", hi: "np.datetime64") -> "np.ndarray":
+    """Fechas (datetime64[D]) de la serie que pueden caer en [lo, hi]."""
+    import numpy as np
+
+    freq, interval, byday, bymonthday, _ = spec
+    d0 = np.datetime64(start_at.date(), "D")
+
+    if freq == "DAILY":
+        k_lo = max(0, int((lo - d0).astype(int)) // interval)
+        k_hi = int((hi - d0).astype(int)) // interval + 1
+        if k_hi < k_lo:
+            return np.empty(0, dtype="datetime64[D]")
+        return d0 + np.arange(k_lo, k_hi + 1) * interval
+
+    if freq == "WEEKLY":
+        days = np.array(byday if byday is not None else (start_at.weekday(),))
+        week0 = d0 - start_at.weekday()
+        step = 7 * interval
+        k_lo = max(0, int((lo - week0).astype(int)) // step)
+        k_hi = int((hi - week0).astype(int)) // step + 1
+        if k_hi < k_lo:
+            return np.empty(0, dtype="datetime64[D]")
+        weeks = week0 + np.arange(k_lo, k_hi + 1) * step
+        return (weeks[:, None] + days[None, :]).ravel()
+
+    # MONTHLY: se descartan los meses que no tienen ese día (igual que dateutil)
+    monthdays = np.array(bymonthday if bymonthday is not None else (start_at.day,))
+    m0 = d0.astype("datetime64[M]")
+    months_lo = int((lo.astype("datetime64[M]") - m0).astype(int))
+    months_hi = int((hi.astype("datetime64[M]") - m0).astype(int))
+    k_lo = max(0, months_lo // interval)
+    k_hi = months_hi // interval + 1
+    if k_hi < k_lo:
+        return np.empty(0, dtype="datetime64[D]")
+    months = m0 + np.arange(k_lo, k_hi + 1) * interval
+    dates = (months.astype("datetime64[D]")[:, None] + (monthdays - 1)[None, :]).ravel()
+    same_month = dates.astype("datetime64[M]") == np.repeat(months, len(monthdays))
+    return dates[same_month]
+
+
+def _expand_simple(
+    spec: tuple,
+    start_at: datetime,
+    end_at: datetime,
+    tz: ZoneInfo,
+    range_start: datetime,
+    range_end: datetime,
+) -> list[tuple[datetime, datetime]]:
+    import numpy as np
+
+    start_at = start_at.replace(microsecond=0)
+    duration = np.timedelta64(end_at - start_at, "us")
+    time_of_day = np.timedelta64(start_at - datetime.combine(start_at.date(), datetime.min.time()), "us")
+
+    window_start = np.datetime64(range_start, "us") - duration
+    window_end = np.datetime64(range_end, "us")
+
+    dates = _simple_candidates(
+        spec,
+        start_at,
+        window_start.astype("datetime64[D]"),
+        window_end.astype("datetime64[D]"),
+    )
+    starts = np.sort(dates).astype("datetime64[us]") + time_of_day
+
+    mask = (starts >= np.datetime64(start_at, "us")) & (starts >= window_start) & (starts <= window_end)
+    until = spec[4]
+    if until is not None:
+        # Junto a un cambio de hora la hora local no es monótona respecto a UTC
+        # (02:30 que no existe o que se repite): ahí se compara el instante
+        # real, como hace dateutil
+        until_local = np.datetime64(until.astimezone(tz).replace(tzinfo=None), "us")
+        margin = np.timedelta64(2, "h")
+        before = starts <= until_local - margin
+        for i in np.nonzero(~before & (starts <= until_local + margin))[0]:
+            before[i] = starts[i].item().replace(tzinfo=tz) <= until
+        mask &= before
+    starts = starts[mask]
+    ends = starts + duration
+    keep = ends >= np.datetime64(range_start, "us")
+
+    return list(zip(starts[keep].tolist(), ends[keep].tolist()))
+
+
+def expand_occurrences(
+    start_at: datetime,
+    end_at: datetime,
+    rrule: str,
+    tzname: str | None,
+    range_start: datetime,
+    range_end: datetime,
+    fast: bool = True,
+) -> list[tuple[datetime, datetime]]:
+    """
+    Expande un evento recurrente y devuelve (inicio, fin) en naive local
+    de las ocurrencias que solapan [range_start, range_end].
+    """
+    tz = ZoneInfo(tzname or DEFAULT_TZ)
+
+    spec = _parse_simple(rrule) if fast else None
+    if spec is not None:
+        return _expand_simple(spec, start_at, end_at, tz, range_start, range_end)
+
+    duration = end_at - start_at
+    rule = get_rule(rrule, start_at, tzname)
+
+    # Restamos la duración para no perder ocurrencias que empiezan antes del rango y lo solapan
+    window_start = (range_start - duration).replace(tzinfo=tz)
+    window_end = range_end.replace(tzinfo=tz)
+
+    out: list[tuple[datetime, datetime]] = []
+    for occ in rule.between(window_start, window_end, inc=True):
+        occ_local = occ.astimezone(tz).replace(tzinfo=None)
+        occ_end = occ_local + duration
+        if occ_end >= range_start and occ_local <= range_end:
+            out.append((occ_local, occ_end))
+    return out
+
+
+def iter_occurrences(
+    start_at: datetime,
+    end_at: datetime,
+    rrule: str,
+    tzname: str | None,
+    range_start: datetime,
+    range_end: datetime,
+    chunk: timedelta = timedelta(days=31),
+) -> Iterator[tuple[datetime, datetime]]:
+    """
+    Como expand_occurrences pero por tramos de `chunk`, en orden de inicio,
+    para no materializar rangos largos de golpe.
+    """
+    lo = range_start
+    first = True
+    while lo <= range_end:
+        hi = min(lo + chunk, range_end)
+        for occ_start, occ_end in expand_occurrences(start_at, end_at, rrule, tzname, lo, hi):
+            # Tras el primer tramo, lo que empieza en `lo` o antes ya salió en el anterior
+            if first or occ_start > lo:
+                yield occ_start, occ_end
+        if hi >= range_end:
+            return
+        lo = hi
+        first = False
+
+
+def has_occurrence_after(start_at: datetime, rrule: str, tzname: str | None, after: datetime) -> bool:
+    tz = ZoneInfo(tzname or DEFAULT_TZ)
+    rule = get_rule(rrule, start_at, tzname)
+    return rule.after(after.replace(tzinfo=tz), inc=False) is not None
+
+
+def next_occurrence_after(start_at: datetime, rrule: str, tzname: str | None, after: datetime) -> datetime | None:
+    """Primera ocurrencia (naive local) estrictamente posterior a `after`."""
+    spec = _parse_simple(rrule)
+    if spec is not None and spec[2] is None and spec[0] in ("DAILY", "WEEKLY"):
+        # Periodo fijo en hora de pared: aritmética directa
+        freq, interval, _, _, until = spec
+        start = start_at.replace(microsecond=0)
+        period = timedelta(days=interval * (7 if freq == "WEEKLY" else 1))
+        k = (after - start) // period + 1 if after >= start else 0
+        occ = start + k * period
+        if until is not None and occ.replace(tzinfo=ZoneInfo(tzname or DEFAULT_TZ)) > until:
+            return None
+        return occ
+
+    if spec is not None:
+        # Sin iterar desde dtstart: ventanas sucesivas a partir de `after`
+        lo = max(after, start_at)
+        for _ in range(8):
+            hi = lo + timedelta(days=400)
+            for occ_start, _ in expand_occurrences(start_at, start_at, rrule, tzname, lo, hi):
+                if occ_start > after:
+                    return occ_start
+            lo = hi
+        # INTERVAL muy largo o serie ya terminada: que decida dateutil
+
+    tz = ZoneInfo(tzname or DEFAULT_TZ)
+    rule = get_rule(rrule, start_at, tzname)
+    occ = rule.after(after.replace(tzinfo=tz), inc=False)
+    return occ.astimezone(tz).replace(tzinfo=None) if occ is not None else None
+
+
+def series_bounds(
+    start_at: datetime,
+    end_at: datetime,
+    rrule: str | None,
+    tzname: str | None,
+) -> tuple[datetime, datetime | None]:
+    """
+    Intervalo [series_start, series_end] que cubre todas las ocurrencias.
+    series_end es None si la recurrencia no tiene fin (sin UNTIL ni COUNT).
+    Con UNTIL es una cota (UNTIL + duración) y no la última ocurrencia exacta.
+
+    Es la validación de las series nuevas: lanza ValueError con frecuencias
+    menores de un día o COUNT por encima de RRULE_MAX_COUNT, y
+    ZoneInfoNotFoundError con una zona desconocida (también sin rrule).
+    """
+    from dateutil.rrule import DAILY
+
+    tz = ZoneInfo(tzname or DEFAULT_TZ)
+    if not rrule:
+        return start_at, end_at
+
+    rule = get_rule(rrule, start_at, tzname)
+    # Un rruleset (varias RRULE, RDATE...) se valida por partes y queda sin fin
+    parts = getattr(rule, "_rrule", None) or [rule]
+    for part in parts:
+        if part._freq > DAILY:
+            raise ValueError("no se admiten frecuencias menores de un día")
+        if part._count is not None and part._count > RRULE_MAX_COUNT:
+            raise ValueError(f"COUNT no puede pasar de {RRULE_MAX_COUNT}")
+    if rule is not parts[0]:
+        return start_at, None
+
+    duration = end_at - start_at
+    if rule._until is not None:
+        until = rule._until.astimezone(tz).replace(tzinfo=None)
+        return start_at, max(until, start_at) + duration
+    if rule._count is None:
+        return start_at, None
+
+    last = None
+    for occ in islice(rule, rule._count):
+        last = occ
+    if last is None:
+        return start_at, end_at
+    return start_at, last.astimezone(tz).replace(tzinfo=None) + duration
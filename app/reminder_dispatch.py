@@ -0,0 +1,371 @@
+"""
+Disparo de recordatorios vencidos.
+
+Cada recordatorio activo tiene `next_fire_at` (UTC naive, indexado). Un hilo
+por proceso:
+
+  1. Reclama en lote los vencidos con un UPDATE ... RETURNING que los marca
+     con su id de worker y un lease (`claimed_until`). En Postgres la
+     subconsulta lleva FOR UPDATE SKIP LOCKED; en SQLite la sentencia ya es
+     atómica. Si un worker muere, el lease caduca y otro los recoge.
+  2. Los entrega al sink configurado (log o webhook).
+  3. Avanza los recurrentes a su siguiente ocurrencia posterior a ahora (no
+     se recuperan las perdidas) y deja los puntuales con next_fire_at NULL.
+
+Entre rondas el hilo duerme hasta el siguiente vencimiento según un min-heap
+con los próximos `next_fire_at` de la ventana LOOKAHEAD_SECONDS, que se
+recarga periódicamente desde el índice y al que notify() añade los creados
+en este proceso. Se activa con REMINDER_DISPATCH=1.
+
+    python -m app.reminder_dispatch --once          # una ronda y sale
+    python -m app.reminder_dispatch --stand-in 8099 # receptor de webhook local
+"""
+import heapq
+import json
+import os
+import socket
+import threading
+import time
+import urllib.request
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import and_, bindparam, or_, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from . import models
+from .database import SessionLocal
+from .recurrence import DEFAULT_TZ, next_occurrence_after
+
+REMINDER_DISPATCH = os.getenv("REMINDER_DISPATCH", "0") == "1"
+REMINDER_SINK = os.getenv("REMINDER_SINK", "log")  # log | webhook
+REMINDER_WEBHOOK_URL = os.getenv("REMINDER_WEBHOOK_URL", "http://127.0.0.1:8099/reminders")
+BATCH_SIZE = int(os.getenv("REMINDER_BATCH_SIZE", "500"))
+LEASE_SECONDS = int(os.getenv("REMINDER_LEASE_SECONDS", "60"))
+# Reintento tras un fallo del sink
+RETRY_SECONDS = int(os.getenv("REMINDER_RETRY_SECONDS", "60"))
+LOOKAHEAD_SECONDS = int(os.getenv("REMINDER_LOOKAHEAD_SECONDS", "300"))
+# Tope de espera entre rondas aunque el heap no tenga nada antes
+MAX_SLEEP_SECONDS = 30
+
+_FREQUENCY_RULES = {"daily": "FREQ=DAILY", "weekly": "FREQ=WEEKLY", "monthly": "FREQ=MONTHLY"}
+
+
+def local_to_utc(dt: datetime, tzname: str = DEFAULT_TZ) -> datetime:
+    return dt.replace(tzinfo=ZoneInfo(tzname)).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def first_fire_at(
+    remind_at: datetime,
+    frequency: Optional[str] = None,
+    rrule: Optional[str] = None,
+    now_utc: Optional[datetime] = None,
+    is_active: bool = True,
+) -> Optional[datetime]:
+    """
+    next_fire_at inicial de un recordatorio nuevo (remind_at es hora local).
+    Si remind_at ya pasó no se dispara de golpe: los recurrentes empiezan en
+    su siguiente ocurrencia y los puntuales quedan en None.
+    """
+    if not is_active:
+        return None
+    fire_at = local_to_utc(remind_at)
+    now_utc = now_utc or datetime.utcnow()
+    if fire_at < now_utc:
+        return next_fire_after(remind_at, frequency, rrule, now_utc)
+    return fire_at
+
+
+def next_fire_after(
+    remind_at: datetime,
+    frequency: Optional[str],
+    rrule: Optional[str],
+    after_utc: datetime,
+) -> Optional[datetime]:
+    """Siguiente disparo (UTC) posterior a `after_utc`, o None si no se repite."""
+    rule = rrule or _FREQUENCY_RULES.get((frequency or "once").lower())
+    if not rule:
+        return None
+    tz = ZoneInfo(DEFAULT_TZ)
+    after_local = after_utc.replace(tzinfo=timezone.utc).astimezone(tz).replace(tzinfo=None)
+    try:
+        nxt = next_occurrence_after(remind_at, rule, DEFAULT_TZ, after_local)
+    except ValueError as e:
+        print(f"rrule inválida en recordatorio: {rule}: {e}")
+        return None
+    return local_to_utc(nxt) if nxt is not None else None
+
+
+# --- Sinks -------------------------------------------------------------------
+
+class LogSink:
+    def deliver(self, items: List[Dict[str, Any]]) -> None:
+        for item in items:
+            print(f"[recordatorio] user={item['user_id']} id={item['id']} {item['title']!r} ({item['fire_at']})")
+
+
+class WebhookSink:
+    """POST JSON con el lote entero; cualquier respuesta no 2xx es un fallo."""
+
+    def __init__(self, url: str = REMINDER_WEBHOOK_URL, timeout: float = 10.0):
+        self.url = url
+        self.timeout = timeout
+
+    def deliver(self, items: List[Dict[str, Any]]) -> None:
+        body = json.dumps({"reminders": items}, ensure_ascii=False, default=str).encode("utf-8")
+        req = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            if resp.status >= 300:
+                raise RuntimeError(f"Webhook respondió {resp.status}")
+
+
+def make_sink(kind: str = REMINDER_SINK):
+    if kind == "log":
+        return LogSink()
+    if kind == "webhook":
+        return WebhookSink()
+    raise ValueError(f"REMINDER_SINK desconocido: {kind}")
+
+
+# --- Reclamar / confirmar ----------------------------------------------------
+
+_R = models.Reminder.__table__
+
+
+def claim_due(db, worker_id: str, now: datetime, limit: int = BATCH_SIZE) -> List[Dict[str, Any]]:
+    """Marca con lease hasta `limit` recordatorios vencidos y los devuelve."""
+    due = (
+        select(_R.c.id)
+        .where(
+            _R.c.is_active.is_(True),
+            _R.c.next_fire_at <= now,
+            or_(_R.c.claimed_until.is_(None), _R.c.claimed_until < now),
+        )
+        .order_by(_R.c.next_fire_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    stmt = (
+        update(_R)
+        .where(_R.c.id.in_(due.scalar_subquery()))
+        .values(claimed_by=worker_id, claimed_until=now + timedelta(seconds=LEASE_SECONDS))
+        .returning(
+            _R.c.id, _R.c.user_id, _R.c.task_id, _R.c.title, _R.c.description,
+            _R.c.remind_at, _R.c.frequency, _R.c.rrule, _R.c.next_fire_at,
+        )
+    )
+    rows = db.execute(stmt).mappings().all()
+    db.commit()
+    return [dict(r) for r in rows]
+
+
+_finish_stmt = (
+    update(_R)
+    .where(and_(_R.c.id == bindparam("b_id"), _R.c.claimed_by == bindparam("b_worker")))
+    .values(
+        next_fire_at=bindparam("b_next"),
+        last_fired_at=bindparam("b_fired"),
+        claimed_by=None,
+        claimed_until=None,
+    )
+)
+
+_release_stmt = (
+    update(_R)
+    .where(and_(_R.c.id == bindparam("b_id"), _R.c.claimed_by == bindparam("b_worker")))
+    .values(claimed_by=None, claimed_until=bindparam("b_retry"))
+)
+
+
+def dispatch_once(sink, worker_id: str, session_factory=SessionLocal, now: Optional[datetime] = None) -> int:
+    """Reclama y entrega lotes hasta vaciar los vencidos. Devuelve cuántos se entregaron."""
+    delivered = 0
+    while True:
+        now_utc = now or datetime.utcnow()
+        db = session_factory()
+        try:
+            batch = claim_due(db, worker_id, now_utc)
+            if not batch:
+                return delivered
+
+            items = [
+                {
+                    "id": r["id"],
+                    "user_id": r["user_id"],
+                    "task_id": r["task_id"],
+                    "title": r["title"],
+                    "description": r["description"],
+                    "fire_at": r["next_fire_at"].isoformat() + "Z",
+                }
+                for r in batch
+            ]
+            try:
+                sink.deliver(items)
+            except Exception as e:
+                print(f"Error entregando recordatorios: {e}")
+                # El lease hace de espera antes del reintento
+                retry = now_utc + timedelta(seconds=RETRY_SECONDS)
+                db.execute(_release_stmt, [{"b_id": r["id"], "b_worker": worker_id, "b_retry": retry} for r in batch])
+                db.commit()
+                return delivered
+
+            db.execute(
+                _finish_stmt,
+                [
+                    {
+                        "b_id": r["id"],
+                        "b_worker": worker_id,
+                        "b_next": next_fire_after(r["remind_at"], r["frequency"], r["rrule"], now_utc),
+                        "b_fired": now_utc,
+                    }
+                    for r in batch
+                ],
+            )
+            db.commit()
+            delivered += len(batch)
+            if len(batch) < BATCH_SIZE:
+                return delivered
+        except SQLAlchemyError:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+# --- Planificador ------------------------------------------------------------
+
+class Scheduler:
+    def __init__(self, sink, session_factory=SessionLocal):
+        self.sink = sink
+        self.session_factory = session_factory
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._heap: List[datetime] = []
+        self._loaded_until: Optional[datetime] = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.delivered = 0
+
+    def notify(self, fire_at: Optional[datetime]) -> None:
+        """Avisa de un next_fire_at nuevo para despertar antes si hace falta."""
+        if fire_at is None:
+            return
+        with self._lock:
+            if self._loaded_until is not None and fire_at <= self._loaded_until:
+                heapq.heappush(self._heap, fire_at)
+        self._wake.set()
+
+    def _reload(self, now: datetime) -> None:
+        horizon = now + timedelta(seconds=LOOKAHEAD_SECONDS)
+        db = self.session_factory()
+        try:
+            times = db.execute(
+                select(_R.c.next_fire_at)
+                .where(_R.c.is_active.is_(True), _R.c.next_fire_at <= horizon)
+                .order_by(_R.c.next_fire_at)
+                .limit(BATCH_SIZE * 10)
+            ).scalars().all()
+        finally:
+            db.close()
+        with self._lock:
+            self._heap = list(times)
+            heapq.heapify(self._heap)
+            # Si se cortó por el LIMIT, solo sabemos lo que hay hasta el último leído
+            self._loaded_until = times[-1] if len(times) == BATCH_SIZE * 10 else horizon
+
+    def _sleep_seconds(self, now: datetime) -> float:
+        with self._lock:
+            while self._heap and self._heap[0] <= now:
+                heapq.heappop(self._heap)
+            limit = MAX_SLEEP_SECONDS
+            if self._loaded_until is not None:
+                limit = min(limit, max((self._loaded_until - now).total_seconds(), 0))
+            if self._heap:
+                limit = min(limit, (self._heap[0] - now).total_seconds())
+        return max(limit, 0.05)
+
+    def run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.delivered += dispatch_once(self.sink, self.worker_id, self.session_factory)
+                now = datetime.utcnow()
+                if self._loaded_until is None or now >= self._loaded_until:
+                    self._reload(now)
+                wait = self._sleep_seconds(now)
+            except Exception as e:
+                print(f"Error en el disparo de recordatorios: {e}")
+                wait = MAX_SLEEP_SECONDS
+            self._wake.wait(wait)
+            self._wake.clear()
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="reminder-dispatch", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+
+scheduler: Optional[Scheduler] = None
+
+
+def notify(fire_at: Optional[datetime]) -> None:
+    if scheduler is not None:
+        scheduler.notify(fire_at)
+
+
+def start_worker() -> None:
+    global scheduler
+    if not REMINDER_DISPATCH:
+        return
+    if scheduler is None:
+        scheduler = Scheduler(make_sink())
+    scheduler.start()
+
+
+def stop_worker() -> None:
+    if scheduler is not None:
+        scheduler.stop()
+
+
+def _serve_stand_in(port: int) -> None:
+    """Receptor de webhook mínimo para desarrollo: imprime lo que recibe."""
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            for item in json.loads(body or b"{}").get("reminders", []):
+                print(f"webhook: {item}")
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    print(f"Escuchando webhooks en http://127.0.0.1:{port}/reminders")
+    HTTPServer(("127.0.0.1", port), Handler).serve_forever()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--once", action="store_true", help="una ronda de disparo y salir")
+    parser.add_argument("--stand-in", type=int, metavar="PORT", help="servir un receptor de webhook local")
+    args = parser.parse_args()
+
+    if args.stand_in:
+        _serve_stand_in(args.stand_in)
+    elif args.once:
+        n = dispatch_once(make_sink(), f"cli:{os.getpid()}")
+        print(f"Recordatorios entregados: {n}")
+    else:
+        parser.print_help()
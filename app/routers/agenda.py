@@ -1,15 +1,22 @@
 from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Iterator, Optional
 from zoneinfo import ZoneInfo
-from dateutil.rrule import rrulestr
+import heapq
 
-from ..database import get_db
+from ..database import get_db, SessionLocal
 from ..deps import get_current_user
 from .. import models, schemas
+from ..intervals import clip, complement, snap, sweep
+from ..recurrence import iter_occurrences
 
 router = APIRouter(prefix="/agenda", tags=["agenda"])
 
+STREAM_BATCH_SIZE = 500
+
 
 def _ensure_aware(dt: datetime, tzname: str) -> datetime:
     if dt.tzinfo is None:
@@ -21,59 +28,114 @@ def _to_local_naive(dt: datetime, tzname: str) -> datetime:
     return _ensure_aware(dt, tzname).astimezone(ZoneInfo(tzname)).replace(tzinfo=None)
 
 
-@router.get("/", response_model=list[schemas.AgendaItem])
-def get_agenda(
-    from_dt: datetime = Query(..., alias="from"),
-    to_dt: datetime = Query(..., alias="to"),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
-):
-    tzname = "Europe/Madrid"
-    from_local = _to_local_naive(from_dt, tzname)
-    to_local = _to_local_naive(to_dt, tzname)
+def _sort_key(x: schemas.AgendaItem):
+    if x.type == "event" and x.start_at:
+        return x.start_at
+    if x.type == "task" and x.date:
+        return x.date
+    return datetime.max
 
-    items: list[schemas.AgendaItem] = []
 
-    # TAREAS
+def _task_items(db: Session, user_id: int, from_local: datetime, to_local: datetime) -> Iterator[schemas.AgendaItem]:
     tasks = (
         db.query(models.Task)
         .filter(
-            models.Task.user_id == current_user.id,
+            models.Task.user_id == user_id,
             models.Task.date.isnot(None),
             models.Task.date >= from_local,
             models.Task.date <= to_local,
         )
         .order_by(models.Task.date.asc())
-        .all()
+        .yield_per(STREAM_BATCH_SIZE)
     )
     for t in tasks:
-        items.append(
-            schemas.AgendaItem(
-                type="task",
-                id=t.id,
-                title=t.title,
-                description=t.description,
-                date=t.date,
-                channel=t.channel,
-                status=t.status,
-            )
+        yield schemas.AgendaItem(
+            type="task",
+            id=t.id,
+            title=t.title,
+            description=t.description,
+            date=t.date,
+            channel=t.channel,
+            status=t.status,
+        )
+
+
+def _materialized_event_items(
+    db: Session, user_id: int, from_local: datetime, to_local: datetime
+) -> Iterator[schemas.AgendaItem]:
+    # EVENTOS materializados: una consulta por rango sobre event_occurrences
+    rows = (
+        db.query(models.EventOccurrence, models.Event)
+        .join(models.Event, models.Event.id == models.EventOccurrence.event_id)
+        .filter(
+            models.EventOccurrence.user_id == user_id,
+            models.EventOccurrence.start_at <= to_local,
+            models.EventOccurrence.end_at >= from_local,
+            models.Event.occurrences_until >= to_local,
+        )
+        .order_by(models.EventOccurrence.start_at.asc())
+        .yield_per(STREAM_BATCH_SIZE)
+    )
+    for occ, ev in rows:
+        yield schemas.AgendaItem(
+            type="event",
+            id=ev.id,
+            title=ev.title,
+            description=ev.description,
+            start_at=occ.start_at,
+            end_at=occ.end_at,
+            rrule=ev.rrule,
+            timezone=ev.timezone,
+            is_occurrence=bool(ev.rrule),
         )
 
-    # EVENTOS (puntuales + recurrentes)
+
+def _occurrence_items(
+    ev: models.Event, from_local: datetime, to_local: datetime, tzname: str
+) -> Iterator[schemas.AgendaItem]:
+    for occ_local, occ_end in iter_occurrences(
+        ev.start_at, ev.end_at, ev.rrule, ev.timezone or tzname, from_local, to_local
+    ):
+        yield schemas.AgendaItem(
+            type="event",
+            id=ev.id,
+            title=ev.title,
+            description=ev.description,
+            start_at=occ_local,
+            end_at=occ_end,
+            rrule=ev.rrule,
+            timezone=ev.timezone,
+            is_occurrence=True,  # <- clave
+        )
+
+
+def _pending_event_streams(
+    db: Session, user_id: int, from_local: datetime, to_local: datetime, tzname: str
+) -> list[Iterator[schemas.AgendaItem]]:
+    # EVENTOS sin materializar (o rango más allá del horizonte): expandir en Python
     events = (
         db.query(models.Event)
-        .filter(models.Event.user_id == current_user.id)
+        .filter(
+            models.Event.user_id == user_id,
+            or_(
+                models.Event.occurrences_until.is_(None),
+                models.Event.occurrences_until < to_local,
+            ),
+            # Poda por límites de la serie (filas antiguas sin series_start se incluyen)
+            or_(models.Event.series_start.is_(None), models.Event.series_start <= to_local),
+            or_(models.Event.series_end.is_(None), models.Event.series_end >= from_local),
+        )
         .order_by(models.Event.start_at.asc())
         .all()
     )
 
+    singles: list[schemas.AgendaItem] = []
+    streams: list[Iterator[schemas.AgendaItem]] = []
     for ev in events:
-        duration = ev.end_at - ev.start_at
-
         if not ev.rrule:
-            # Puntual: incluir si solapa rango
+            # Puntual: incluir si solapa rango (ya vienen ordenados por start_at)
             if ev.end_at >= from_local and ev.start_at <= to_local:
-                items.append(
+                singles.append(
                     schemas.AgendaItem(
                         type="event",
                         id=ev.id,
@@ -88,42 +150,114 @@ def get_agenda(
                 )
             continue
 
-        # Recurrente: expandir ocurrencias
-        ev_tz = ev.timezone or tzname
-        dtstart_aware = ev.start_at.replace(tzinfo=ZoneInfo(ev_tz))
-        rule = rrulestr(ev.rrule, dtstart=dtstart_aware)
+        # Recurrente: un flujo perezoso de ocurrencias por serie
+        streams.append(_occurrence_items(ev, from_local, to_local, tzname))
 
-        range_start_aware = from_local.replace(tzinfo=ZoneInfo(ev_tz))
-        range_end_aware = to_local.replace(tzinfo=ZoneInfo(ev_tz))
+    return [iter(singles)] + streams
 
-        occs = rule.between(range_start_aware, range_end_aware, inc=True)
 
-        for occ in occs:
-            occ_local = occ.astimezone(ZoneInfo(ev_tz)).replace(tzinfo=None)
-            occ_end = occ_local + duration
+def iter_agenda(
+    db: Session, user_id: int, from_local: datetime, to_local: datetime, tzname: str = "Europe/Madrid"
+) -> Iterator[schemas.AgendaItem]:
+    """
+    Agenda ordenada por fecha: mezcla k-way (heap) del flujo de tareas, el de
+    ocurrencias materializadas y uno por cada serie que se expande en Python.
+    """
+    streams = [
+        _task_items(db, user_id, from_local, to_local),
+        _materialized_event_items(db, user_id, from_local, to_local),
+        *_pending_event_streams(db, user_id, from_local, to_local, tzname),
+    ]
+    return heapq.merge(*streams, key=_sort_key)
 
-            if occ_end >= from_local and occ_local <= to_local:
-                items.append(
-                    schemas.AgendaItem(
-                        type="event",
-                        id=ev.id,
-                        title=ev.title,
-                        description=ev.description,
-                        start_at=occ_local,
-                        end_at=occ_end,
-                        rrule=ev.rrule,
-                        timezone=ev.timezone,
-                        is_occurrence=True,  # <- clave
-                    )
-                )
 
-    # Orden
-    def sort_key(x: schemas.AgendaItem):
-        if x.type == "event" and x.start_at:
-            return x.start_at
-        if x.type == "task" and x.date:
-            return x.date
-        return datetime.max
+def iter_busy(
+    db: Session, user_id: int, from_local: datetime, to_local: datetime, tzname: str = "Europe/Madrid"
+) -> Iterator[tuple[datetime, datetime]]:
+    """
+    Bloques ocupados fusionados dentro de [from_local, to_local]: las mismas
+    ocurrencias que la agenda (sin tareas), ya ordenadas por inicio, en un
+    barrido lineal.
+    """
+    events = heapq.merge(
+        _materialized_event_items(db, user_id, from_local, to_local),
+        *_pending_event_streams(db, user_id, from_local, to_local, tzname),
+        key=_sort_key,
+    )
+    return sweep(clip(((e.start_at, e.end_at) for e in events), from_local, to_local))
+
 
-    items.sort(key=sort_key)
-    return items
+@router.get("/", response_model=list[schemas.AgendaItem])
+def get_agenda(
+    from_dt: datetime = Query(..., alias="from"),
+    to_dt: datetime = Query(..., alias="to"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    tzname = "Europe/Madrid"
+    from_local = _to_local_naive(from_dt, tzname)
+    to_local = _to_local_naive(to_dt, tzname)
+    return list(iter_agenda(db, current_user.id, from_local, to_local, tzname))
+
+
+@router.get("/stream")
+def stream_agenda(
+    from_dt: datetime = Query(..., alias="from"),
+    to_dt: datetime = Query(..., alias="to"),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Misma agenda en NDJSON (un AgendaItem por línea), emitida según se produce.
+    """
+    tzname = "Europe/Madrid"
+    from_local = _to_local_naive(from_dt, tzname)
+    to_local = _to_local_naive(to_dt, tzname)
+    user_id = current_user.id
+
+    def body() -> Iterator[str]:
+        # Sesión propia: tiene que vivir mientras dure el streaming
+        db = SessionLocal()
+        try:
+            for item in iter_agenda(db, user_id, from_local, to_local, tzname):
+                yield item.model_dump_json() + "\n"
+        finally:
+            db.close()
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+
+@router.get("/freebusy", response_model=schemas.FreeBusyResponse)
+def get_freebusy(
+    from_dt: datetime = Query(..., alias="from"),
+    to_dt: datetime = Query(..., alias="to"),
+    slot_minutes: Optional[int] = Query(None, ge=5, le=1440),
+    include_free: bool = False,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Solo los intervalos ocupados (eventos y ocurrencias fusionados), sin el
+    detalle de cada AgendaItem. Con slot_minutes se redondean a franjas de
+    ese tamaño desde medianoche; con include_free se añaden los huecos.
+    """
+    tzname = "Europe/Madrid"
+    from_local = _to_local_naive(from_dt, tzname)
+    to_local = _to_local_naive(to_dt, tzname)
+
+    busy = iter_busy(db, current_user.id, from_local, to_local, tzname)
+    if slot_minutes:
+        busy = sweep(clip(snap(busy, timedelta(minutes=slot_minutes)), from_local, to_local))
+    busy = list(busy)
+
+    free = None
+    if include_free:
+        free = [schemas.TimeBlock(start_at=s, end_at=e) for s, e in complement(busy, from_local, to_local)]
+
+    return schemas.FreeBusyResponse(
+        from_at=from_local,
+        to_at=to_local,
+        timezone=tzname,
+        slot_minutes=slot_minutes,
+        busy=[schemas.TimeBlock(start_at=s, end_at=e) for s, e in busy],
+        free=free,
+    )
@@ -1,32 +1,74 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from ..database import get_db
 from .. import models, schemas
-from ..core.security import hash_password, verify_password, create_access_token
+from ..core import passwords
+from ..core.passwords import PasswordPoolBusy
+from ..core.security import create_access_token
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
-@router.post("/register", response_model=schemas.UserRead, status_code=status.HTTP_201_CREATED)
-def register(payload: schemas.UserRegister, db: Session = Depends(get_db)):
-    existing = db.query(models.User).filter(models.User.email == payload.email).first()
-    if existing:
-        raise HTTPException(status_code=409, detail="Email ya registrado")
+def _busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Demasiadas peticiones de autenticación, inténtalo en unos segundos",
+        headers={"Retry-After": "1"},
+    )
+
+
+# Handlers asíncronos: el hash se espera en el bucle de eventos sin ocupar un
+# hilo del threadpool; las consultas (síncronas) sí van al threadpool.
+
 
-    user = models.User(email=payload.email, hashed_password=hash_password(payload.password))
+def _find_user(db: Session, email: str) -> models.User | None:
+    return db.query(models.User).filter(models.User.email == email).first()
+
+
+def _create_user(db: Session, email: str, hashed: str) -> models.User:
+    user = models.User(email=email, hashed_password=hashed)
     db.add(user)
     db.commit()
     db.refresh(user)
     return user
 
 
+def _save_hash(db: Session, user: models.User, new_hash: str) -> None:
+    user.hashed_password = new_hash
+    db.commit()
+
+
+@router.post("/register", response_model=schemas.UserRead, status_code=status.HTTP_201_CREATED)
+async def register(payload: schemas.UserRegister, db: Session = Depends(get_db)):
+    if await run_in_threadpool(_find_user, db, payload.email):
+        raise HTTPException(status_code=409, detail="Email ya registrado")
+
+    try:
+        hashed = await passwords.hash_password(payload.password)
+    except PasswordPoolBusy:
+        raise _busy()
+
+    return await run_in_threadpool(_create_user, db, payload.email, hashed)
+
+
 @router.post("/token", response_model=schemas.Token)
-def token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    user = await run_in_threadpool(_find_user, db, form_data.username)
+    if not user:
         raise HTTPException(status_code=401, detail="Credenciales inválidas")
+    try:
+        valid, new_hash = await passwords.verify_and_update(form_data.password, user.hashed_password)
+    except PasswordPoolBusy:
+        raise _busy()
+    if not valid:
+        raise HTTPException(status_code=401, detail="Credenciales inválidas")
+
+    if new_hash:
+        # Parámetros de hash cambiados (p. ej. PBKDF2_ROUNDS): se regenera ahora que tenemos la contraseña
+        await run_in_threadpool(_save_hash, db, user, new_hash)
 
-    access_token = create_access_token(subject=user.email)
+    access_token = create_access_token(subject=user.email, user_id=user.id)
     return schemas.Token(access_token=access_token, token_type="bearer")
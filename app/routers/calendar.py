@@ -0,0 +1,126 @@
+from fastapi import APIRouter, Depends, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterator
+import hashlib
+
+from .. import models, schemas
+from ..core.security import create_feed_token
+from ..database import get_db, SessionLocal
+from ..deps import get_current_user, get_feed_user
+from ..ical import iter_calendar
+
+router = APIRouter(prefix="/calendar", tags=["calendar"])
+
+STREAM_BATCH_SIZE = 500
+ICS_MEDIA_TYPE = "text/calendar; charset=utf-8"
+
+
+def _feed_version(db: Session, user_id: int) -> tuple[str, datetime | None]:
+    """
+    ETag y Last-Modified a partir del contador de cambios del usuario, que
+    incrementa app.feed.touch_feed en cada alta, baja o cambio de fecha.
+    Se lee de la base y no de current_user, que puede venir de la caché.
+    """
+    version, updated_at = (
+        db.query(models.User.feed_version, models.User.feed_updated_at)
+        .filter(models.User.id == user_id)
+        .one()
+    )
+    etag = '"' + hashlib.sha1(f"{user_id}:{version}".encode()).hexdigest() + '"'
+    last_modified = updated_at.replace(microsecond=0) if updated_at is not None else None
+    return etag, last_modified
+
+
+def _not_modified(request: Request, etag: str, last_modified: datetime | None) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+        return etag in tags or "*" in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).astimezone(timezone.utc).replace(tzinfo=None)
+        except (TypeError, ValueError):
+            return False
+        return last_modified <= since
+    return False
+
+
+@router.get("/feed.ics")
+def calendar_feed(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_feed_user),
+):
+    """
+    Feed iCalendar para suscribirse desde otros clientes: VEVENT por evento
+    (con su RRULE sin expandir) y VTODO por tarea con fecha.
+    Acepta el token de POST /calendar/feed-token como ?token=... además de
+    Authorization.
+    """
+    etag, last_modified = _feed_version(db, current_user.id)
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=300"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.replace(tzinfo=timezone.utc), usegmt=True)
+
+    if _not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    user_id = current_user.id
+
+    def body() -> Iterator[str]:
+        # Sesión propia: tiene que vivir mientras dure el streaming
+        stream_db = SessionLocal()
+        try:
+            events = (
+                stream_db.query(models.Event)
+                .filter(models.Event.user_id == user_id)
+                .order_by(models.Event.start_at.asc())
+                .yield_per(STREAM_BATCH_SIZE)
+            )
+            tasks = (
+                stream_db.query(models.Task)
+                .filter(models.Task.user_id == user_id, models.Task.date.isnot(None))
+                .order_by(models.Task.date.asc())
+                .yield_per(STREAM_BATCH_SIZE)
+            )
+            yield from iter_calendar(events, tasks)
+        finally:
+            stream_db.close()
+
+    return StreamingResponse(body(), media_type=ICS_MEDIA_TYPE, headers=headers)
+
+
+@router.post("/feed-token", response_model=schemas.FeedToken, status_code=status.HTTP_201_CREATED)
+def issue_feed_token(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Token propio para la URL de suscripción. Solo sirve para leer el feed y
+    sustituye al anterior, que deja de funcionar. Se muestra una sola vez.
+    """
+    token, token_hash = create_feed_token()
+    db.query(models.User).filter(models.User.id == current_user.id).update(
+        {models.User.feed_token_hash: token_hash}, synchronize_session=False
+    )
+    db.commit()
+    url = request.url_for("calendar_feed").include_query_params(token=token)
+    return schemas.FeedToken(token=token, url=str(url))
+
+
+@router.delete("/feed-token", status_code=status.HTTP_204_NO_CONTENT)
+def revoke_feed_token(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    db.query(models.User).filter(models.User.id == current_user.id).update(
+        {models.User.feed_token_hash: None}, synchronize_session=False
+    )
+    db.commit()
+    return None
@@ -1,16 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Literal, Optional
 from datetime import datetime, timedelta
-from zoneinfo import ZoneInfo
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 import re
-from dateutil.rrule import rrulestr
 
 from ..database import get_db
 from ..deps import get_current_user
+from ..pagination import MAX_PAGE_SIZE, keyset_page
 from .. import models, schemas
 from ..ai_events import parse_text_to_event
-from .notes import parse_when_to_datetime, normalize_time_text
+from ..local_parser import parse_event_locally
+from ..occurrences import delete_event_occurrences, inline_horizon_end, materialize_event
+from ..conflicts import conflict_index, find_conflicts
+from ..feed import touch_feed
+from ..recurrence import get_rule, series_bounds
+from ..dates_es import parse_when_to_datetime, normalize_time_text
 
 router = APIRouter(prefix="/events", tags=["events"])
 
@@ -25,9 +30,50 @@ def _weekday_rrule_guard(rrule: str) -> str:
     return re.sub(r"\s+", "", rrule.strip())
 
 
-@router.post("/", response_model=schemas.EventRead, status_code=status.HTTP_201_CREATED)
+def _apply_series_bounds(ev: models.Event) -> None:
+    try:
+        ev.series_start, ev.series_end = series_bounds(ev.start_at, ev.end_at, ev.rrule, ev.timezone)
+    except ZoneInfoNotFoundError:
+        raise HTTPException(status_code=422, detail=f"Zona horaria desconocida: {ev.timezone}")
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"rrule inválida: {e}")
+
+
+ConflictMode = Literal["ignore", "warn", "reject"]
+
+
+def _save_event(db: Session, ev: models.Event, user_id: int, mode: ConflictMode) -> schemas.EventCreated:
+    """Comprueba solapes según `mode`, guarda y materializa el evento."""
+    _apply_series_bounds(ev)
+
+    conflicts: list[schemas.EventConflict] = []
+    if mode != "ignore":
+        conflicts = find_conflicts(db, user_id, ev)
+        if conflicts and mode == "reject":
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail={
+                    "message": "El evento se solapa con otros",
+                    "conflicts": [c.model_dump(mode="json") for c in conflicts],
+                },
+            )
+
+    db.add(ev)
+    db.flush()
+    # Solo el primer tramo: el worker completa el horizonte en su siguiente pasada
+    materialize_event(db, ev, inline_horizon_end())
+    touch_feed(db, user_id)
+    db.commit()
+    db.refresh(ev)
+
+    conflict_index.note_created(user_id, ev)
+    return schemas.EventCreated(**schemas.EventRead.model_validate(ev).model_dump(), conflicts=conflicts)
+
+
+@router.post("/", response_model=schemas.EventCreated, status_code=status.HTTP_201_CREATED)
 def create_event(
     payload: schemas.EventCreate,
+    conflicts: ConflictMode = Query("warn", description="ignore | warn (se devuelven) | reject (409)"),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
@@ -43,15 +89,13 @@ def create_event(
         rrule=payload.rrule,
         timezone=payload.timezone or "Europe/Madrid",
     )
-    db.add(ev)
-    db.commit()
-    db.refresh(ev)
-    return ev
+    return _save_event(db, ev, current_user.id, conflicts)
 
 
-@router.post("/from-text", response_model=schemas.EventRead, status_code=status.HTTP_201_CREATED)
+@router.post("/from-text", response_model=schemas.EventCreated, status_code=status.HTTP_201_CREATED)
 def create_event_from_text(
     text: str = Body(...),
+    conflicts: ConflictMode = Query("warn", description="ignore | warn (se devuelven) | reject (409)"),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
@@ -59,7 +103,8 @@ def create_event_from_text(
     now = datetime.now(ZoneInfo(tzname))
     now_iso = now.isoformat()
 
-    parsed = parse_text_to_event(texto=text, now_iso=now_iso, timezone=tzname)
+    # Vía rápida local; solo se llama al LLM si no hay confianza suficiente
+    parsed = parse_event_locally(text, tzname) or parse_text_to_event(texto=text, now_iso=now_iso, timezone=tzname)
 
     start_time = normalize_time_text(parsed.get("start_time"))
     end_time = normalize_time_text(parsed.get("end_time"))
@@ -109,7 +154,7 @@ def create_event_from_text(
             candidate = candidate + timedelta(days=1)
 
         dtstart_aware = candidate.replace(tzinfo=ZoneInfo(ev_tz))
-        rule = rrulestr(rrule, dtstart=dtstart_aware)
+        rule = get_rule(rrule, candidate, ev_tz)
         occ = rule.after(dtstart_aware - timedelta(seconds=1), inc=True)
         if occ is None:
             raise HTTPException(status_code=422, detail="No pude generar la primera ocurrencia de la recurrencia.")
@@ -132,23 +177,26 @@ def create_event_from_text(
         rrule=rrule,
         timezone=tzname,
     )
-    db.add(ev)
-    db.commit()
-    db.refresh(ev)
-    return ev
+    return _save_event(db, ev, current_user.id, conflicts)
 
 
 
 @router.get("/", response_model=List[schemas.EventRead])
 def list_events(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    return (
-        db.query(models.Event)
-        .filter(models.Event.user_id == current_user.id)
-        .order_by(models.Event.start_at.desc())
-        .all()
+    return keyset_page(
+        db.query(models.Event).filter(models.Event.user_id == current_user.id),
+        models.Event.start_at,
+        models.Event.id,
+        response,
+        limit,
+        cursor,
+        descending=True,
     )
 
 
@@ -182,6 +230,8 @@ def delete_event(
     if not ev:
         raise HTTPException(status_code=404, detail="Evento no encontrado")
 
+    delete_event_occurrences(db, ev.id)
     db.delete(ev)
+    touch_feed(db, current_user.id)
     db.commit()
     return None
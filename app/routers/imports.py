@@ -0,0 +1,199 @@
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from sqlalchemy.orm import Session
+from pydantic import ValidationError
+from typing import Any, Dict, Iterable, Iterator, Literal, Optional, Tuple
+import csv
+import io
+import json
+from zoneinfo import ZoneInfoNotFoundError
+
+from .. import models, schemas
+from ..bulk import insert_chunked
+from ..database import get_db
+from ..feed import touch_feed
+from ..deps import get_current_user
+from ..ical import iter_vevents
+from ..recurrence import series_bounds
+from ..reminder_dispatch import first_fire_at
+
+router = APIRouter(prefix="/import", tags=["import"])
+
+CHUNK_SIZE = 1000
+# Tope de errores que se devuelven (el contador `failed` sigue siendo exacto)
+MAX_REPORTED_ERRORS = 1000
+
+_SCHEMAS = {
+    "tasks": schemas.TaskCreate,
+    "events": schemas.EventCreate,
+    "reminders": schemas.ReminderCreate,
+}
+_MODELS = {
+    "tasks": models.Task,
+    "events": models.Event,
+    "reminders": models.Reminder,
+}
+
+
+def _read_records(upload: UploadFile, fmt: str) -> Iterator[Tuple[int, Any]]:
+    """(línea, registro crudo) leyendo el fichero en streaming."""
+    text = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            reader = csv.DictReader(text)
+            for record in reader:
+                # Celdas vacías -> None para que apliquen los valores por defecto
+                yield reader.line_num, {k: (v if v != "" else None) for k, v in record.items() if k}
+        else:
+            for line_no, line in enumerate(text, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_no, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_no, e
+    finally:
+        text.detach()
+
+
+def _to_row(kind: str, user_id: int, payload) -> Dict[str, Any]:
+    if kind == "tasks":
+        return {
+            "user_id": user_id,
+            "title": payload.title,
+            "description": payload.description,
+            "date": payload.date,
+            "channel": payload.channel,
+            "day_part": payload.day_part,
+        }
+
+    if kind == "events":
+        if payload.end_at <= payload.start_at:
+            raise ValueError("end_at debe ser posterior a start_at")
+        tzname = payload.timezone or "Europe/Madrid"
+        try:
+            series_start, series_end = series_bounds(payload.start_at, payload.end_at, payload.rrule, tzname)
+        except ZoneInfoNotFoundError:
+            raise ValueError(f"Zona horaria desconocida: {tzname}")
+        # occurrences_until queda a None: el worker de ocurrencias las materializa
+        return {
+            "user_id": user_id,
+            "title": payload.title,
+            "description": payload.description,
+            "start_at": payload.start_at,
+            "end_at": payload.end_at,
+            "rrule": payload.rrule,
+            "timezone": tzname,
+            "series_start": series_start,
+            "series_end": series_end,
+        }
+
+    return {
+        "user_id": user_id,
+        "task_id": payload.task_id,
+        "title": payload.title,
+        "description": payload.description,
+        "deadline": payload.deadline,
+        "remind_at": payload.remind_at,
+        "frequency": payload.frequency or "once",
+        "rrule": payload.rrule,
+        "next_fire_at": first_fire_at(payload.remind_at, payload.frequency, payload.rrule),
+    }
+
+
+def _run_import(db: Session, kind: str, user_id: int, records: Iterable[Tuple[int, Any]]) -> schemas.ImportResult:
+    """Valida y guarda por tramos (línea, registro crudo); las filas inválidas se reportan."""
+    schema = _SCHEMAS[kind]
+    received = 0
+    errors: list[tuple[int, str]] = []
+    failed = 0
+
+    def rejected(line: int, error: str) -> None:
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append((line, error))
+
+    def valid_rows() -> Iterator[Tuple[int, Dict[str, Any]]]:
+        nonlocal received
+        for line, record in records:
+            received += 1
+            if isinstance(record, json.JSONDecodeError):
+                rejected(line, f"JSON inválido: {record}")
+                continue
+            if isinstance(record, Exception):
+                rejected(line, str(record))
+                continue
+            if not isinstance(record, dict):
+                rejected(line, "Se esperaba un objeto")
+                continue
+            try:
+                payload = schema.model_validate(record)
+                yield line, _to_row(kind, user_id, payload)
+            except ValidationError as e:
+                rejected(line, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+            except ValueError as e:
+                rejected(line, str(e))
+
+    try:
+        imported, db_errors = insert_chunked(db, _MODELS[kind], valid_rows(), CHUNK_SIZE)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="El fichero debe estar en UTF-8")
+
+    if imported and kind != "reminders":
+        touch_feed(db, user_id)
+        db.commit()
+
+    for line, error in db_errors:
+        rejected(line, error)
+    errors.sort()
+
+    return schemas.ImportResult(
+        kind=kind,
+        received=received,
+        imported=imported,
+        failed=failed,
+        errors=[schemas.ImportRowError(line=line, error=error) for line, error in errors],
+        errors_truncated=failed > len(errors),
+    )
+
+
+def _read_ics(upload: UploadFile) -> Iterator[Tuple[int, Any]]:
+    text = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+    try:
+        yield from iter_vevents(text)
+    finally:
+        text.detach()
+
+
+@router.post("/ics", response_model=schemas.ImportResult)
+def import_ics(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Importa los VEVENT de un .ics (p. ej. la exportación de otro calendario).
+    Cada serie recurrente queda como un solo evento con su RRULE y TZID; las
+    ocurrencias las materializa después el worker.
+    """
+    return _run_import(db, "events", current_user.id, _read_ics(file))
+
+
+@router.post("/{kind}", response_model=schemas.ImportResult)
+def import_rows(
+    kind: Literal["tasks", "events", "reminders"],
+    file: UploadFile = File(...),
+    format: Optional[Literal["ndjson", "csv"]] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Importación masiva desde NDJSON (un objeto por línea) o CSV con cabecera.
+    Las filas inválidas se reportan sin abortar el resto.
+    """
+    fmt = format
+    if fmt is None:
+        name = (file.filename or "").lower()
+        fmt = "csv" if name.endswith(".csv") or file.content_type == "text/csv" else "ndjson"
+
+    return _run_import(db, kind, current_user.id, _read_records(file, fmt))
@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, Body, status
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, Response, status
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 from zoneinfo import ZoneInfo
 import uuid
@@ -8,13 +8,13 @@ import uuid
 from .. import models, schemas
 from ..database import get_db
 from ..deps import get_current_user
+from ..pagination import MAX_PAGE_SIZE, keyset_page
 from ..ai_reminders import analyze_reminder_intent, generate_reminder_question
+from ..conversations import conversation_store
+from .. import reminder_dispatch
 
 router = APIRouter(prefix="/reminders", tags=["reminders"])
 
-# Simu-DB in memory for conversation state (in production use Redis)
-CONVERSATIONS: Dict[str, Dict[str, Any]] = {}
-
 @router.post("/analyze", response_model=Dict[str, Any])
 def analyze_intent(
     req: schemas.ReminderAnalyzeRequest,
@@ -48,18 +48,18 @@ def start_conversation(
 
     ai_resp = generate_reminder_question(history, context, now_iso, tzname, user_name)
     
+    # Update context with any extracted data if AI did it
+    if "extracted_data_update" in ai_resp:
+        context.update(ai_resp["extracted_data_update"])
+
     # Save state
-    CONVERSATIONS[conv_id] = {
+    conversation_store.put(conv_id, {
         "user_id": current_user.id,
         "user_name": user_name, # Save for later turns
         "history": history,
         "context": context,
         "step": ai_resp.get("next_step", "initial")
-    }
-    
-    # Update context with any extracted data if AI did it
-    if "extracted_data_update" in ai_resp:
-        context.update(ai_resp["extracted_data_update"])
+    })
 
     replies = []
     for qr in ai_resp.get("quick_replies", []):
@@ -79,10 +79,10 @@ def respond(
     req: schemas.ConversationReplyRequest,
     current_user: models.User = Depends(get_current_user),
 ):
-    if conv_id not in CONVERSATIONS:
+    state = conversation_store.get(conv_id)
+    if state is None:
         raise HTTPException(status_code=404, detail="Conversación no encontrada")
-    
-    state = CONVERSATIONS[conv_id]
+
     if state["user_id"] != current_user.id:
         raise HTTPException(status_code=403, detail="No autorizado")
 
@@ -113,6 +113,8 @@ def respond(
     if "extracted_data_update" in ai_resp:
         context.update(ai_resp["extracted_data_update"])
 
+    conversation_store.put(conv_id, state)
+
     replies = []
     for qr in ai_resp.get("quick_replies", []):
         replies.append(schemas.QuickReply(**qr))
@@ -140,20 +142,27 @@ def create_reminder(
         remind_at=payload.remind_at,
         frequency=payload.frequency or "once",
         rrule=payload.rrule,
+        next_fire_at=reminder_dispatch.first_fire_at(payload.remind_at, payload.frequency, payload.rrule),
     )
     db.add(rem)
     db.commit()
     db.refresh(rem)
+    reminder_dispatch.notify(rem.next_fire_at)
     return rem
 
 @router.get("/", response_model=List[schemas.ReminderRead])
 def list_reminders(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    return (
-        db.query(models.Reminder)
-        .filter(models.Reminder.user_id == current_user.id)
-        .order_by(models.Reminder.remind_at.asc())
-        .all()
+    return keyset_page(
+        db.query(models.Reminder).filter(models.Reminder.user_id == current_user.id),
+        models.Reminder.remind_at,
+        models.Reminder.id,
+        response,
+        limit,
+        cursor,
     )
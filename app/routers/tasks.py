@@ -1,14 +1,22 @@
-from fastapi import APIRouter, Depends, Body
+from fastapi import APIRouter, Depends, Body, HTTPException, Query, Response
+from sqlalchemy import bindparam, update
 from sqlalchemy.orm import Session
-from typing import List
-from datetime import datetime
+from typing import List, Optional
+from datetime import datetime, time, timedelta
 from zoneinfo import ZoneInfo
+import heapq
 
 from .. import models, schemas
 from ..database import get_db
 from ..deps import get_current_user
+from ..pagination import MAX_PAGE_SIZE, keyset_page
 from ..ai import parse_note_to_tasks
-from .notes import build_when_text, parse_when_to_datetime
+from ..local_parser import parse_note_locally
+from ..bulk import persist_parsed_tasks
+from ..feed import touch_feed
+from ..intervals import complement, snap, sweep
+from ..scheduling import ALL_DAYS, WEEKDAYS, plan
+from .agenda import iter_busy
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
@@ -25,8 +33,11 @@ def create_task(
         description=task_in.description,
         date=task_in.date,
         channel=task_in.channel,
+        day_part=task_in.day_part,
     )
     db.add(db_task)
+    if db_task.date is not None:
+        touch_feed(db, current_user.id)
     db.commit()
     db.refresh(db_task)
     return db_task
@@ -34,14 +45,20 @@ def create_task(
 
 @router.get("/", response_model=List[schemas.TaskRead])
 def list_tasks(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    return (
-        db.query(models.Task)
-        .filter(models.Task.user_id == current_user.id)
-        .order_by(models.Task.created_at.desc())
-        .all()
+    return keyset_page(
+        db.query(models.Task).filter(models.Task.user_id == current_user.id),
+        models.Task.created_at,
+        models.Task.id,
+        response,
+        limit,
+        cursor,
+        descending=True,
     )
 
 
@@ -55,29 +72,104 @@ def create_tasks_from_text(
     now = datetime.now(ZoneInfo(tzname))
     now_iso = now.isoformat()
 
-    tasks_data = parse_note_to_tasks(texto=text, now_iso=now_iso, timezone=tzname)
-
-    created_tasks = []
-    for t in tasks_data:
-        when_text = build_when_text(t.get("date_text"), t.get("time_text"), t.get("day_part"))
-        dt = parse_when_to_datetime(
-            when_text=when_text,
-            now=now,
-            tzname=tzname,
-            date_text=t.get("date_text"),
-            time_text=t.get("time_text"),
+    # Vía rápida local; solo se llama al LLM si no hay confianza suficiente
+    tasks_data = parse_note_locally(text) or parse_note_to_tasks(texto=text, now_iso=now_iso, timezone=tzname)
+
+    created_tasks = persist_parsed_tasks(db, current_user.id, tasks_data, now, tzname)
+
+    return {"message": "Tareas creadas desde texto", "count": len(created_tasks), "tasks": created_tasks}
+
+
+SCHEDULE_GRID = timedelta(minutes=5)
+
+_T = models.Task.__table__
+_assign_date_stmt = (
+    update(_T)
+    .where(_T.c.id == bindparam("b_id"), _T.c.date.is_(None))
+    .values(date=bindparam("b_date"))
+)
+
+
+@router.post("/schedule", response_model=schemas.ScheduleResult)
+def schedule_tasks(
+    minutes: int = Query(30, ge=5, le=480),
+    days: int = Query(14, ge=1, le=366),
+    work_start: time = Query(time(9, 0)),
+    work_end: time = Query(time(18, 0)),
+    include_weekends: bool = False,
+    dry_run: bool = False,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Da fecha a las tareas pendientes sin fecha colocándolas en los huecos
+    libres de los próximos `days` días (eventos, ocurrencias y tareas ya
+    fechadas cuentan como ocupado). Con dry_run solo devuelve el plan.
+    """
+    if work_start >= work_end:
+        raise HTTPException(status_code=400, detail="work_start debe ser anterior a work_end")
+
+    tzname = "Europe/Madrid"
+    duration = timedelta(minutes=minutes)
+    now = datetime.now(ZoneInfo(tzname)).replace(tzinfo=None, second=0, microsecond=0)
+    # Se empieza en la siguiente franja de la rejilla
+    from_local = next(snap([(now, now)], SCHEDULE_GRID))[1]
+    to_local = from_local + timedelta(days=days)
+
+    pending = (
+        db.query(models.Task.id, models.Task.title, models.Task.day_part)
+        .filter(
+            models.Task.user_id == current_user.id,
+            models.Task.status == "pending",
+            models.Task.date.is_(None),
         )
+        .order_by(models.Task.created_at.asc(), models.Task.id.asc())
+        .all()
+    )
 
-        nueva = models.Task(
-            user_id=current_user.id,
-            title=t["title"],
-            description=t["description"],
-            date=dt,
-            channel=t.get("channel"),
+    # Las tareas ya fechadas ocupan lo mismo que las que vamos a colocar
+    dated = (
+        (d, d + duration)
+        for (d,) in db.query(models.Task.date)
+        .filter(
+            models.Task.user_id == current_user.id,
+            models.Task.status == "pending",
+            models.Task.date.isnot(None),
+            models.Task.date > from_local - duration,
+            models.Task.date < to_local,
         )
-        db.add(nueva)
-        db.commit()
-        db.refresh(nueva)
-        created_tasks.append(nueva)
+        .order_by(models.Task.date.asc())
+    )
+    busy = sweep(snap(heapq.merge(iter_busy(db, current_user.id, from_local, to_local, tzname), dated), SCHEDULE_GRID))
+    free = complement(busy, from_local, to_local)
 
-    return {"message": "Tareas creadas desde texto", "count": len(created_tasks), "tasks": created_tasks}
+    placed, unscheduled = plan(
+        [(t.id, t.day_part) for t in pending],
+        free,
+        from_local,
+        to_local,
+        duration,
+        work_hours=(work_start, work_end),
+        days_allowed=ALL_DAYS if include_weekends else WEEKDAYS,
+    )
+
+    if placed and not dry_run:
+        try:
+            db.execute(_assign_date_stmt, [{"b_id": task_id, "b_date": start} for task_id, start, _ in placed])
+            touch_feed(db, current_user.id)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+    titles = {t.id: t.title for t in pending}
+    return schemas.ScheduleResult(
+        dry_run=dry_run,
+        from_at=from_local,
+        to_at=to_local,
+        scheduled=[
+            schemas.TaskPlacement(task_id=task_id, title=titles[task_id], start_at=start, end_at=end)
+            for task_id, start, end in placed
+        ],
+        unscheduled=unscheduled,
+    )
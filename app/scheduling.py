@@ -0,0 +1,102 @@
+"""
+Autoagendado de tareas sin fecha en los huecos libres de la agenda.
+
+Empaquetado voraz: cada tarea ocupa `duration` en el primer hueco libre que
+cabe dentro de su ventana (la franja `day_part` si la tiene, si no el horario
+laboral). Primero se colocan las tareas con franja, que son las más
+restringidas, y dentro de cada grupo por antigüedad.
+
+Los huecos se reparten por día. Como todas las tareas duran lo mismo y
+siempre se elige el primer hueco que cabe, un día en el que no cupo una
+tarea de cierta ventana tampoco cabrá más adelante (los huecos solo
+encogen): cada ventana guarda un cursor de día que nunca retrocede y el
+coste total es O(días × huecos por día + tareas).
+"""
+from datetime import datetime, time, timedelta
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from .intervals import Interval
+
+DAY_PART_HOURS: Dict[str, Tuple[time, time]] = {
+    "morning": (time(8, 0), time(12, 0)),
+    "noon": (time(12, 0), time(15, 0)),
+    "afternoon": (time(15, 0), time(20, 0)),
+    "night": (time(20, 0), time(23, 0)),
+}
+WEEKDAYS: FrozenSet[int] = frozenset(range(5))
+ALL_DAYS: FrozenSet[int] = frozenset(range(7))
+
+Placement = Tuple[int, datetime, datetime]
+
+
+def _free_by_day(free: Iterable[Interval], first_day: datetime, n_days: int) -> List[List[Interval]]:
+    """Parte los huecos (ordenados) por medianoche y los agrupa por día."""
+    days: List[List[Interval]] = [[] for _ in range(n_days)]
+    for start, end in free:
+        while start < end:
+            day = datetime(start.year, start.month, start.day)
+            idx = (day - first_day).days
+            next_day = day + timedelta(days=1)
+            if 0 <= idx < n_days:
+                days[idx].append((start, min(end, next_day)))
+            start = next_day
+    return days
+
+
+def plan(
+    tasks: Sequence[Tuple[int, Optional[str]]],
+    free: Iterable[Interval],
+    lo: datetime,
+    hi: datetime,
+    duration: timedelta,
+    work_hours: Tuple[time, time] = (time(9, 0), time(18, 0)),
+    days_allowed: FrozenSet[int] = WEEKDAYS,
+) -> Tuple[List[Placement], List[int]]:
+    """
+    Reparte `tasks` [(id, day_part)] ya ordenadas por antigüedad en los huecos
+    `free` (ordenados, dentro de [lo, hi)). No toca la base de datos.
+    Devuelve ([(id, inicio, fin)], [ids que no cupieron]).
+    """
+    first_day = datetime(lo.year, lo.month, lo.day)
+    n_days = (hi - first_day).days + 1
+    days = _free_by_day(free, first_day, n_days)
+
+    # sorted es estable: las tareas con franja van primero sin perder la antigüedad
+    ordered = sorted(tasks, key=lambda t: t[1] not in DAY_PART_HOURS)
+    cursors: Dict[str, int] = {}
+    placed: List[Placement] = []
+    unscheduled: List[int] = []
+
+    for task_id, day_part in ordered:
+        window = day_part if day_part in DAY_PART_HOURS else "work"
+        w_start, w_end = DAY_PART_HOURS.get(window, work_hours)
+        d = cursors.get(window, 0)
+        slot = None
+        while d < n_days:
+            day = first_day + timedelta(days=d)
+            if day.weekday() in days_allowed and days[d]:
+                lo_w = datetime.combine(day.date(), w_start)
+                hi_w = datetime.combine(day.date(), w_end)
+                segments = days[d]
+                for i, (start, end) in enumerate(segments):
+                    if start >= hi_w:
+                        break
+                    begin = max(start, lo_w)
+                    if begin + duration <= min(end, hi_w):
+                        slot = begin
+                        # Lo que queda del hueco a cada lado de la tarea
+                        segments[i:i + 1] = [
+                            s for s in ((start, begin), (begin + duration, end)) if s[1] > s[0]
+                        ]
+                        break
+                if slot is not None:
+                    break
+            d += 1
+        cursors[window] = d
+        if slot is None:
+            unscheduled.append(task_id)
+        else:
+            placed.append((task_id, slot, slot + duration))
+
+    placed.sort(key=lambda p: p[1])
+    return placed, unscheduled
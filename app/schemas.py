@@ -9,6 +9,11 @@ class Token(BaseModel):
     token_type: str = "bearer"
 
 
+class FeedToken(BaseModel):
+    token: str
+    url: str
+
+
 class UserRegister(BaseModel):
     email: EmailStr
     password: str
@@ -23,11 +28,15 @@ class UserRead(BaseModel):
         from_attributes = True
 
 
+DayPart = Literal["morning", "noon", "afternoon", "night"]
+
+
 class TaskBase(BaseModel):
     title: str
     description: Optional[str] = None
     date: Optional[datetime] = None
     channel: Optional[str] = None
+    day_part: Optional[DayPart] = None
 
 
 class TaskCreate(TaskBase):
@@ -69,6 +78,18 @@ class EventRead(BaseModel):
         from_attributes = True
 
 
+class EventConflict(BaseModel):
+    event_id: int
+    title: str
+    start_at: datetime
+    end_at: datetime
+
+
+class EventCreated(EventRead):
+    # Ocurrencias existentes que se solapan con el evento creado
+    conflicts: List[EventConflict] = []
+
+
 class ReminderCreate(BaseModel):
     title: str
     description: Optional[str] = None
@@ -144,3 +165,46 @@ class AgendaItem(BaseModel):
     rrule: Optional[str] = None
     timezone: Optional[str] = None
     is_occurrence: bool = False
+
+
+class TimeBlock(BaseModel):
+    start_at: datetime
+    end_at: datetime
+
+
+class FreeBusyResponse(BaseModel):
+    from_at: datetime
+    to_at: datetime
+    timezone: str
+    slot_minutes: Optional[int] = None
+    busy: List[TimeBlock] = []
+    free: Optional[List[TimeBlock]] = None
+
+
+class TaskPlacement(BaseModel):
+    task_id: int
+    title: str
+    start_at: datetime
+    end_at: datetime
+
+
+class ScheduleResult(BaseModel):
+    dry_run: bool
+    from_at: datetime
+    to_at: datetime
+    scheduled: List[TaskPlacement] = []
+    unscheduled: List[int] = []
+
+
+class ImportRowError(BaseModel):
+    line: int
+    error: str
+
+
+class ImportResult(BaseModel):
+    kind: str
+    received: int
+    imported: int
+    failed: int
+    errors: List[ImportRowError] = []
+    errors_truncated: bool = False
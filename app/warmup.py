@@ -0,0 +1,122 @@
+"""
+Calentamiento opcional del worker al arrancar (WARMUP=1).
+
+Sin él la primera petición de cada worker paga lo que se carga al usarlo por
+primera vez: conexiones del pool, datos de idioma de dateparser, zona
+horaria, numpy/dateutil para las recurrencias, el cliente del LLM y los
+procesos del pool de contraseñas. Se hace en un hilo para no retrasar el
+arranque; mientras tanto GET /ready responde 503 y el balanceador no manda
+tráfico. Un paso que falla se registra y no bloquea la disponibilidad.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import text
+
+from .database import engine
+
+WARMUP = os.getenv("WARMUP", "0") == "1"
+# Conexiones que se abren por adelantado (como mucho el tamaño del pool)
+WARMUP_CONNECTIONS = int(os.getenv("WARMUP_CONNECTIONS", "5"))
+
+_ready = threading.Event()
+_lock = threading.Lock()
+_thread: threading.Thread | None = None
+_steps: Dict[str, Dict[str, object]] = {}
+
+
+def _warm_pool() -> None:
+    size = getattr(engine.pool, "size", lambda: WARMUP_CONNECTIONS)()
+    conns = []
+    try:
+        # Se retienen a la vez para que el pool abra conexiones distintas
+        for _ in range(max(1, min(WARMUP_CONNECTIONS, size))):
+            conn = engine.connect()
+            conns.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in conns:
+            conn.close()
+
+
+def _warm_dates() -> None:
+    from .dates_es import _dateparser_parse, parse_when_to_datetime
+    from .recurrence import DEFAULT_TZ
+
+    now = datetime.now(ZoneInfo(DEFAULT_TZ))
+    for when_text in ("mañana a las 10:00", "hoy a las 23:59", "el lunes", "el 20 de enero"):
+        parse_when_to_datetime(when_text, now, DEFAULT_TZ)
+    # Carga del idioma español de dateparser (lo más caro de la primera llamada)
+    _dateparser_parse("dentro de 2 semanas", now, DEFAULT_TZ)
+
+
+def _warm_recurrence() -> None:
+    from .recurrence import DEFAULT_TZ, expand_occurrences, next_occurrence_after
+
+    start = datetime.now(ZoneInfo(DEFAULT_TZ)).replace(tzinfo=None, minute=0, second=0, microsecond=0)
+    end = start + timedelta(days=60)
+    # Vía vectorizada (numpy) y vía dateutil
+    expand_occurrences(start, start + timedelta(hours=1), "FREQ=WEEKLY;BYDAY=MO,WE", DEFAULT_TZ, start, end)
+    expand_occurrences(start, start + timedelta(hours=1), "FREQ=MONTHLY;BYDAY=1MO", DEFAULT_TZ, start, end)
+    next_occurrence_after(start, "FREQ=MONTHLY;BYMONTHDAY=15", DEFAULT_TZ, start)
+
+
+def _warm_llm() -> None:
+    from .llm import get_client
+
+    # Sin OPENAI_API_KEY no hay cliente que preparar
+    get_client()
+
+
+def _warm_passwords() -> None:
+    from .core.passwords import warm
+
+    warm()
+
+
+STEPS: List[Tuple[str, Callable[[], None]]] = [
+    ("db_pool", _warm_pool),
+    ("dates", _warm_dates),
+    ("recurrence", _warm_recurrence),
+    ("llm_client", _warm_llm),
+    ("password_pool", _warm_passwords),
+]
+
+
+def run() -> None:
+    """Ejecuta todos los pasos en orden y marca el worker como listo."""
+    for name, step in STEPS:
+        t0 = time.perf_counter()
+        error = None
+        try:
+            step()
+        except Exception as e:
+            error = str(e)
+            print(f"Error calentando {name}: {e}")
+        with _lock:
+            _steps[name] = {"ms": round((time.perf_counter() - t0) * 1000, 1), "error": error}
+    _ready.set()
+
+
+def start() -> None:
+    global _thread
+    if not WARMUP:
+        _ready.set()
+        return
+    if _thread is None or not _thread.is_alive():
+        _ready.clear()
+        _thread = threading.Thread(target=run, name="warmup", daemon=True)
+        _thread.start()
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+
+def stats() -> dict:
+    with _lock:
+        return {"enabled": WARMUP, "ready": _ready.is_set(), "steps": dict(_steps)}
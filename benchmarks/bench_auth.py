@@ -0,0 +1,56 @@
+"""
+Peticiones por segundo en GET /users/me con y sin caché de autenticación.
+
+    python -m benchmarks.bench_auth --requests 3000
+
+Usa una base SQLite temporal. Incluye el coste del TestClient, así que la
+diferencia absoluta es menor que contra uvicorn, pero la consulta ahorrada
+es la misma.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=3000)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "bench_auth.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+
+    from fastapi.testclient import TestClient
+
+    from app.auth_cache import auth_cache
+    from app.main import app
+
+    with TestClient(app) as client:
+        client.post("/auth/register", json={"email": "bench@example.com", "password": "bench"})
+        token = client.post(
+            "/auth/token", data={"username": "bench@example.com", "password": "bench"}
+        ).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        ttl = auth_cache.ttl_seconds or 60
+        results = {}
+        for label, cache_ttl in (("sin caché", 0), ("con caché", ttl)):
+            auth_cache.ttl_seconds = cache_ttl
+            auth_cache.clear()
+            for _ in range(50):
+                client.get("/users/me", headers=headers)
+            t0 = time.perf_counter()
+            for _ in range(args.requests):
+                r = client.get("/users/me", headers=headers)
+                assert r.status_code == 200, r.text
+            elapsed = time.perf_counter() - t0
+            results[label] = args.requests / elapsed
+            print(f"{label:>10}: {results[label]:8.0f} req/s")
+
+    print(f"mejora: {results['con caché'] / results['sin caché']:.2f}x")
+    print(auth_cache.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Velocidad de parse_when_to_datetime con los patrones precompilados y su caché
+frente a dateparser, sobre el corpus de tests/test_dates_es.py (la
+corrección la comprueban los tests).
+
+    python -m benchmarks.bench_dates --rounds 200
+"""
+import argparse
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from app.dates_es import WHEN_CACHE_SIZE, _dateparser_parse, parse_when_to_datetime, resolve_fast, when_cache
+from tests.test_dates_es import CORPUS, TZ
+
+
+def run(fn, now: datetime, rounds: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for text in CORPUS:
+            fn(text, now, TZ)
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    now = datetime(2026, 10, 14, 11, 23, tzinfo=ZoneInfo(TZ))
+    now_local = now.replace(tzinfo=None)
+
+    fast = sum(resolve_fast(text, now_local.date()) is not None for text in CORPUS)
+
+    # Una pasada para que dateparser cargue sus datos de idioma
+    run(_dateparser_parse, now, 1)
+    base_s = run(_dateparser_parse, now, args.rounds)
+    when_cache.maxsize = 0
+    when_cache.clear()
+    cold_s = run(parse_when_to_datetime, now, args.rounds)
+    when_cache.maxsize = WHEN_CACHE_SIZE
+    when_cache.clear()
+    warm_s = run(parse_when_to_datetime, now, args.rounds)
+
+    calls = len(CORPUS) * args.rounds
+    print(f"textos={len(CORPUS)} por patrón={fast} llamadas={calls}")
+    print(f"dateparser:         {base_s / calls * 1e6:8.1f} µs/llamada")
+    print(f"patrones sin caché: {cold_s / calls * 1e6:8.1f} µs/llamada  (x{base_s / cold_s:.1f})")
+    print(f"patrones con caché: {warm_s / calls * 1e6:8.1f} µs/llamada  (x{base_s / warm_s:.1f})")
+    print(f"when_cache: {when_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+Velocidad del parser local sobre el corpus de tests/test_local_parser.py
+(la corrección la comprueban los tests).
+
+    python -m benchmarks.bench_local_parser --rounds 200
+"""
+import argparse
+import time
+
+from app.local_parser import LOCAL_PARSER_MIN_CONFIDENCE, analyze_event, analyze_note
+from tests.test_local_parser import CORPUS
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    analyzers = {"note": analyze_note, "event": lambda t: analyze_event(t, "Europe/Madrid")}
+    texts = [(kind, text) for kind, text, _ in CORPUS]
+    answered = sum(analyzers[kind](text).confidence >= LOCAL_PARSER_MIN_CONFIDENCE for kind, text in texts)
+
+    t0 = time.perf_counter()
+    for _ in range(args.rounds):
+        for kind, text in texts:
+            analyzers[kind](text)
+    per_call_us = (time.perf_counter() - t0) / (args.rounds * len(texts)) * 1e6
+
+    print(f"corpus={len(CORPUS)} resueltas_en_local={answered} ({answered / len(CORPUS):.0%})")
+    print(f"tiempo medio por frase: {per_call_us:.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Autoagendado de tareas sin fecha contra un año de calendario.
+
+    python -m benchmarks.bench_schedule --tasks 1000 --days 365
+
+Usa una base SQLite temporal: series recurrentes y eventos sueltos repartidos
+por el año, más `--tasks` tareas sin fecha (un tercio con franja). Mide
+POST /tasks/schedule?dry_run=true completo (consultas, huecos y empaquetado)
+y, aparte, solo el empaquetado sobre los mismos huecos.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+_CODES = ["MO", "TU", "WE", "TH", "FR"]
+_PARTS = [None, None, None, None, None, None, "morning", "noon", "afternoon", "night"]
+
+
+def seed(user_id: int, n_tasks: int, n_series: int, n_events: int, start: datetime, days: int, rnd: random.Random) -> None:
+    from app import models
+    from app.database import SessionLocal
+    from app.recurrence import series_bounds
+
+    db = SessionLocal()
+    try:
+        events = []
+        for _ in range(n_series):
+            s = datetime.combine(start.date(), datetime.min.time()) + timedelta(
+                hours=rnd.randint(8, 19), minutes=rnd.choice([0, 15, 30, 45])
+            )
+            e = s + timedelta(minutes=rnd.choice([30, 45, 60]))
+            rule = "FREQ=WEEKLY;BYDAY=" + ",".join(rnd.sample(_CODES, rnd.randint(1, 3)))
+            events.append((s, e, rule))
+        for _ in range(n_events):
+            s = datetime.combine(start.date(), datetime.min.time()) + timedelta(
+                days=rnd.randint(0, days), hours=rnd.randint(8, 20), minutes=rnd.choice([0, 30])
+            )
+            events.append((s, s + timedelta(minutes=rnd.choice([30, 60, 120])), None))
+
+        rows = []
+        for s, e, rule in events:
+            series_start, series_end = series_bounds(s, e, rule, "Europe/Madrid")
+            rows.append(dict(
+                user_id=user_id, title="evento", start_at=s, end_at=e, rrule=rule,
+                timezone="Europe/Madrid", series_start=series_start, series_end=series_end,
+            ))
+        db.bulk_insert_mappings(models.Event, rows)
+        db.bulk_insert_mappings(models.Task, [
+            dict(user_id=user_id, title=f"tarea {i}", day_part=rnd.choice(_PARTS), status="pending")
+            for i in range(n_tasks)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--series", type=int, default=15)
+    parser.add_argument("--events", type=int, default=600)
+    parser.add_argument("--minutes", type=int, default=45)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "bench_schedule.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("PASSWORD_WORKERS", "0")
+
+    from fastapi.testclient import TestClient
+
+    from app.database import SessionLocal
+    from app.intervals import complement
+    from app.main import app
+    from app.routers.agenda import iter_busy
+    from app.scheduling import plan
+
+    with TestClient(app) as client:
+        client.post("/auth/register", json={"email": "bench@example.com", "password": "bench"})
+        token = client.post(
+            "/auth/token", data={"username": "bench@example.com", "password": "bench"}
+        ).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        user_id = client.get("/users/me", headers=headers).json()["id"]
+
+        seed(user_id, args.tasks, args.series, args.events, datetime.now(), args.days, random.Random(args.seed))
+
+        params = {"dry_run": True, "days": args.days, "minutes": args.minutes}
+        timings = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            r = client.post("/tasks/schedule", params=params, headers=headers)
+            timings.append(time.perf_counter() - t0)
+            assert r.status_code == 200, r.text
+        result = r.json()
+
+    lo, hi = datetime.fromisoformat(result["from_at"]), datetime.fromisoformat(result["to_at"])
+    db = SessionLocal()
+    try:
+        free = list(complement(list(iter_busy(db, user_id, lo, hi)), lo, hi))
+    finally:
+        db.close()
+    rnd = random.Random(args.seed)
+    tasks = [(i, rnd.choice(_PARTS)) for i in range(args.tasks)]
+    t0 = time.perf_counter()
+    for _ in range(args.repeat):
+        plan(tasks, free, lo, hi, timedelta(minutes=args.minutes))
+    plan_s = (time.perf_counter() - t0) / args.repeat
+
+    print(f"tareas={args.tasks} días={args.days} huecos={len(free)}")
+    print(f"colocadas={len(result['scheduled'])} sin hueco={len(result['unscheduled'])}")
+    print(f"endpoint:     {min(timings) * 1000:8.1f} ms (mejor de {args.repeat})")
+    print(f"empaquetado:  {plan_s * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Coste de importar app.main en un intérprete nuevo (lo que paga cada worker
+al arrancar), con un presupuesto para detectar regresiones.
+
+    python -m benchmarks.bench_startup --runs 5 --budget-ms 1200
+
+Usa `python -X importtime` en subprocesos, agrega el tiempo propio por
+paquete y comprueba que las dependencias pesadas que se cargan al usarlas
+(DEFERRED) no entren con la importación. Sale con código 1 si se supera el
+presupuesto (mediana de las ejecuciones) o se carga alguna de ellas.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+DEFERRED = ("openai", "dateparser", "dateutil.rrule", "numpy")
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "1200"))
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+_PROBE = "import sys, {target}; print(','.join(m for m in {deferred!r} if m in sys.modules))"
+# Raíz del repo: `target` se importa desde ahí aunque se lance desde otro directorio
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(target: str) -> tuple[float, dict[str, float], list[str]]:
+    """(ms acumulados de `target`, ms propios por paquete, diferidos que se cargaron)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.format(target=target, deferred=DEFERRED)],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=_ROOT,
+    )
+    total_us = 0
+    by_package: dict[str, float] = defaultdict(float)
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if not m:
+            continue
+        self_us, cumulative_us, name = int(m.group(1)), int(m.group(2)), m.group(4)
+        by_package[name.split(".")[0]] += self_us / 1000
+        if name == target:
+            total_us = cumulative_us
+    loaded = [m for m in proc.stdout.strip().split(",") if m]
+    return total_us / 1000, by_package, loaded
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--target", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=12)
+    args = parser.parse_args()
+
+    # La primera ejecución compila .pyc y calienta la caché de disco
+    measure(args.target)
+    totals = []
+    packages: dict[str, list[float]] = defaultdict(list)
+    loaded: set[str] = set()
+    for _ in range(args.runs):
+        total, by_package, deferred = measure(args.target)
+        totals.append(total)
+        loaded.update(deferred)
+        for name, ms in by_package.items():
+            packages[name].append(ms)
+
+    median = statistics.median(totals)
+    print(f"import {args.target}: mediana {median:.0f} ms (min {min(totals):.0f}, max {max(totals):.0f}, {args.runs} ejecuciones)")
+    print(f"presupuesto: {args.budget_ms:.0f} ms")
+    print("paquetes por tiempo propio (mediana):")
+    ranked = sorted(((statistics.median(v), k) for k, v in packages.items()), reverse=True)
+    for ms, name in ranked[: args.top]:
+        print(f"  {name:<24} {ms:8.1f} ms")
+
+    failed = False
+    if loaded:
+        print(f"ERROR: se importan al arrancar: {', '.join(sorted(loaded))}")
+        failed = True
+    if median > args.budget_ms:
+        print(f"ERROR: {median:.0f} ms supera el presupuesto de {args.budget_ms:.0f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
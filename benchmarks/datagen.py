@@ -0,0 +1,197 @@
+"""
+Generador de datos sintéticos reproducible para los benchmarks.
+
+    python -m benchmarks.datagen --database-url sqlite:///bench.db --users 20 --tasks 500
+
+Con la misma semilla y el mismo `anchor` produce siempre las mismas filas:
+N usuarios (bench-<i>@example.com, contraseña "bench"), cada uno con M
+tareas, K eventos (sueltos y recurrentes) y R recordatorios, repartidos
+alrededor del día ancla con mezclas parecidas a las reales. Cada usuario
+tiene su propio generador (semilla + índice), así que una base a medio
+poblar recibe para los que faltan los mismos datos que una vacía.
+"""
+import argparse
+import os
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List
+
+BENCH_PASSWORD = "bench"
+TZ = "Europe/Madrid"
+
+_TASK_TITLES = ["Llamar a Juan", "Comprar pan", "Revisar presupuesto", "Enviar informe", "Pagar la luz", "Sacar al perro"]
+_EVENT_TITLES = ["Reunión de equipo", "Dentista", "Gimnasio", "Clase de inglés", "Cena", "Revisión trimestral"]
+_CHANNELS = [None, None, "call", "email", "whatsapp"]
+_DAY_PARTS = [None, None, None, "morning", "noon", "afternoon", "night"]
+_CODES = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+
+
+@dataclass
+class Mix:
+    """Proporciones de cada tipo de fila."""
+
+    dated_tasks: float = 0.6
+    done_tasks: float = 0.2
+    recurring_events: float = 0.25
+    # De los recurrentes, cuántos necesitan dateutil (BYDAY ordinal, COUNT...)
+    complex_rules: float = 0.2
+    recurring_reminders: float = 0.3
+
+
+@dataclass
+class BenchUser:
+    id: int
+    email: str
+
+
+def email_for(i: int) -> str:
+    return f"bench-{i}@example.com"
+
+
+def _rrule(rnd: random.Random, mix: Mix) -> str:
+    if rnd.random() < mix.complex_rules:
+        return rnd.choice([
+            "FREQ=MONTHLY;BYDAY=1MO",
+            "FREQ=MONTHLY;BYDAY=-1FR",
+            f"FREQ=WEEKLY;BYDAY={rnd.choice(_CODES)};COUNT={rnd.randint(5, 40)}",
+            "FREQ=YEARLY;BYMONTH=3;BYMONTHDAY=15",
+        ])
+    freq = rnd.choice(["DAILY", "WEEKLY", "WEEKLY", "WEEKLY", "MONTHLY"])
+    if freq == "WEEKLY":
+        return "FREQ=WEEKLY;BYDAY=" + ",".join(sorted(rnd.sample(_CODES[:5], rnd.randint(1, 3)), key=_CODES.index))
+    if freq == "MONTHLY":
+        return f"FREQ=MONTHLY;BYMONTHDAY={rnd.randint(1, 28)}"
+    return "FREQ=DAILY" if rnd.random() < 0.5 else "FREQ=DAILY;INTERVAL=2"
+
+
+def _stamp(rnd: random.Random, anchor: datetime, days: int) -> datetime:
+    return anchor + timedelta(days=rnd.randint(-days, days), hours=rnd.randint(7, 21), minutes=rnd.choice([0, 15, 30, 45]))
+
+
+def generate(
+    session_factory,
+    users: int,
+    tasks: int,
+    events: int,
+    reminders: int,
+    seed: int = 42,
+    anchor: datetime = datetime(2026, 1, 5),
+    mix: Mix = Mix(),
+) -> List[BenchUser]:
+    """Inserta los datos y devuelve los usuarios creados. Los ya existentes se reutilizan sin tocar."""
+    from app import models
+    from app.core.security import hash_password
+    from app.recurrence import series_bounds
+    from app.reminder_dispatch import first_fire_at
+
+    db = session_factory()
+    try:
+        emails = [email_for(i) for i in range(users)]
+        existing = dict(
+            db.query(models.User.email, models.User.id).filter(models.User.email.in_(emails)).all()
+        )
+        if len(existing) == users:
+            return [BenchUser(existing[e], e) for e in emails]
+
+        # Un solo hash para todos: PBKDF2 por usuario dominaría la generación
+        hashed = hash_password(BENCH_PASSWORD)
+        db.bulk_insert_mappings(models.User, [
+            {"email": e, "hashed_password": hashed} for e in emails if e not in existing
+        ])
+        db.flush()
+        ids = dict(db.query(models.User.email, models.User.id).filter(models.User.email.in_(emails)).all())
+        created = [BenchUser(ids[e], e) for e in emails]
+
+        now_utc = datetime.utcnow()
+        for i, user in enumerate(created):
+            if user.email in existing:
+                continue
+            rnd = random.Random(f"{seed}:{i}")
+            task_rows = []
+            for _ in range(tasks):
+                dated = rnd.random() < mix.dated_tasks
+                done = rnd.random() < mix.done_tasks
+                created_at = anchor - timedelta(days=rnd.randint(0, 120), minutes=rnd.randint(0, 1440))
+                task_rows.append({
+                    "user_id": user.id,
+                    "title": rnd.choice(_TASK_TITLES),
+                    "description": None,
+                    "date": _stamp(rnd, anchor, 90) if dated else None,
+                    "channel": rnd.choice(_CHANNELS),
+                    "day_part": rnd.choice(_DAY_PARTS),
+                    "status": "done" if done else "pending",
+                    "created_at": created_at,
+                    "completed_at": created_at + timedelta(days=1) if done else None,
+                })
+            db.bulk_insert_mappings(models.Task, task_rows)
+
+            event_rows = []
+            for _ in range(events):
+                rrule = _rrule(rnd, mix) if rnd.random() < mix.recurring_events else None
+                start = _stamp(rnd, anchor, 180 if rrule is None else 60)
+                end = start + timedelta(minutes=rnd.choice([30, 45, 60, 90, 120]))
+                series_start, series_end = series_bounds(start, end, rrule, TZ)
+                event_rows.append({
+                    "user_id": user.id,
+                    "title": rnd.choice(_EVENT_TITLES),
+                    "description": None,
+                    "start_at": start,
+                    "end_at": end,
+                    "rrule": rrule,
+                    "timezone": TZ,
+                    "series_start": series_start,
+                    "series_end": series_end,
+                    "created_at": anchor - timedelta(days=rnd.randint(0, 120)),
+                })
+            db.bulk_insert_mappings(models.Event, event_rows)
+
+            reminder_rows = []
+            for _ in range(reminders):
+                frequency = rnd.choice(["daily", "weekly", "monthly"]) if rnd.random() < mix.recurring_reminders else "once"
+                remind_at = _stamp(rnd, anchor, 60)
+                reminder_rows.append({
+                    "user_id": user.id,
+                    "title": rnd.choice(_TASK_TITLES),
+                    "remind_at": remind_at,
+                    "frequency": frequency,
+                    "is_active": True,
+                    "next_fire_at": first_fire_at(remind_at, frequency, None, now_utc),
+                    "created_at": anchor - timedelta(days=rnd.randint(0, 60)),
+                })
+            db.bulk_insert_mappings(models.Reminder, reminder_rows)
+
+        db.commit()
+        return created
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", default=None, help="por defecto DATABASE_URL")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--tasks", type=int, default=300)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--reminders", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+
+    from app import models  # noqa: F401
+    from app.database import Base, SessionLocal, engine
+    from app.migrations import run_migrations
+
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    users = generate(SessionLocal, args.users, args.tasks, args.events, args.reminders, args.seed)
+    print(f"usuarios={len(users)} ({users[0].email} .. {users[-1].email}) contraseña={BENCH_PASSWORD!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+Suite de rendimiento reproducible con salida JSON.
+
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --database-url postgresql://localhost/autoagenda_bench --output pg.json
+    python -m benchmarks.suite --compare results.json pg.json
+
+Genera los datos con benchmarks.datagen (misma semilla, mismos datos) y mide
+por escenario: agenda por semana/mes/año, listados, autenticación,
+parse_when_to_datetime, expansión de recurrencias y los pipelines from-text
+con el LLM sustituido por un stub (latencia configurable). Por defecto usa
+una SQLite temporal; con --database-url cualquier base (los usuarios bench-*
+que ya existan se reutilizan tal cual; los escenarios from-text les añaden
+filas, así que para comparar entre ejecuciones conviene una base limpia).
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+from zoneinfo import ZoneInfo
+
+ANCHOR = datetime(2026, 1, 5)
+TZ = "Europe/Madrid"
+
+# Textos que el parser local no resuelve con confianza: van al LLM (stub)
+NOTE_TEXTS = [
+    "comprar pan y llamar a mamá",
+    "la semana que viene ir al médico",
+    "el finde limpiar el garaje",
+    "llamar a Juan a las 5",
+]
+EVENT_TEXTS = [
+    "esta tarde café con Sara",
+    "la semana que viene a las 10 revisión",
+]
+LOCAL_NOTE_TEXTS = ["mañana a las 17 llamar a Juan", "el 20 de enero a las 10:30 dentista"]
+WHEN_TEXTS = [
+    "hoy a las 16:00", "mañana a las 10:00", "pasado mañana a las 14:30", "el lunes a las 09:15",
+    "el viernes", "el 20 de enero a las 10:30", "en 2 horas", "la semana que viene",
+]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    ms = sorted(s * 1000 for s in samples)
+    q = statistics.quantiles(ms, n=20, method="inclusive") if len(ms) > 1 else [ms[0]] * 19
+    return {
+        "n": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "p50_ms": round(statistics.median(ms), 3),
+        "p95_ms": round(q[18], 3),
+        "min_ms": round(ms[0], 3),
+        "max_ms": round(ms[-1], 3),
+    }
+
+
+def timed(fn: Callable[[], object], repeat: int, warmup: int = 2) -> Dict[str, float]:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return summarize(samples)
+
+
+class StubLLM:
+    """Respuestas fijas con el formato de cada prompt y latencia simulada."""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_s = latency_ms / 1000
+        self.calls = 0
+
+    def complete_json(self, client, messages, model=None) -> str:
+        self.calls += 1
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        prompt = messages[0]["content"]
+        if "convierte notas en tareas" in prompt:
+            return json.dumps({"tasks": [
+                {"title": "Comprar pan", "description": "comprar pan", "date_text": "mañana",
+                 "time_text": "10:00", "day_part": None, "channel": None},
+                {"title": "Llamar a mamá", "description": "llamar a mamá", "date_text": None,
+                 "time_text": None, "day_part": "afternoon", "channel": "call"},
+            ]})
+        return json.dumps({
+            "title": "Revisión", "description": "revisión", "date_text": "el lunes",
+            "start_time": "10:00", "end_time": None, "duration_minutes": 30, "rrule": None, "timezone": TZ,
+        })
+
+
+@contextmanager
+def stubbed_llm(stub: StubLLM):
+    from app import ai, ai_events
+    from app.llm_cache import llm_cache
+
+    saved = [(m, m.get_client, m.complete_json) for m in (ai, ai_events)]
+    saved_ttl = llm_cache.ttl_seconds
+    # Sin caché: cada llamada recorre el pipeline completo
+    llm_cache.ttl_seconds = 0
+    for m in (ai, ai_events):
+        m.get_client = lambda: object()
+        m.complete_json = stub.complete_json
+    try:
+        yield stub
+    finally:
+        for m, get_client, complete_json in saved:
+            m.get_client, m.complete_json = get_client, complete_json
+        llm_cache.ttl_seconds = saved_ttl
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(args) -> dict:
+    from fastapi.testclient import TestClient
+
+    from app.auth_cache import auth_cache
+    from app.core.security import create_access_token
+    from app.database import SessionLocal, engine
+    from app.dates_es import parse_when_to_datetime, when_cache
+    from app.main import app
+    from app import models
+    from app.recurrence import expand_occurrences, rule_cache
+
+    from .datagen import generate
+
+    results: Dict[str, dict] = {}
+    selected = set(args.only.split(",")) if args.only else None
+
+    def want(name: str) -> bool:
+        return selected is None or any(name.startswith(s) for s in selected)
+
+    with TestClient(app) as client:
+        t0 = time.perf_counter()
+        users = generate(SessionLocal, args.users, args.tasks, args.events, args.reminders, args.seed, ANCHOR)
+        generate_s = time.perf_counter() - t0
+
+        # Tokens directos: el login (PBKDF2) tiene su propio benchmark
+        headers = [
+            {"Authorization": f"Bearer {create_access_token(u.email, user_id=u.id)}"} for u in users
+        ]
+        rnd = random.Random(args.seed)
+
+        def request(method: str, url: str, expect: int = 200, **kwargs) -> Callable[[], object]:
+            def call():
+                r = client.request(method, url, headers=rnd.choice(headers), **kwargs)
+                assert r.status_code == expect, (url, r.status_code, r.text[:200])
+                return r
+            return call
+
+        for label, days in (("week", 7), ("month", 31), ("year", 365)):
+            name = f"agenda_{label}"
+            if want(name):
+                params = {"from": ANCHOR.isoformat(), "to": (ANCHOR + timedelta(days=days)).isoformat()}
+                results[name] = timed(request("GET", "/agenda/", params=params), args.repeat)
+
+        for kind in ("tasks", "events", "reminders"):
+            name = f"list_{kind}"
+            if want(name):
+                results[name] = timed(request("GET", f"/{kind}/", params={"limit": 50}), args.repeat)
+
+        if want("current_user"):
+            ttl = auth_cache.ttl_seconds
+            auth_cache.ttl_seconds = 0
+            results["current_user_nocache"] = timed(request("GET", "/users/me"), args.repeat)
+            auth_cache.ttl_seconds = ttl or 60
+            auth_cache.clear()
+            results["current_user_cached"] = timed(request("GET", "/users/me"), args.repeat)
+            auth_cache.ttl_seconds = ttl
+
+        if want("parse_when"):
+            now = datetime.now(ZoneInfo(TZ))
+
+            def parse_all():
+                for text in WHEN_TEXTS:
+                    parse_when_to_datetime(text, now, TZ)
+
+            size = when_cache.maxsize
+            when_cache.maxsize = 0
+            when_cache.clear()
+            results["parse_when_nocache"] = timed(parse_all, args.repeat)
+            when_cache.maxsize = size
+            when_cache.clear()
+            results["parse_when_cached"] = timed(parse_all, args.repeat)
+
+        if want("recurrence"):
+            db = SessionLocal()
+            try:
+                series = (
+                    db.query(models.Event.start_at, models.Event.end_at, models.Event.rrule)
+                    .filter(models.Event.rrule.isnot(None), models.Event.user_id == users[0].id)
+                    .all()
+                )
+            finally:
+                db.close()
+            lo, hi = ANCHOR, ANCHOR + timedelta(days=365)
+
+            def expand_all(fast: bool):
+                for start, end, rule in series:
+                    try:
+                        expand_occurrences(start, end, rule, TZ, lo, hi, fast=fast)
+                    except ValueError:
+                        pass
+
+            rule_cache.maxsize = max(rule_cache.maxsize, len(series))
+            reps = max(3, args.repeat // 10)
+            results["recurrence_year_dateutil"] = timed(lambda: expand_all(False), reps)
+            results["recurrence_year_fast"] = timed(lambda: expand_all(True), reps)
+            results["recurrence_year_fast"]["series"] = len(series)
+
+        pipelines = [
+            ("notes_text_llm", "/notes/text", NOTE_TEXTS, 200),
+            ("notes_text_local", "/notes/text", LOCAL_NOTE_TEXTS, 200),
+            ("events_from_text_llm", "/events/from-text", EVENT_TEXTS, 201),
+        ]
+        with stubbed_llm(StubLLM(args.llm_latency_ms)) as stub:
+            for name, url, texts, expect in pipelines:
+                if not want(name):
+                    continue
+                if url == "/notes/text":
+                    call = lambda: request("POST", url, expect, params={"text": rnd.choice(texts)})()
+                else:
+                    call = lambda: request("POST", url, expect, json=rnd.choice(texts))()
+                before = stub.calls
+                results[name] = timed(call, args.repeat)
+                results[name]["llm_calls"] = stub.calls - before
+
+    return {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": engine.dialect.name,
+            "params": {
+                "users": args.users, "tasks": args.tasks, "events": args.events, "reminders": args.reminders,
+                "seed": args.seed, "repeat": args.repeat, "llm_latency_ms": args.llm_latency_ms,
+                "anchor": ANCHOR.isoformat(),
+            },
+            "generate_s": round(generate_s, 3),
+        },
+        "results": results,
+    }
+
+
+def compare(base_path: str, new_path: str, threshold: float) -> int:
+    """Compara p50 entre dos ficheros; código 1 si algo empeora más de `threshold`."""
+    with open(base_path) as f:
+        base = json.load(f)["results"]
+    with open(new_path) as f:
+        new = json.load(f)["results"]
+    worse = 0
+    for name in sorted(set(base) & set(new)):
+        a, b = base[name]["p50_ms"], new[name]["p50_ms"]
+        ratio = b / a if a else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  <-- peor"
+            worse += 1
+        print(f"{name:<28} {a:10.2f} ms {b:10.2f} ms  x{ratio:5.2f}{flag}")
+    return 1 if worse else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", default=None, help="por defecto una SQLite temporal")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--tasks", type=int, default=300)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--reminders", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--only", default=None, help="prefijos de escenario separados por comas")
+    parser.add_argument("--output", default=None, help="fichero JSON (por defecto stdout)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), default=None)
+    parser.add_argument("--threshold", type=float, default=0.2, help="empeoramiento tolerado en --compare")
+    args = parser.parse_args()
+
+    if args.compare:
+        return compare(*args.compare, args.threshold)
+
+    os.environ["DATABASE_URL"] = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    # Sin procesos ni hilos de fondo que compitan con las mediciones
+    os.environ.setdefault("PASSWORD_WORKERS", "0")
+    os.environ.setdefault("REMINDER_DISPATCH", "0")
+    os.environ.setdefault("WARMUP", "0")
+
+    report = run_suite(args)
+    out = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(out + "\n")
+        for name, r in report["results"].items():
+            print(f"{name:<28} p50 {r['p50_ms']:9.2f} ms  p95 {r['p95_ms']:9.2f} ms", file=sys.stderr)
+    else:
+        print(out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+import os
+import tempfile
+import uuid
+
+# Antes de importar app: la configuración se lee al importar los módulos
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db"))
+os.environ.setdefault("PASSWORD_WORKERS", "0")
+os.environ.setdefault("REMINDER_DISPATCH", "0")
+os.environ.setdefault("OCCURRENCE_REFRESH_SECONDS", "0")
+os.environ.setdefault("WARMUP", "0")
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def user(client):
+    """Usuario nuevo por test: (id, cabeceras con su token)."""
+    email = f"test-{uuid.uuid4().hex[:12]}@example.com"
+    r = client.post("/auth/register", json={"email": email, "password": "pw"})
+    assert r.status_code == 201, r.text
+    token = client.post("/auth/token", data={"username": email, "password": "pw"}).json()["access_token"]
+    return r.json()["id"], {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def db():
+    from app.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
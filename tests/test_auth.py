@@ -0,0 +1,102 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import anyio.to_thread
+import pytest
+
+from app.core import passwords, security
+
+
+def _email() -> str:
+    return f"auth-{uuid.uuid4().hex[:12]}@example.com"
+
+
+@pytest.fixture
+def full_pool(monkeypatch):
+    """Cupo de un solo hueco, ya ocupado."""
+    slots = threading.BoundedSemaphore(1)
+    slots.acquire()
+    monkeypatch.setattr(passwords, "_slots", slots)
+    yield
+    slots.release()
+
+
+def test_saturated_pool_returns_429_on_register(client, full_pool):
+    r = client.post("/auth/register", json={"email": _email(), "password": "pw"})
+    assert r.status_code == 429
+    assert r.headers["Retry-After"] == "1"
+
+    r = client.post("/auth/token", data={"username": "cualquiera@example.com", "password": "pw"})
+    # Usuario inexistente: no llega a pedir cupo
+    assert r.status_code == 401
+
+
+def test_saturated_pool_returns_429_on_login(client, monkeypatch):
+    email = _email()
+    assert client.post("/auth/register", json={"email": email, "password": "pw"}).status_code == 201
+
+    slots = threading.BoundedSemaphore(1)
+    slots.acquire()
+    monkeypatch.setattr(passwords, "_slots", slots)
+    r = client.post("/auth/token", data={"username": email, "password": "pw"})
+    assert r.status_code == 429
+    assert r.headers["Retry-After"] == "1"
+
+    slots.release()
+    assert client.post("/auth/token", data={"username": email, "password": "pw"}).status_code == 200
+
+
+def test_waiting_for_the_pool_does_not_block_other_requests(client, monkeypatch):
+    release = threading.Event()
+    started = threading.Event()
+
+    real_hash = security.hash_password
+
+    def slow_hash(password):
+        started.set()
+        assert release.wait(10)
+        return real_hash(password)
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(passwords, "PASSWORD_WORKERS", 1)
+    monkeypatch.setattr(passwords, "_executor", executor)
+    monkeypatch.setattr(passwords, "_slots", threading.BoundedSemaphore(1))
+    monkeypatch.setattr(passwords.security, "hash_password", slow_hash)
+
+    # Un único hilo en el threadpool: si el registro lo retuviera mientras
+    # espera el hash, /ping no podría ejecutarse
+    limiter = client.portal.call(anyio.to_thread.current_default_thread_limiter)
+    tokens = limiter.total_tokens
+    limiter.total_tokens = 1
+    # Por si acaso: que un bloqueo falle por tiempo en lugar de colgar la suite
+    safety = threading.Timer(5, release.set)
+    safety.start()
+
+    email = _email()
+    result = {}
+    waiting = threading.Thread(
+        target=lambda: result.update(r=client.post("/auth/register", json={"email": email, "password": "pw"}))
+    )
+    waiting.start()
+    try:
+        assert started.wait(10)
+        # El registro sigue esperando al pool: la app responde y el cupo lleno da 429
+        t0 = time.perf_counter()
+        assert client.get("/ping").status_code == 200
+        busy = client.post("/auth/register", json={"email": _email(), "password": "pw"})
+        assert busy.status_code == 429
+        assert time.perf_counter() - t0 < 2
+        assert "r" not in result
+    finally:
+        release.set()
+        safety.cancel()
+        limiter.total_tokens = tokens
+        waiting.join(10)
+        monkeypatch.setattr(passwords, "_executor", None)
+        executor.shutdown()
+
+    assert result["r"].status_code == 201, result["r"].text
+    token = client.post("/auth/token", data={"username": email, "password": "pw"})
+    assert token.status_code == 200
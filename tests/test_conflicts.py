@@ -0,0 +1,164 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import conflicts, models
+from app.conflicts import _event_versions, _load, _window, conflict_index
+from app.occurrences import delete_event_occurrences, inline_horizon_end, materialize_event
+from app.recurrence import series_bounds
+
+DAY = (datetime.now().replace(hour=9, minute=0, second=0, microsecond=0) + timedelta(days=2))
+
+
+def _payload(title, start, minutes=60, rrule=None):
+    return {"title": title, "start_at": start.isoformat(),
+            "end_at": (start + timedelta(minutes=minutes)).isoformat(), "rrule": rrule}
+
+
+def _create(client, headers, *args, **kwargs):
+    r = client.post("/events/", json=_payload(*args, **kwargs), headers=headers)
+    assert r.status_code == 201, r.text
+    return r.json()
+
+
+def _entries(index):
+    return sorted(zip(index.starts.tolist(), index.ends.tolist(), index.event_ids.tolist()))
+
+
+def _assert_matches_rebuild(db, user_id):
+    db.expire_all()
+    window, cached = conflict_index.get(db, user_id)
+    assert window == conflicts._window()
+    fresh = _load(db, user_id, *window).only_events(_event_versions(db, user_id))
+    assert _entries(cached) == _entries(fresh)
+    return cached
+
+
+def _edit(db, event_id, **changes):
+    """Lo que haría un endpoint de edición: cambia, recalcula límites y rematerializa."""
+    ev = db.get(models.Event, event_id)
+    for name, value in changes.items():
+        setattr(ev, name, value)
+    ev.series_start, ev.series_end = series_bounds(ev.start_at, ev.end_at, ev.rrule, ev.timezone)
+    delete_event_occurrences(db, ev.id)
+    ev.occurrences_until = None
+    materialize_event(db, ev, inline_horizon_end())
+    db.commit()
+
+
+@pytest.fixture(autouse=True)
+def _fresh_index():
+    conflict_index.clear()
+    yield
+    conflict_index.clear()
+
+
+def test_create_patches_the_cached_index(client, user, db):
+    user_id, headers = user
+    daily = _create(client, headers, "diario", DAY, rrule="FREQ=DAILY")
+    builds = conflict_index.builds
+
+    created = _create(client, headers, "choca", DAY + timedelta(days=1, minutes=30))
+    assert [c["event_id"] for c in created["conflicts"]] == [daily["id"]]
+
+    _create(client, headers, "otro", DAY + timedelta(hours=4), rrule="FREQ=WEEKLY;COUNT=4")
+    cached = _assert_matches_rebuild(db, user_id)
+    assert conflict_index.builds == builds
+    assert {daily["id"], created["id"]} <= set(cached.event_ids.tolist())
+
+
+def test_event_created_elsewhere_is_added_on_next_query(client, user, db):
+    user_id, headers = user
+    _create(client, headers, "diario", DAY, rrule="FREQ=DAILY")
+    _assert_matches_rebuild(db, user_id)
+
+    # Otro worker o una importación: no pasa por note_created
+    ev = models.Event(user_id=user_id, title="importado", start_at=DAY + timedelta(hours=2),
+                      end_at=DAY + timedelta(hours=3), timezone="Europe/Madrid")
+    db.add(ev)
+    db.commit()
+    updates = conflict_index.updates
+    cached = _assert_matches_rebuild(db, user_id)
+    assert conflict_index.updates == updates + 1
+    assert ev.id in cached.event_ids.tolist()
+
+
+@pytest.mark.parametrize(
+    "changes",
+    [
+        {"start_at": DAY + timedelta(hours=5), "end_at": DAY + timedelta(hours=6)},
+        {"rrule": "FREQ=WEEKLY"},
+        {"rrule": None},
+        {"end_at": DAY + timedelta(hours=3)},
+    ],
+    ids=["moved", "rrule-changed", "rrule-removed", "longer"],
+)
+def test_edited_event_is_reexpanded(client, user, db, changes):
+    user_id, headers = user
+    ev = _create(client, headers, "diario", DAY, rrule="FREQ=DAILY")
+    _create(client, headers, "fijo", DAY + timedelta(days=3, hours=8))
+    _assert_matches_rebuild(db, user_id)
+    builds = conflict_index.builds
+
+    _edit(db, ev["id"], **changes)
+    _assert_matches_rebuild(db, user_id)
+    assert conflict_index.builds == builds
+
+
+def test_conflicts_follow_an_edit(client, user, db):
+    user_id, headers = user
+    ev = _create(client, headers, "reunión", DAY)
+    assert _create(client, headers, "a", DAY + timedelta(minutes=15))["conflicts"]
+
+    _edit(db, ev["id"], start_at=DAY + timedelta(days=1), end_at=DAY + timedelta(days=1, hours=1))
+    later = _create(client, headers, "b", DAY + timedelta(days=1, minutes=15))
+    assert ev["id"] in [c["event_id"] for c in later["conflicts"]]
+    earlier = _create(client, headers, "c", DAY + timedelta(minutes=30))
+    assert ev["id"] not in [c["event_id"] for c in earlier["conflicts"]]
+    _assert_matches_rebuild(db, user_id)
+
+
+def test_delete_drops_the_event(client, user, db):
+    user_id, headers = user
+    doomed = _create(client, headers, "diario", DAY, rrule="FREQ=DAILY")
+    _create(client, headers, "fijo", DAY + timedelta(hours=3))
+    _assert_matches_rebuild(db, user_id)
+
+    assert client.delete(f"/events/{doomed['id']}", headers=headers).status_code == 204
+    cached = _assert_matches_rebuild(db, user_id)
+    assert doomed["id"] not in cached.event_ids.tolist()
+    assert not _create(client, headers, "libre", DAY + timedelta(days=1))["conflicts"]
+
+
+def test_events_outside_the_window(client, user, db):
+    user_id, headers = user
+    lo, hi = _window()
+    past = _create(client, headers, "pasado", lo - timedelta(days=3))
+    future = _create(client, headers, "lejano", hi + timedelta(days=30))
+    spanning = _create(client, headers, "semanal", lo - timedelta(days=30), rrule="FREQ=WEEKLY")
+    cached = _assert_matches_rebuild(db, user_id)
+
+    ids = cached.event_ids.tolist()
+    assert past["id"] not in ids and future["id"] not in ids
+    assert spanning["id"] in ids
+    assert all(s <= hi for s in cached.starts.tolist()) and all(e > lo for e in cached.ends.tolist())
+
+    # Editado para entrar en la ventana, y de vuelta fuera
+    _edit(db, future["id"], start_at=DAY, end_at=DAY + timedelta(hours=1))
+    assert future["id"] in _assert_matches_rebuild(db, user_id).event_ids.tolist()
+    _edit(db, future["id"], start_at=hi + timedelta(days=1), end_at=hi + timedelta(days=1, hours=1))
+    assert future["id"] not in _assert_matches_rebuild(db, user_id).event_ids.tolist()
+
+
+def test_window_advance_is_patched(client, user, db, monkeypatch):
+    user_id, headers = user
+    _create(client, headers, "diario", DAY, rrule="FREQ=DAILY")
+    _create(client, headers, "ayer", DAY - timedelta(days=3))
+    _assert_matches_rebuild(db, user_id)
+    builds = conflict_index.builds
+
+    tomorrow = datetime.now() + timedelta(days=2)
+    monkeypatch.setattr(conflicts, "_window", lambda now=None: _window(tomorrow))
+    cached = _assert_matches_rebuild(db, user_id)
+    assert conflict_index.builds == builds
+    assert min(cached.ends.tolist()) > _window(tomorrow)[0]
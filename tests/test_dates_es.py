@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from app.dates_es import WHEN_CACHE_SIZE, _dateparser_parse, parse_when_to_datetime, resolve_fast, when_cache
+
+TZ = "Europe/Madrid"
+
+CORPUS = [
+    "hoy", "mañana", "pasado mañana",
+    "hoy a las 16:00", "hoy a las 20:00", "mañana a las 10:00", "mañana a las 9:00", "mañana a las 17:30",
+    "pasado mañana a las 14:30", "viernes a las 10:00", "el lunes a las 09:15", "el jueves a las 10:00",
+    "el viernes", "el próximo jueves", "20 de enero", "el 20 de enero a las 10:30", "el 3 de marzo",
+    "el 14 de febrero a las 21:00", "en 2 horas", "en 30 minutos", "dentro de 3 días",
+    # Estos siguen yendo a dateparser
+    "la semana que viene", "el finde", "a final de mes",
+]
+
+NOWS = [
+    datetime(2026, 10, 14, 11, 23),  # miércoles
+    datetime(2026, 10, 16, 23, 50),  # viernes a última hora
+    datetime(2026, 3, 28, 22, 0),    # víspera del cambio de hora
+    datetime(2026, 12, 31, 18, 0),   # cambio de año
+]
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    when_cache.maxsize = WHEN_CACHE_SIZE
+    when_cache.clear()
+    yield
+    when_cache.clear()
+
+
+def _aware(naive: datetime, tzname: str = TZ) -> datetime:
+    return naive.replace(tzinfo=ZoneInfo(tzname))
+
+
+@pytest.mark.parametrize("naive_now", NOWS, ids=str)
+def test_fast_path_agrees_with_dateparser(naive_now):
+    now = _aware(naive_now)
+    for text in CORPUS:
+        theirs = _dateparser_parse(text, now, TZ)
+        if theirs is None:
+            continue
+        expected = theirs if theirs >= naive_now else None
+        assert parse_when_to_datetime(text, now, TZ) == expected, text
+
+
+def test_common_texts_take_the_fast_path():
+    anchor = NOWS[0].date()
+    fast = [text for text in CORPUS if resolve_fast(text, anchor) is not None]
+    assert len(fast) >= 18
+    assert not {"la semana que viene", "el finde", "a final de mes"} & set(fast)
+
+
+@pytest.mark.parametrize("naive_now", NOWS, ids=str)
+def test_cached_answer_equals_uncached(naive_now):
+    now = _aware(naive_now)
+    first = [parse_when_to_datetime(text, now, TZ) for text in CORPUS]
+    hits = when_cache.hits
+    assert [parse_when_to_datetime(text, now, TZ) for text in CORPUS] == first
+    assert when_cache.hits > hits
+
+
+def test_cache_key_includes_the_anchor_day():
+    day1 = _aware(datetime(2026, 10, 14, 9, 0))
+    assert parse_when_to_datetime("mañana a las 10:00", day1, TZ) == datetime(2026, 10, 15, 10, 0)
+    # Mismo texto al día siguiente: no puede reutilizar la entrada de ayer
+    day2 = day1 + timedelta(days=1)
+    assert parse_when_to_datetime("mañana a las 10:00", day2, TZ) == datetime(2026, 10, 16, 10, 0)
+    assert parse_when_to_datetime("el viernes", day1, TZ) == datetime(2026, 10, 16, 0, 0)
+    assert parse_when_to_datetime("el viernes", _aware(datetime(2026, 10, 17, 9, 0)), TZ) == datetime(2026, 10, 23, 0, 0)
+
+
+def test_cache_key_includes_the_timezone():
+    # 01:00 del 15 en Madrid son las 19:00 del 14 en Nueva York
+    now = _aware(datetime(2026, 10, 15, 1, 0))
+    assert parse_when_to_datetime("mañana a las 10:00", now, TZ) == datetime(2026, 10, 16, 10, 0)
+    assert parse_when_to_datetime("mañana a las 10:00", now, "America/New_York") == datetime(2026, 10, 15, 10, 0)
+    assert parse_when_to_datetime("hoy a las 20:00", now, "America/New_York") == datetime(2026, 10, 14, 20, 0)
+    assert parse_when_to_datetime("hoy a las 20:00", now, TZ) == datetime(2026, 10, 15, 20, 0)
+
+
+def test_cached_entry_reapplies_the_current_time():
+    morning = _aware(datetime(2026, 10, 14, 10, 0))
+    evening = _aware(datetime(2026, 10, 14, 17, 0))
+    assert parse_when_to_datetime("hoy a las 16:00", morning, TZ) == datetime(2026, 10, 14, 16, 0)
+    # Mismo día (misma clave): ya pasó
+    assert parse_when_to_datetime("hoy a las 16:00", evening, TZ) is None
+    assert parse_when_to_datetime("en 2 horas", morning, TZ) == datetime(2026, 10, 14, 12, 0)
+    assert parse_when_to_datetime("en 2 horas", evening, TZ) == datetime(2026, 10, 14, 19, 0)
+    # Hoy es miércoles: a las 17:00 "el miércoles a las 10:00" es el de la semana que viene
+    assert parse_when_to_datetime("el miércoles a las 10:00", morning, TZ) == datetime(2026, 10, 14, 10, 0)
+    assert parse_when_to_datetime("el miércoles a las 10:00", evening, TZ) == datetime(2026, 10, 21, 10, 0)
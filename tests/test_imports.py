@@ -0,0 +1,72 @@
+import io
+import json
+import time
+
+ICS = """BEGIN:VCALENDAR
+VERSION:2.0
+BEGIN:VEVENT
+UID:ok@example.com
+SUMMARY:Inglés
+DTSTART;TZID=Europe/Madrid:20261019T183000
+DTEND;TZID=Europe/Madrid:20261019T193000
+RRULE:FREQ=WEEKLY;BYDAY=MO,WE
+END:VEVENT
+BEGIN:VEVENT
+UID:hostile@example.com
+SUMMARY:Cada segundo
+DTSTART;TZID=Europe/Madrid:20261019T100000
+DTEND;TZID=Europe/Madrid:20261019T100001
+RRULE:FREQ=SECONDLY;UNTIL=20300101T000000Z
+END:VEVENT
+BEGIN:VEVENT
+UID:count@example.com
+SUMMARY:Demasiadas
+DTSTART;TZID=Europe/Madrid:20261019T100000
+DTEND;TZID=Europe/Madrid:20261019T110000
+RRULE:FREQ=DAILY;COUNT=1000000
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+def _upload(client, url, body: str, headers, **params):
+    files = {"file": ("data", io.BytesIO(body.encode()))}
+    return client.post(url, params=params, files=files, headers=headers)
+
+
+def test_ics_import_rejects_unbounded_rules_per_row(client, user):
+    _, headers = user
+    t0 = time.perf_counter()
+    r = _upload(client, "/import/ics", ICS, headers)
+    assert time.perf_counter() - t0 < 5
+    assert r.status_code == 200, r.text
+    result = r.json()
+    assert (result["received"], result["imported"], result["failed"]) == (3, 1, 2)
+    assert [e["line"] for e in result["errors"]] == [10, 17]
+    assert "menores de un día" in result["errors"][0]["error"]
+    assert "COUNT" in result["errors"][1]["error"]
+
+    events = client.get("/events/", headers=headers).json()
+    assert [e["title"] for e in events] == ["Inglés"]
+
+
+def test_ndjson_import_rejects_sub_daily_rule_and_unknown_timezone(client, user):
+    _, headers = user
+    rows = [
+        {"title": "ok", "start_at": "2026-10-20T10:00:00", "end_at": "2026-10-20T11:00:00"},
+        {"title": "minutely", "start_at": "2026-10-20T10:00:00", "end_at": "2026-10-20T10:01:00",
+         "rrule": "FREQ=MINUTELY"},
+        {"title": "tz", "start_at": "2026-10-20T10:00:00", "end_at": "2026-10-20T11:00:00", "timezone": "Mars/Base"},
+    ]
+    body = "\n".join(json.dumps(row) for row in rows)
+    result = _upload(client, "/import/events", body, headers, format="ndjson").json()
+    assert (result["imported"], result["failed"]) == (1, 2)
+    assert [e["line"] for e in result["errors"]] == [2, 3]
+
+
+def test_create_event_with_sub_daily_rule_is_422(client, user):
+    _, headers = user
+    payload = {"title": "x", "start_at": "2026-10-20T10:00:00", "end_at": "2026-10-20T10:00:01",
+               "rrule": "FREQ=SECONDLY;UNTIL=20300101T000000Z"}
+    r = client.post("/events/", json=payload, headers=headers)
+    assert r.status_code == 422
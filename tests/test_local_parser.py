@@ -0,0 +1,116 @@
+"""
+Corpus del parser local: lo que resuelve sin LLM (con confianza >= umbral)
+tiene que salir con estos campos, y lo demás tiene que caer al LLM.
+Cada entrada es (tipo, texto, esperado); esperado None = debe delegar.
+"""
+import pytest
+
+from app.local_parser import (
+    LOCAL_PARSER_MIN_CONFIDENCE,
+    analyze_event,
+    analyze_note,
+    parse_event_locally,
+    parse_note_locally,
+)
+
+TZ = "Europe/Madrid"
+
+CORPUS = [
+    ("note", "mañana a las 17 llamar a Juan", {"title": "Llamar a Juan", "date_text": "mañana", "time_text": "17:00", "channel": "call"}),
+    ("note", "recuérdame llamar a mamá mañana a las 10", {"title": "Llamar a mamá", "date_text": "mañana", "time_text": "10:00"}),
+    ("note", "hoy a las 16:00 revisar presupuesto", {"title": "Revisar presupuesto", "date_text": "hoy", "time_text": "16:00"}),
+    ("note", "pasado mañana 14.30 reunión con Pedro", {"date_text": "pasado mañana", "time_text": "14:30"}),
+    ("note", "hoy 18h pádel", {"date_text": "hoy", "time_text": "18:00", "title": "Pádel"}),
+    ("note", "el 20 de enero a las 10:30 dentista", {"date_text": "el 20 de enero", "time_text": "10:30", "title": "Dentista"}),
+    ("note", "el viernes a las 5 de la tarde cerveza con Ana", {"date_text": "el viernes", "time_text": "17:00"}),
+    ("note", "el próximo jueves por la mañana revisar contrato", {"date_text": "el jueves", "day_part": "morning"}),
+    ("note", "esta tarde enviar email a Laura", {"date_text": "hoy", "day_part": "afternoon", "channel": "email"}),
+    ("note", "esta noche mandar whatsapp a Marta", {"date_text": "hoy", "day_part": "night", "channel": "whatsapp"}),
+    ("note", "mañana por la mañana sacar la basura", {"date_text": "mañana", "day_part": "morning"}),
+    ("note", "el martes a mediodía comer con Luis", {"date_text": "el martes", "day_part": "noon"}),
+    ("note", "comprar pan", {"title": "Comprar pan", "date_text": None, "time_text": None}),
+    ("note", "el lunes a las 9:15 entregar informe", {"date_text": "el lunes", "time_text": "09:15"}),
+    ("note", "tengo que pagar la luz el 3 de marzo", {"title": "Pagar la luz", "date_text": "el 3 de marzo"}),
+    ("note", "comprar pan y llamar a mamá", None),
+    ("note", "la semana que viene ir al médico", None),
+    ("note", "en 2 horas sacar al perro", None),
+    ("note", "el finde limpiar el garaje", None),
+    ("note", "llamar a Juan a las 5", None),
+    ("note", "cada lunes a las 19 gimnasio", None),
+    ("event", "cada lunes a las 19 gimnasio", {"title": "Gimnasio", "start_time": "19:00", "rrule": "FREQ=WEEKLY;BYDAY=MO"}),
+    ("event", "todos los días a las 8 tomar pastilla", {"start_time": "08:00", "rrule": "FREQ=DAILY"}),
+    ("event", "cada mes el día 1 a las 9 pagar alquiler", {"start_time": "09:00", "rrule": "FREQ=MONTHLY;BYMONTHDAY=1"}),
+    ("event", "los martes y jueves a las 18:30 inglés", {"rrule": "FREQ=WEEKLY;BYDAY=TU,TH", "start_time": "18:30"}),
+    ("event", "mañana de 16 a 17 reunión de equipo", {"date_text": "mañana", "start_time": "16:00", "end_time": "17:00"}),
+    ("event", "el viernes de 10 a 12 taller", {"date_text": "el viernes", "start_time": "10:00", "end_time": "12:00"}),
+    ("event", "el 14 de febrero a las 21 cena", {"date_text": "el 14 de febrero", "start_time": "21:00"}),
+    ("event", "cena con amigos", None),
+    ("event", "esta tarde café con Sara", None),
+    ("event", "la semana que viene a las 10 revisión", None),
+]
+
+
+ANALYZERS = {"note": analyze_note, "event": lambda text: analyze_event(text, TZ)}
+LOCAL = [(kind, text, expected) for kind, text, expected in CORPUS if expected is not None]
+DELEGATED = [(kind, text) for kind, text, expected in CORPUS if expected is None]
+
+
+@pytest.mark.parametrize("kind,text,expected", LOCAL)
+def test_resolved_locally(kind, text, expected):
+    result = ANALYZERS[kind](text)
+    assert result.confidence >= LOCAL_PARSER_MIN_CONFIDENCE
+    item = result.items[0]
+    assert {k: item.get(k) for k in expected} == expected
+
+
+@pytest.mark.parametrize("kind,text", DELEGATED)
+def test_below_threshold_falls_through(kind, text):
+    assert ANALYZERS[kind](text).confidence < LOCAL_PARSER_MIN_CONFIDENCE
+    if kind == "note":
+        assert parse_note_locally(text) is None
+    else:
+        assert parse_event_locally(text, TZ) is None
+
+
+class _StubLLM:
+    def __init__(self, result):
+        self.result = result
+        self.calls = []
+
+    def __call__(self, texto, now_iso, timezone):
+        self.calls.append(texto)
+        return self.result
+
+
+def test_tasks_from_text_calls_llm_only_below_threshold(client, user, monkeypatch):
+    from app.routers import tasks
+
+    _, headers = user
+    stub = _StubLLM([{"title": "Del LLM", "description": "x", "date_text": None, "time_text": None}])
+    monkeypatch.setattr(tasks, "parse_note_to_tasks", stub)
+
+    r = client.post("/tasks/from-text", json="mañana a las 17 llamar a Juan", headers=headers)
+    assert r.status_code == 200 and stub.calls == []
+    assert r.json()["tasks"][0]["title"] == "Llamar a Juan"
+
+    r = client.post("/tasks/from-text", json="comprar pan y llamar a mamá", headers=headers)
+    assert r.status_code == 200 and stub.calls == ["comprar pan y llamar a mamá"]
+    assert r.json()["tasks"][0]["title"] == "Del LLM"
+
+
+def test_events_from_text_calls_llm_only_below_threshold(client, user, monkeypatch):
+    from app.routers import events
+
+    _, headers = user
+    stub = _StubLLM({"title": "Del LLM", "description": "x", "date_text": "mañana", "start_time": "12:00", "end_time": None,
+                     "duration_minutes": 30, "rrule": None})
+    monkeypatch.setattr(events, "parse_text_to_event", stub)
+
+    r = client.post("/events/from-text", json="cada lunes a las 19 gimnasio", params={"conflicts": "ignore"},
+                    headers=headers)
+    assert r.status_code == 201 and stub.calls == []
+    assert r.json()["rrule"] == "FREQ=WEEKLY;BYDAY=MO"
+
+    r = client.post("/events/from-text", json="cena con amigos", params={"conflicts": "ignore"}, headers=headers)
+    assert r.status_code == 201 and stub.calls == ["cena con amigos"]
+    assert r.json()["title"] == "Del LLM"
@@ -0,0 +1,122 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, inspect, select, text
+
+from app import models
+from app.database import Base
+from app.migrations import MIGRATIONS, run_migrations
+
+# Esquema de la primera versión desplegada, antes de cualquier migración.
+# event_occurrences ya existía pero sin el índice único (lo pone la 5).
+BASELINE_DDL = [
+    """CREATE TABLE users (
+        id INTEGER PRIMARY KEY, email VARCHAR NOT NULL UNIQUE, hashed_password VARCHAR NOT NULL,
+        created_at TIMESTAMP)""",
+    """CREATE TABLE tasks (
+        id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL REFERENCES users(id), title VARCHAR NOT NULL,
+        description TEXT, date TIMESTAMP, channel VARCHAR, status VARCHAR NOT NULL,
+        created_at TIMESTAMP, completed_at TIMESTAMP)""",
+    """CREATE TABLE events (
+        id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL REFERENCES users(id), title VARCHAR NOT NULL,
+        description TEXT, start_at TIMESTAMP NOT NULL, end_at TIMESTAMP NOT NULL, rrule VARCHAR,
+        timezone VARCHAR NOT NULL, created_at TIMESTAMP)""",
+    """CREATE TABLE reminders (
+        id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL REFERENCES users(id), task_id INTEGER REFERENCES tasks(id),
+        title VARCHAR NOT NULL, description TEXT, deadline TIMESTAMP, remind_at TIMESTAMP NOT NULL,
+        frequency VARCHAR, rrule VARCHAR, is_active BOOLEAN, created_at TIMESTAMP)""",
+    """CREATE TABLE event_occurrences (
+        id INTEGER PRIMARY KEY, event_id INTEGER NOT NULL REFERENCES events(id), user_id INTEGER NOT NULL,
+        start_at TIMESTAMP NOT NULL, end_at TIMESTAMP NOT NULL)""",
+]
+
+BASELINE_ROWS = [
+    "INSERT INTO users (id, email, hashed_password) VALUES (1, 'old@example.com', 'x')",
+    "INSERT INTO tasks (id, user_id, title, status, created_at) VALUES (1, 1, 'sin alta', 'pending', NULL)",
+    "INSERT INTO tasks (id, user_id, title, status, created_at) VALUES (2, 1, 'con alta', 'pending', '2025-06-01 09:00:00')",
+    "INSERT INTO events (id, user_id, title, start_at, end_at, rrule, timezone) VALUES "
+    "(1, 1, 'semanal', '2026-01-05 10:00:00', '2026-01-05 11:00:00', 'FREQ=WEEKLY;COUNT=3', 'Europe/Madrid')",
+    "INSERT INTO events (id, user_id, title, start_at, end_at, rrule, timezone) VALUES "
+    "(2, 1, 'rota', '2026-01-05 10:00:00', '2026-01-05 11:00:00', 'FREQ=WEEKLY', 'Mars/Base')",
+    "INSERT INTO reminders (id, user_id, title, remind_at, frequency, is_active) VALUES "
+    "(1, 1, 'diario', '2020-01-01 08:00:00', 'daily', 1)",
+    "INSERT INTO reminders (id, user_id, title, remind_at, frequency, is_active) VALUES "
+    "(2, 1, 'pasado', '2020-01-01 08:00:00', 'once', 1)",
+    # Duplicados de workers concurrentes anteriores al índice único
+    "INSERT INTO event_occurrences (id, event_id, user_id, start_at, end_at) VALUES "
+    "(1, 1, 1, '2026-01-05 10:00:00', '2026-01-05 11:00:00'), "
+    "(2, 1, 1, '2026-01-05 10:00:00', '2026-01-05 11:00:00'), "
+    "(3, 1, 1, '2026-01-12 10:00:00', '2026-01-12 11:00:00')",
+]
+
+
+@pytest.fixture
+def old_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        for stmt in BASELINE_DDL + BASELINE_ROWS:
+            conn.execute(text(stmt))
+    yield engine
+    engine.dispose()
+
+
+def _columns(engine, table: str) -> set[str]:
+    return {c["name"] for c in inspect(engine).get_columns(table)}
+
+
+def test_upgrade_from_baseline_is_applied_once(old_engine):
+    # Igual que el arranque: create_all no toca las tablas que ya existen
+    Base.metadata.create_all(bind=old_engine)
+
+    assert run_migrations(old_engine) == [v for v, _, _ in MIGRATIONS]
+    assert run_migrations(old_engine) == []
+
+    with old_engine.connect() as conn:
+        rows = conn.execute(text("SELECT version, name FROM schema_migrations ORDER BY version")).fetchall()
+    assert [tuple(r) for r in rows] == [(v, name) for v, name, _ in MIGRATIONS]
+
+    assert {"occurrences_until", "series_start", "series_end"} <= _columns(old_engine, "events")
+    assert {"next_fire_at", "last_fired_at", "claimed_by", "claimed_until"} <= _columns(old_engine, "reminders")
+    assert "day_part" in _columns(old_engine, "tasks")
+    assert {"feed_version", "feed_updated_at", "feed_token_hash"} <= _columns(old_engine, "users")
+
+    indexes = {ix["name"] for t in ("tasks", "events", "reminders", "event_occurrences")
+               for ix in inspect(old_engine).get_indexes(t)}
+    assert {
+        "ix_tasks_user_date", "ix_tasks_user_created_at", "ix_events_user_start_at", "ix_events_user_series",
+        "ix_reminders_user_remind_at", "ix_reminders_next_fire_at", "ux_event_occurrences_event_start",
+    } <= indexes
+
+
+def test_upgrade_backfills_existing_rows(old_engine):
+    run_migrations(old_engine)
+
+    with old_engine.connect() as conn:
+        events = {
+            r.id: (r.series_start, r.series_end)
+            for r in conn.execute(select(models.Event.id, models.Event.series_start, models.Event.series_end))
+        }
+        # Tres lunes seguidos; la zona inválida se queda sin límites
+        assert events[1] == (datetime(2026, 1, 5, 10, 0), datetime(2026, 1, 19, 11, 0))
+        assert events[2] == (None, None)
+
+        created = dict(conn.execute(select(models.Task.id, models.Task.created_at)).all())
+        assert created == {1: datetime(1970, 1, 1), 2: datetime(2025, 6, 1, 9, 0)}
+
+        fire = dict(conn.execute(select(models.Reminder.id, models.Reminder.next_fire_at)).all())
+        assert fire[1] is not None and fire[1] > datetime.utcnow()
+        assert fire[2] is None
+
+        occurrences = conn.execute(text("SELECT id FROM event_occurrences ORDER BY id")).scalars().all()
+        assert occurrences == [1, 3]
+
+        user = conn.execute(select(models.User.feed_version, models.User.feed_updated_at)).one()
+        assert user.feed_version == 0 and user.feed_updated_at is not None
+
+
+def test_fresh_database_only_records_versions(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'new.db'}")
+    Base.metadata.create_all(bind=engine)
+    assert run_migrations(engine) == [v for v, _, _ in MIGRATIONS]
+    assert run_migrations(engine) == []
+    engine.dispose()
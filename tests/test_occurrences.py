@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+
+from app import models, occurrences
+from app.occurrences import extend_all, inline_horizon_end, materialize_event
+
+
+def _occurrences(db, event_id):
+    return [
+        s for (s,) in db.query(models.EventOccurrence.start_at)
+        .filter(models.EventOccurrence.event_id == event_id)
+        .order_by(models.EventOccurrence.start_at)
+    ]
+
+
+def test_create_materializes_only_the_inline_window(client, user, db):
+    _, headers = user
+    start = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0)
+    payload = {"title": "diario", "start_at": start.isoformat(), "end_at": (start + timedelta(hours=1)).isoformat(),
+               "rrule": "FREQ=DAILY"}
+    ev_id = client.post("/events/", json=payload, params={"conflicts": "ignore"}, headers=headers).json()["id"]
+
+    starts = _occurrences(db, ev_id)
+    assert starts[0] == start
+    assert starts[-1] <= inline_horizon_end()
+    assert len(starts) <= occurrences.INLINE_DAYS + 1
+
+    # El worker completa el horizonte sin duplicar lo ya insertado
+    extend_all()
+    db.expire_all()
+    extended = _occurrences(db, ev_id)
+    assert len(extended) > len(starts) and len(set(extended)) == len(extended)
+    assert extended[: len(starts)] == starts
+
+
+def test_materialize_caps_rows_per_call(db, user, monkeypatch):
+    user_id, _ = user
+    monkeypatch.setattr(occurrences, "MAX_PER_EVENT", 10)
+    start = datetime(2026, 1, 1, 8)
+    ev = models.Event(user_id=user_id, title="denso", start_at=start, end_at=start + timedelta(minutes=30),
+                      rrule="FREQ=DAILY", timezone="Europe/Madrid")
+    db.add(ev)
+    db.flush()
+
+    until = start + timedelta(days=100)
+    assert materialize_event(db, ev, until) == 10
+    assert ev.occurrences_until == start + timedelta(days=9)
+    assert materialize_event(db, ev, until) == 10
+    db.commit()
+    starts = _occurrences(db, ev.id)
+    assert starts == [start + timedelta(days=i) for i in range(20)]
@@ -0,0 +1,103 @@
+import base64
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app import models
+from app.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+
+T0 = datetime(2026, 10, 14, 9, 0)
+
+
+def _seed(db, user_id: int, n: int = 23) -> None:
+    # Grupos de 4 filas con la misma fecha: el desempate por id entra en juego
+    for i in range(n):
+        ts = T0 + timedelta(minutes=i // 4)
+        db.add(models.Task(user_id=user_id, title=f"t{i}", created_at=ts))
+        db.add(models.Event(user_id=user_id, title=f"e{i}", start_at=ts, end_at=ts + timedelta(hours=1),
+                            timezone="Europe/Madrid"))
+        db.add(models.Reminder(user_id=user_id, title=f"r{i}", remind_at=ts, frequency="once"))
+    db.commit()
+
+
+def _walk(client, path: str, headers: dict, limit: int) -> list[dict]:
+    rows, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": limit} | ({"cursor": cursor} if cursor else {})
+        r = client.get(path, params=params, headers=headers)
+        assert r.status_code == 200, r.text
+        page = r.json()
+        assert len(page) <= limit
+        rows += page
+        pages += 1
+        cursor = r.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return rows
+        assert pages < 100
+
+
+@pytest.mark.parametrize(
+    "path,sort_key,descending",
+    [("/tasks/", "created_at", True), ("/events/", "start_at", True), ("/reminders/", "remind_at", False)],
+)
+@pytest.mark.parametrize("limit", [1, 3, 4, 5, 23, 50])
+def test_pages_cover_the_full_list_in_order(client, user, db, path, sort_key, descending, limit):
+    user_id, headers = user
+    _seed(db, user_id)
+
+    everything = client.get(path, headers=headers)
+    # Sin limit ni cursor se mantiene la respuesta de siempre: todo, sin cabecera
+    assert len(everything.json()) == 23
+    assert NEXT_CURSOR_HEADER not in everything.headers
+
+    rows = _walk(client, path, headers, limit)
+    assert [r["id"] for r in rows] == [r["id"] for r in everything.json()]
+    assert len({r["id"] for r in rows}) == 23
+
+    keys = [(r[sort_key], r["id"]) for r in rows]
+    assert keys == sorted(keys, reverse=descending)
+
+
+def test_ties_are_split_by_id_across_pages(client, user, db):
+    user_id, headers = user
+    tasks = [models.Task(user_id=user_id, title=f"mismo instante {i}", created_at=T0) for i in range(5)]
+    db.add_all(tasks)
+    db.commit()
+    ids = sorted((t.id for t in tasks), reverse=True)
+
+    first = client.get("/tasks/", params={"limit": 2}, headers=headers)
+    assert [t["id"] for t in first.json()] == ids[:2]
+    assert decode_cursor(first.headers[NEXT_CURSOR_HEADER]) == (T0, ids[1])
+
+    second = client.get("/tasks/", params={"limit": 2, "cursor": first.headers[NEXT_CURSOR_HEADER]}, headers=headers)
+    assert [t["id"] for t in second.json()] == ids[2:4]
+
+
+def test_cursor_round_trip():
+    for value in (T0, T0.replace(microsecond=123456), datetime(1970, 1, 1)):
+        cursor = encode_cursor(value, 42)
+        assert "=" not in cursor
+        assert decode_cursor(cursor) == (value, 42)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "no-es-base64!!",
+        base64.urlsafe_b64encode(b"no es json").decode(),
+        base64.urlsafe_b64encode(b'["2026-10-14T09:00:00"]').decode(),
+        base64.urlsafe_b64encode(b'["ayer", 3]').decode(),
+        base64.urlsafe_b64encode(b'["2026-10-14T09:00:00", "x"]').decode(),
+    ],
+)
+def test_malformed_cursor_is_rejected(client, user, cursor):
+    _, headers = user
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor)
+    assert exc.value.status_code == 400
+
+    for path in ("/tasks/", "/events/", "/reminders/"):
+        r = client.get(path, params={"cursor": cursor}, headers=headers)
+        assert r.status_code == 400
+        assert r.json()["detail"] == "Cursor inválido"
@@ -0,0 +1,113 @@
+import random
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.recurrence import RRULE_MAX_COUNT, expand_occurrences, next_occurrence_after, series_bounds
+
+TZ = "Europe/Madrid"
+START = datetime(2026, 1, 5, 10, 0)
+END = START + timedelta(hours=1)
+
+
+def test_series_bounds_dense_until_does_not_walk_occurrences():
+    t0 = time.perf_counter()
+    bounds = series_bounds(START, END, "FREQ=DAILY;UNTIL=22000101T000000Z", TZ)
+    assert time.perf_counter() - t0 < 0.5
+    # 00:00Z del 1 de enero son las 01:00 en Madrid; más la duración
+    assert bounds == (START, datetime(2200, 1, 1, 2, 0))
+
+
+@pytest.mark.parametrize("freq", ["SECONDLY", "MINUTELY", "HOURLY"])
+def test_series_bounds_rejects_sub_daily_rules(freq):
+    t0 = time.perf_counter()
+    with pytest.raises(ValueError):
+        series_bounds(START, END, f"FREQ={freq};UNTIL=20300101T000000Z", TZ)
+    assert time.perf_counter() - t0 < 0.5
+
+
+def test_series_bounds_count():
+    assert series_bounds(START, END, "FREQ=WEEKLY;COUNT=10", TZ) == (START, datetime(2026, 3, 9, 11, 0))
+    with pytest.raises(ValueError):
+        series_bounds(START, END, f"FREQ=DAILY;COUNT={RRULE_MAX_COUNT + 1}", TZ)
+
+
+def test_series_bounds_until_before_start_and_open_ended():
+    assert series_bounds(START, END, "FREQ=MONTHLY;UNTIL=20200101T000000Z", TZ) == (START, END)
+    assert series_bounds(START, END, "FREQ=WEEKLY;BYDAY=MO", TZ) == (START, None)
+    assert series_bounds(START, END, None, TZ) == (START, END)
+
+
+# --- Vía vectorizada frente a dateutil -------------------------------------
+
+_CODES = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+YEAR = (datetime(2026, 1, 1), datetime(2026, 12, 31, 23, 59))
+
+
+def random_series(n: int, seed: int = 42) -> list[tuple[datetime, datetime, str]]:
+    rnd = random.Random(seed)
+    out = []
+    for _ in range(n):
+        freq = rnd.choice(["DAILY", "WEEKLY", "WEEKLY", "MONTHLY"])
+        rule = f"FREQ={freq}"
+        if freq == "WEEKLY":
+            rule += ";BYDAY=" + ",".join(rnd.sample(_CODES, rnd.randint(1, 3)))
+        elif freq == "MONTHLY":
+            rule += f";BYMONTHDAY={rnd.randint(1, 31)}"
+        if rnd.random() < 0.3:
+            rule += f";INTERVAL={rnd.randint(2, 4)}"
+        if rnd.random() < 0.2:
+            rule += f";UNTIL=2026{rnd.randint(1, 12):02d}{rnd.randint(1, 28):02d}T{rnd.randint(0, 23):02d}0000Z"
+        start = datetime(2025, 1, 1, rnd.randint(0, 23), rnd.choice([0, 15, 30, 45])) + timedelta(days=rnd.randint(0, 540))
+        out.append((start, start + timedelta(minutes=rnd.choice([30, 60, 90, 600])), rule))
+    return out
+
+
+def dst_series() -> list[tuple[datetime, datetime, str]]:
+    """Series a horas que no existen (29 de marzo de 2026) o se repiten (25 de octubre) en Madrid."""
+    out = []
+    for start in (datetime(2026, 3, 1, 2, 30), datetime(2026, 10, 4, 2, 30), datetime(2026, 3, 22, 2, 0)):
+        for rule in (
+            "FREQ=DAILY",
+            "FREQ=WEEKLY;BYDAY=SU",
+            "FREQ=WEEKLY;BYDAY=SA,SU;INTERVAL=1",
+            "FREQ=MONTHLY;BYMONTHDAY=25,29",
+            # UNTIL en UTC justo en el cambio: 01:00Z es el instante del salto
+            "FREQ=DAILY;UNTIL=20260329T010000Z",
+            "FREQ=DAILY;UNTIL=20261025T010000Z",
+        ):
+            out.append((start, start + timedelta(minutes=90), rule))
+    return out
+
+
+def _assert_same(series, lo, hi):
+    for start, end, rule in series:
+        fast = expand_occurrences(start, end, rule, TZ, lo, hi, fast=True)
+        slow = expand_occurrences(start, end, rule, TZ, lo, hi, fast=False)
+        assert fast == slow, (start, rule, sorted(set(fast) ^ set(slow))[:5])
+
+
+def test_vectorized_matches_dateutil_random_rules():
+    _assert_same(random_series(300), *YEAR)
+
+
+def test_vectorized_matches_dateutil_across_dst():
+    _assert_same(dst_series(), *YEAR)
+    # Ventanas estrechas alrededor de cada cambio de hora
+    _assert_same(dst_series(), datetime(2026, 3, 29, 1), datetime(2026, 3, 29, 4))
+    _assert_same(dst_series(), datetime(2026, 10, 25, 1), datetime(2026, 10, 25, 4))
+
+
+@pytest.mark.parametrize("start,end,rule", dst_series())
+def test_next_occurrence_after_matches_dateutil_across_dst(start, end, rule):
+    from zoneinfo import ZoneInfo
+
+    from app.recurrence import get_rule
+
+    tz = ZoneInfo(TZ)
+    for after in (datetime(2026, 3, 28, 12), datetime(2026, 3, 29, 2, 30), datetime(2026, 10, 24, 12),
+                  datetime(2026, 10, 25, 2, 30)):
+        occ = get_rule(rule, start, TZ).after(after.replace(tzinfo=tz), inc=False)
+        expected = occ.astimezone(tz).replace(tzinfo=None) if occ is not None else None
+        assert next_occurrence_after(start, rule, TZ, after) == expected
@@ -0,0 +1,22 @@
+"""
+Importar app.main (lo que paga cada worker al arrancar) no debe cargar las
+dependencias pesadas que se usan bajo demanda ni pasarse del presupuesto.
+"""
+import statistics
+
+from benchmarks.bench_startup import DEFERRED, IMPORT_BUDGET_MS, measure
+
+TARGET = "app.main"
+
+
+def test_import_does_not_load_deferred_dependencies():
+    _, _, loaded = measure(TARGET)
+    assert loaded == [], f"se importan al arrancar: {loaded} (deben cargarse al usarse: {DEFERRED})"
+
+
+def test_import_time_within_budget():
+    # La primera ejecución compila .pyc; se mide la mediana de las siguientes
+    measure(TARGET)
+    totals = [measure(TARGET)[0] for _ in range(3)]
+    median = statistics.median(totals)
+    assert median <= IMPORT_BUDGET_MS, f"import {TARGET}: {median:.0f} ms > {IMPORT_BUDGET_MS:.0f} ms"